@@ -0,0 +1,64 @@
+"""
+Compare aggregate_entries with the previous render-data path of timetracker.py.
+Run from the repository root: python -m benchmarks.bench_aggregation
+"""
+import sys
+import time
+from datetime import date
+import pandas as pd
+
+from timetrackerfunctions import summarize_weekly_hours, summarize_monthly_hours, calculate_overtime
+from timetrackeraggregation import aggregate_entries
+from benchmarks.synthetic import make_entries, make_weekly_history
+
+
+def previous_path(entries_df, settings, whist, today):
+    """
+    The steps timetracker.py used to run: parse dates in the script, again in each
+    summarize function and per row for the entries list, and compute isocalendar twice.
+    """
+    entries_df = entries_df.copy()
+    entries_df["Date"] = pd.to_datetime(entries_df["Date"], errors="coerce")
+    entries_df["Start time"] = pd.to_datetime(entries_df["Start time"], format="%H:%M", errors="coerce")
+    entries_df = entries_df.sort_values(by=["Date", "Start time"], ascending=[False, False]).reset_index(drop=True)
+    year_now, week_now, _ = today.isocalendar()
+    mask = (entries_df["Date"].dt.isocalendar().year == year_now) & (entries_df["Date"].dt.isocalendar().week == week_now)
+    this_week = entries_df[mask].copy()
+    entries_df["Hours worked"] = pd.to_numeric(entries_df["Hours worked"], errors="coerce").round(2)
+    entries_df["Earnings"] = pd.to_numeric(entries_df["Earnings"], errors="coerce").round(2)
+    weekly = summarize_weekly_hours(entries_df).round(2)
+    weekly = calculate_overtime(weekly, settings, whist)
+    monthly = summarize_monthly_hours(entries_df).round(2)
+    date_strs = [pd.to_datetime(d).strftime("%d.%m.%Y") for d in entries_df["Date"]]
+    return this_week, weekly, monthly, date_strs
+
+
+def new_path(entries_df, settings, whist, today):
+    aggregated = aggregate_entries(entries_df, settings, whist, today)
+    date_strs = aggregated["entries"]["Date"].dt.strftime("%d.%m.%Y")
+    return aggregated, date_strs
+
+
+def best_of(func, *args, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    settings = {"estimated_weekly_hours": 40.0}
+    today = date.today()
+    print(f"{'entries':>10} {'previous [ms]':>14} {'aggregate [ms]':>15} {'speedup':>8}")
+    for n in sizes:
+        entries_df = make_entries(n)
+        whist = make_weekly_history(entries_df)
+        previous = best_of(previous_path, entries_df, settings, whist, today)
+        new = best_of(new_path, entries_df, settings, whist, today)
+        print(f"{n:>10} {previous * 1000:>14.1f} {new * 1000:>15.1f} {previous / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (1_000, 10_000, 100_000))
@@ -0,0 +1,214 @@
+"""
+Benchmark the timetrackerfunctions hot paths and the full render-data path on synthetic histories.
+Results are written as JSON (one record per benchmark and size) so scaling curves can be
+tracked over time; --compare flags benchmarks that got slower than a previous result file.
+Run from the repository root:
+    python -m benchmarks.bench_functions [--sizes 1000 10000 ...] [--output FILE] [--compare OLD.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+import timetrackerfunctions
+from timetrackerfunctions import (
+    summarize_weekly_hours,
+    summarize_monthly_hours,
+    calculate_overtime,
+    fmt_time,
+    safe_sum,
+    plot_weekly_hours,
+    format_entries_table,
+    build_calendar,
+    render_calendar_html,
+    ENTRY_COLUMNS
+)
+from timetrackeraggregation import aggregate_entries, compact_entries
+from timetrackerstorage import memory_storage, CachedStorage
+from timetrackerrollups import RollupStorage, rebuild_rollups
+from benchmarks.synthetic import make_entries, make_weekly_history
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SETTINGS = {"default_job_name": "Cafe", "default_hourly_wage": 14.0, "estimated_weekly_hours": 40.0}
+
+
+def timed(func, repeat):
+    """
+    Run func `repeat` times and return the run times in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def fake_sheet_storage(entries_df, whist):
+    """
+    The app's storage stack on in-memory worksheets holding the given entries, settings,
+    weekly history and rollups.
+    """
+    sheets = memory_storage()
+    sheets.entries_sheet.append_rows(entries_df[ENTRY_COLUMNS].values.tolist())
+    sheets.save_settings(SETTINGS)
+    sheets.save_weekly_hours_history(whist)
+    storage = RollupStorage(CachedStorage(sheets))
+    rebuild_rollups(storage)
+    return storage
+
+
+def render_path(storage, today):
+    """
+    What one rerun of timetracker.py computes after login: the entry index, rollups,
+    this week's entries, the summaries, the 4-week chart, the per job summary and the first
+    page of entries.
+    """
+    settings = storage.load_settings()
+    whist = storage.load_weekly_hours_history()
+    monday = today - timedelta(days=today.weekday())
+    entry_index = storage.entry_index()
+    rollups = storage.load_rollups()
+    aggregated = aggregate_entries(entry_index.entries_between(monday, monday + timedelta(days=6)), settings, whist, today, rollups)
+    plot_weekly_hours(aggregated["weekly"], weeks=4, today=today)
+    entry_index.totals_by_job("month", (today - timedelta(weeks=3)).replace(day=1), today)
+    format_entries_table(storage.load_entries_page(limit=50))
+    return aggregated
+
+
+def cold_plot(weekly, today):
+    timetrackerfunctions._figure_cache.clear()
+    return plot_weekly_hours(weekly, weeks=52, today=today)
+
+
+def cold_render(storage, today):
+    storage.invalidate()
+    timetrackerfunctions._figure_cache.clear()
+    return render_path(storage, today)
+
+
+def benchmarks(entries_df, whist, today):
+    """
+    Return {name: zero-argument callable} for one synthetic history.
+    """
+    typed = entries_df.assign(
+        Date=pd.to_datetime(entries_df["Date"]),
+        **{"Hours worked": pd.to_numeric(entries_df["Hours worked"]), "Earnings": pd.to_numeric(entries_df["Earnings"])}
+    )
+    weekly = summarize_weekly_hours(typed).round(2)
+    weekly_with_overtime = calculate_overtime(weekly.copy(), SETTINGS, whist)
+    minutes = compact_entries(entries_df[["Start time"]])["Start time"]
+    monday = today - timedelta(days=today.weekday())
+    recent = compact_entries(entries_df[pd.to_datetime(entries_df["Date"]) >= pd.Timestamp(monday - timedelta(weeks=3))])
+    storage = fake_sheet_storage(entries_df, whist)
+    return {
+        "summarize_weekly_hours": lambda: summarize_weekly_hours(typed),
+        "summarize_monthly_hours": lambda: summarize_monthly_hours(typed),
+        "calculate_overtime": lambda: calculate_overtime(weekly.copy(), SETTINGS, whist),
+        "fmt_time (strings)": lambda: fmt_time(entries_df["Start time"]),
+        "fmt_time (minutes)": lambda: fmt_time(minutes),
+        "safe_sum": lambda: safe_sum(entries_df["Hours worked"]),
+        "calendar (4 weeks)": lambda: render_calendar_html(build_calendar(recent, monday - timedelta(weeks=3), 4)),
+        "plot_weekly_hours (year, cold)": lambda: cold_plot(weekly_with_overtime, today),
+        "render path (cold cache)": lambda: cold_render(storage, today),
+        "render path (warm cache)": lambda: render_path(storage, today)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat):
+    """
+    Run all benchmarks for all sizes and return the JSON-ready result dict.
+    """
+    today = date.today()
+    results = []
+    for n in sizes:
+        entries_df = make_entries(n, end=today)
+        whist = make_weekly_history(entries_df, every=4)
+        for name, func in benchmarks(entries_df, whist, today).items():
+            times = timed(func, repeat)
+            results.append({
+                "benchmark": name,
+                "entries": n,
+                "best_ms": round(min(times), 3),
+                "median_ms": round(statistics.median(times), 3),
+                "repeat": repeat
+            })
+            print(f"{name:<32} {n:>9} {min(times):>11.2f} {statistics.median(times):>11.2f}")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine()
+        },
+        "results": results
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Return the results that are more than `tolerance` (e.g. 0.25 = 25%) slower than in the baseline.
+    """
+    previous = {(r["benchmark"], r["entries"]): r["best_ms"] for r in baseline["results"]}
+    slower = []
+    for result in report["results"]:
+        old = previous.get((result["benchmark"], result["entries"]))
+        if old and result["best_ms"] > old * (1 + tolerance):
+            slower.append({**result, "baseline_ms": old})
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the time tracker hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<date>-<commit>.json)")
+    parser.add_argument("--compare", help="previous result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. --compare")
+    args = parser.parse_args(argv)
+
+    print(f"{'benchmark':<32} {'entries':>9} {'best [ms]':>11} {'median [ms]':>11}")
+    report = run(args.sizes, args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['commit'] or 'nogit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = compare(report, json.load(f), args.tolerance)
+        for result in slower:
+            print(f"SLOWER: {result['benchmark']} ({result['entries']} entries): "
+                  f"{result['baseline_ms']:.2f} -> {result['best_ms']:.2f} ms")
+        if slower:
+            return 1
+        print(f"No benchmark is more than {args.tolerance:.0%} slower than {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
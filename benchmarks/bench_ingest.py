@@ -0,0 +1,181 @@
+"""
+Load test for the clock-in/clock-out ingestion service against local fake worksheets.
+Starts a ClockService in-process, lets concurrent keep-alive clients send start/stop pairs
+for many users and reports events per second, request latencies and worksheet calls.
+Afterwards every entry must be stored exactly once with consistent rollups.
+Run from the repository root:
+    python -m benchmarks.bench_ingest [--clients 20] [--users 50] [--pairs 2000] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from timetrackerstorage import memory_storage, CachedStorage
+from timetrackerrollups import RollupStorage, check_rollups
+from timetrackermetrics import Metrics, instrument_sheets
+from timetrackeringest import ClockService
+
+SETTINGS = {"default_job_name": "Cafe", "default_hourly_wage": 14.0, "estimated_weekly_hours": 40.0}
+
+
+class SlowWorksheet:
+    """
+    Wrap a worksheet and delay every call by `latency` seconds, like a round trip to the Sheets API.
+    """
+
+    def __init__(self, sheet, latency):
+        self.sheet = sheet
+        self.latency = latency
+
+    def __getattr__(self, name):
+        if name == "sheet":
+            raise AttributeError(name)
+        attr = getattr(self.sheet, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self.latency)
+            return attr(*args, **kwargs)
+
+        return call
+
+
+def fake_storage(metrics, latency):
+    """
+    The service's storage stack for one user on in-memory worksheets, with counted (and optionally slow) calls.
+    """
+    sheets = memory_storage()
+    sheets.save_settings(SETTINGS)
+    if latency:
+        for attr in ("entries_sheet", "settings_sheet", "weekly_sheet", "rollups_sheet", "rates_sheet"):
+            setattr(sheets, attr, SlowWorksheet(getattr(sheets, attr), latency))
+    instrument_sheets(sheets, metrics)
+    return RollupStorage(CachedStorage(sheets))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def post(reader, writer, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST /events HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, users, pairs, latencies, errors):
+    """
+    Send start/stop pairs round-robin over `users` on one connection, one day per pair and user.
+    Returns the number of pairs sent.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    first_day = date(2026, 1, 5)
+    try:
+        for i in range(pairs):
+            user = users[i % len(users)]
+            day = first_day + timedelta(days=i // len(users))
+            for event in (
+                {"action": "start", "user": user, "time": f"{day}T08:00"},
+                {"action": "stop", "user": user, "time": f"{day}T16:30", "break_minutes": 30}
+            ):
+                start = time.perf_counter()
+                status, result = await post(reader, writer, event)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if status != 200 or result["status"] == "error":
+                    errors.append(result)
+    finally:
+        writer.close()
+    return pairs
+
+
+async def run(args):
+    metrics = Metrics()
+    storages = {}
+
+    def open_user_storage(user):
+        storages[user] = fake_storage(metrics, args.latency)
+        return storages[user]
+
+    users = [f"user{i:03d}" for i in range(args.users)]
+    service = ClockService(open_user_storage, args.batch_size, args.interval, None, args.writers, users)
+    port = free_port()
+    ready = asyncio.Event()
+    server = asyncio.create_task(service.serve("127.0.0.1", port, ready=ready))
+    await ready.wait()
+
+    # Every client gets its own users, so each user's events arrive in order
+    groups = [users[i::args.clients] for i in range(args.clients)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    sent = await asyncio.gather(*(
+        client(port, group, args.pairs * len(group) // len(users), latencies, errors)
+        for group in groups if group
+    ))
+    elapsed = time.perf_counter() - start
+    server.cancel()
+    try:
+        await server
+    except asyncio.CancelledError:
+        pass
+    return service, storages, metrics, latencies, errors, sum(sent), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the clock-in/clock-out ingestion service.")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent connections")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pairs", type=int, default=2000, help="start/stop pairs in total")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between flushes")
+    parser.add_argument("--writers", type=int, default=4, help="users written at the same time")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per worksheet call")
+    args = parser.parse_args(argv)
+    args.clients = min(args.clients, args.users)
+
+    service, storages, metrics, latencies, errors, expected, elapsed = asyncio.run(run(args))
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    sheet_calls = sum(stats["calls"] for name, stats in metrics.totals.items() if name.startswith("sheet."))
+    appends = sum(stats["calls"] for name, stats in metrics.totals.items() if name.endswith(".append_rows"))
+    stored = sum(len(storage.load_entries()) for storage in storages.values())
+    inconsistent = [user for user, storage in storages.items() if not check_rollups(storage).empty]
+
+    print(f"{'events':>8} {'events/s':>9} {'p50 [ms]':>9} {'p95 [ms]':>9} {'p99 [ms]':>9} "
+          f"{'batches':>8} {'appends':>8} {'sheet calls':>12}")
+    print(f"{len(latencies):>8} {len(latencies) / elapsed:>9.0f} {quantiles[49]:>9.2f} {quantiles[94]:>9.2f} "
+          f"{quantiles[98]:>9.2f} {service.stats['batches']:>8} {appends:>8} {sheet_calls:>12}")
+    failures = []
+    if errors:
+        failures.append(f"{len(errors)} events rejected, e.g. {errors[0]}")
+    if stored != expected:
+        failures.append(f"{stored} entries stored, expected {expected}")
+    if inconsistent:
+        failures.append(f"rollups inconsistent for {len(inconsistent)} users")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
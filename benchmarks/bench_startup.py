@@ -0,0 +1,85 @@
+"""
+Measure startup: import time of the app modules and the first paint of the password screen.
+Every measurement runs in a fresh interpreter, so nothing is cached between runs.
+Exits with status 1 if the password screen loads a heavy module or a time exceeds its budget.
+Run from the repository root: python -m benchmarks.bench_startup [--repeat N]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules the password screen must not load
+HEAVY_MODULES = ("pandas", "numpy", "plotly.graph_objects", "gspread", "google.auth", "pyarrow")
+
+# Best-of times in milliseconds; generous, they only catch large regressions
+BUDGETS_MS = {
+    "import timetrackerfunctions": 1500,
+    "import timetrackerstorage": 2000,
+    "password screen": 3000
+}
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+# AppTest itself is imported before the clock starts; only the script run is timed
+FIRST_PAINT_SCRIPT = """
+import hashlib, json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("timetracker.py", default_timeout=60)
+app.secrets["password_hash"] = hashlib.sha256(b"benchmark").hexdigest()
+before = set(sys.modules)
+start = time.perf_counter()
+app.run()
+ms = (time.perf_counter() - start) * 1000
+loaded = sorted(m for m in {heavy!r} if m in sys.modules and m not in before)
+print(json.dumps({{"ms": ms, "loaded": loaded, "inputs": [w.label for w in app.text_input]}}))
+"""
+
+
+def run_python(script):
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat=3):
+    """
+    Return {name: best time in ms} plus the heavy modules loaded by the password screen.
+    """
+    results = {}
+    for module in ("timetrackerfunctions", "timetrackerstorage"):
+        results[f"import {module}"] = min(
+            run_python(IMPORT_SCRIPT.format(module=module))["ms"] for _ in range(repeat)
+        )
+    paints = [run_python(FIRST_PAINT_SCRIPT.format(heavy=HEAVY_MODULES)) for _ in range(repeat)]
+    results["password screen"] = min(paint["ms"] for paint in paints)
+    loaded = sorted({module for paint in paints for module in paint["loaded"]})
+    return results, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and first paint of the app.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results, loaded = measure(args.repeat)
+    failed = False
+    print(f"{'step':<30} {'best [ms]':>10} {'budget [ms]':>12}")
+    for name, ms in results.items():
+        over = ms > BUDGETS_MS[name]
+        failed |= over
+        print(f"{name:<30} {ms:>10.0f} {BUDGETS_MS[name]:>12}{'  OVER BUDGET' if over else ''}")
+    if loaded:
+        failed = True
+        print(f"The password screen loaded heavy modules: {', '.join(loaded)}")
+    else:
+        print("The password screen loaded no heavy modules.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
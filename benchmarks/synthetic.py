@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import ENTRY_COLUMNS, new_entry_id
+
+# Longest generated history (about 50 years), keeps 1M-entry sets within the datetime range
+MAX_DAYS = 50 * 365
+
+
+def make_entries(n, jobs=("Cafe", "Library", "Tutoring"), end=None, seed=0):
+    """
+    Generate n synthetic entries as the storage layer returns them
+    (string dates and 'HH:MM' times, numeric hours/earnings), roughly one to three per day
+    going back from `end` (default: today); very large histories are packed into MAX_DAYS
+    with more entries per day.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+    days_back = np.sort(rng.integers(0, min(max(n // 2, 1), MAX_DAYS), n))[::-1]
+    dates = end - pd.to_timedelta(days_back, unit="D")
+    start = rng.integers(6 * 60, 14 * 60, n)
+    length = rng.integers(2 * 60, 9 * 60, n)
+    breaks = rng.choice([0, 15, 30, 45], n)
+    wages = rng.choice([12.5, 14.0, 18.0], n)
+    hours = np.round(np.clip(length - breaks, 0, None) / 60, 2)
+    df = pd.DataFrame({
+        "Job Name": rng.choice(list(jobs), n),
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Start time": [f"{m // 60:02d}:{m % 60:02d}" for m in start],
+        "End time": [f"{m // 60:02d}:{m % 60:02d}" for m in start + length],
+        "Break minutes": breaks,
+        "Hours worked": hours,
+        "Earnings": np.round(hours * wages, 2),
+        "ID": [new_entry_id() for _ in range(n)],
+        "Modified": "2026-01-01T00:00:00.000+00:00"
+    })
+    return df[ENTRY_COLUMNS]
+
+
+def make_weekly_history(entries_df, every=4, seed=0):
+    """
+    Build a sparse weekly hours history: a target for roughly every `every`-th week with entries.
+    """
+    rng = np.random.default_rng(seed)
+    iso = pd.to_datetime(entries_df["Date"]).dt.isocalendar()
+    week_ids = sorted({f"{y}-{w:02d}" for y, w in zip(iso["year"], iso["week"])})
+    return {week_id: float(rng.choice([20, 30, 38.5, 40])) for week_id in week_ids[::every]}
@@ -0,0 +1,44 @@
+"""
+Shared fixtures: every storage test runs against the in-memory worksheets and an
+in-memory SQLite database, so the suite needs neither Google credentials nor files.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetrackerstorage import memory_storage, SQLiteStorage
+
+SETTINGS = {"default_job_name": "Cafe", "default_hourly_wage": 10.0, "estimated_weekly_hours": 40.0}
+BACKENDS = ("memory", "sqlite")
+
+
+def open_backend(name):
+    storage = memory_storage() if name == "memory" else SQLiteStorage(":memory:")
+    storage.save_settings(SETTINGS)
+    return storage
+
+
+def make_entry(day, start="09:00", end="17:00", break_minutes=30, job="Cafe", wage=10.0):
+    """
+    A new entry (without ID) as the app saves it, with hours and earnings filled in.
+    """
+    start_h, start_m = map(int, start.split(":"))
+    end_h, end_m = map(int, end.split(":"))
+    hours = round(max(0, (end_h * 60 + end_m) - (start_h * 60 + start_m) - break_minutes) / 60, 2)
+    return {
+        "Job Name": job,
+        "Date": str(day),
+        "Start time": start,
+        "End time": end,
+        "Break minutes": break_minutes,
+        "Hours worked": hours,
+        "Earnings": round(hours * wage, 2)
+    }
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return open_backend(request.param)
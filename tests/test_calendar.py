@@ -0,0 +1,39 @@
+from datetime import date
+
+import pandas as pd
+
+from conftest import make_entry
+from timetrackeraggregation import compact_entries
+from timetrackerfunctions import build_calendar, render_calendar_html
+
+MONDAY = date(2026, 10, 12)
+
+
+def calendar_entries():
+    return pd.DataFrame([
+        make_entry(date(2026, 10, 13), "14:00", "18:00", 0, job="Library"),
+        make_entry(date(2026, 10, 13), "08:00", "12:00", 0),
+        make_entry(date(2026, 10, 19), "09:00", "11:00", 0, job="<Bar>"),
+        make_entry(date(2026, 10, 11), "09:00", "17:00"),   # the Sunday before
+        make_entry(date(2026, 10, 26), "09:00", "17:00")    # after two weeks
+    ])
+
+
+def test_entries_land_on_their_day_in_start_order():
+    for entries in (calendar_entries(), compact_entries(calendar_entries())):
+        calendar = build_calendar(entries, MONDAY, weeks=2)
+        assert [len(week) for week in calendar] == [7, 7]
+        assert [day["date"] for day in calendar[0]][:2] == [date(2026, 10, 12), date(2026, 10, 13)]
+        tuesday = calendar[0][1]
+        assert (tuesday["label"], tuesday["day"]) == ("Tue", "13.10.")
+        assert [entry["job"] for entry in tuesday["entries"]] == ["Cafe", "Library"]
+        assert tuesday["entries"][0]["time"] == "08:00–12:00"
+        assert (tuesday["hours"], tuesday["earnings"]) == (8.0, 80.0)
+        assert sum(len(day["entries"]) for week in calendar for day in week) == 3
+        assert calendar[1][0]["entries"][0]["hours"] == "2.00"
+
+
+def test_rendered_calendar_escapes_job_names():
+    html = render_calendar_html(build_calendar(calendar_entries(), MONDAY, weeks=2))
+    assert html.count("<b>Mon<br>") == 2
+    assert "&lt;Bar&gt;" in html and "<Bar>" not in html
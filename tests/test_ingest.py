@@ -0,0 +1,83 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from conftest import open_backend
+from timetrackeringest import ClockService
+from timetrackerrollups import RollupStorage, check_rollups
+
+
+def service(storages, tmp_path, users=("alice", "bob")):
+    return ClockService(lambda user: storages[user], batch_size=100, interval=0.01,
+                        state_path=str(tmp_path / "clock.json"), writers=2, users=users)
+
+
+def post(clock, events):
+    return clock.route("POST", "/events", {}, json.dumps(events).encode("utf-8"))
+
+
+def test_events_become_priced_entries_per_user(tmp_path):
+    storages = {user: RollupStorage(open_backend("memory")) for user in ("alice", "bob")}
+    clock = service(storages, tmp_path)
+    status, results = post(clock, [
+        {"action": "start", "user": "alice", "time": "2026-10-16T09:00"},
+        {"action": "start", "user": "bob", "job": "Library", "time": "2026-10-16T10:00"},
+        {"action": "stop", "user": "alice", "time": "2026-10-16T17:30", "break_minutes": 30},
+        {"action": "stop", "user": "bob", "time": "2026-10-16T12:00"},
+        {"action": "stop", "user": "bob", "time": "2026-10-16T13:00"}
+    ])
+    assert status == 200
+    assert [result["status"] for result in results] == ["open", "open", "queued", "queued", "error"]
+    asyncio.run(clock.flush_pending())
+    assert clock.stats["saved"] == 2 and not clock.pending
+
+    alice = storages["alice"].load_entries().iloc[0]
+    assert (alice["Job Name"], alice["Start time"], alice["End time"]) == ("Cafe", "09:00", "17:30")
+    assert float(alice["Earnings"]) == 80.0
+    bob = storages["bob"].load_entries().iloc[0]
+    assert (bob["Job Name"], float(bob["Hours worked"])) == ("Library", 2.0)
+    assert all(check_rollups(storage).empty for storage in storages.values())
+
+
+def test_unknown_users_are_refused(tmp_path):
+    opened = []
+    clock = ClockService(opened.append, state_path=str(tmp_path / "clock.json"), users={"alice"})
+    status, payload = post(clock, {"action": "start", "user": "mallory"})
+    assert status == 400 and "mallory" in payload["error"]
+    single = ClockService(opened.append, state_path=str(tmp_path / "single.json"))
+    assert post(single, {"action": "start", "user": "alice"})[0] == 400
+    assert not opened and not clock.open_shifts and not single.open_shifts
+
+
+def test_entries_without_a_wage_are_rejected(tmp_path):
+    storage = open_backend("memory")
+    storage.save_settings({"default_job_name": "Cafe", "default_hourly_wage": 0.0, "estimated_weekly_hours": 40.0})
+    clock = service({None: storage}, tmp_path, users=None)
+    post(clock, [{"action": "start", "time": "2026-10-16T09:00"}, {"action": "stop", "time": "2026-10-16T11:00"}])
+    asyncio.run(clock.flush_pending())
+    assert storage.load_entries().empty
+    assert clock.stats["rejected"] == 1 and len(clock.status()["rejected_entries"]) == 1
+
+
+def test_times_with_an_offset_are_converted_to_local_time(tmp_path):
+    clock = service({}, tmp_path, users=None)
+    post(clock, {"action": "start", "time": "2026-10-16T09:00+02:00"})
+    local = datetime(2026, 10, 16, 7, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert clock.open_shifts[None]["start"] == local.isoformat(timespec="minutes")
+
+
+def test_open_shifts_and_waiting_entries_survive_a_restart(tmp_path):
+    storage = open_backend("sqlite")
+    clock = service({None: storage}, tmp_path, users=None)
+    post(clock, [
+        {"action": "start", "time": "2026-10-16T09:00"},
+        {"action": "stop", "time": "2026-10-16T12:00"},
+        {"action": "start", "time": "2026-10-16T13:00"}
+    ])
+    clock._write_state()
+
+    restarted = service({None: storage}, tmp_path, users=None)
+    assert restarted.open_shifts[None]["start"] == "2026-10-16T13:00" and len(restarted.pending) == 1
+    post(restarted, {"action": "stop", "time": "2026-10-16T15:00"})
+    asyncio.run(restarted.flush_pending())
+    assert list(storage.load_entries()["Start time"]) == ["09:00", "13:00"]
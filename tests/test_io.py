@@ -0,0 +1,49 @@
+import io
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import open_backend, make_entry
+from test_storage import values
+from timetrackerio import export_entries, import_entries
+
+
+def stored(backend):
+    backend.save_entries([
+        make_entry(date(2026, 8, 3) + timedelta(days=i), "08:30" if i % 2 else "14:00", "12:45" if i % 2 else "21:15",
+                   break_minutes=15 * (i % 3), job="Library" if i % 3 else "Cafe")
+        for i in range(25)
+    ])
+    return backend
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_imports_back_unchanged(backend, fmt):
+    source = stored(backend)
+    exported = export_entries(source, fmt)
+    target = open_backend("sqlite")
+    imported, errors = import_entries(target, io.BytesIO(exported), fmt, 12.0, "Cafe", chunksize=7)
+    assert imported == 25 and errors.empty
+    pd.testing.assert_frame_equal(values(target.load_entries()), values(source.load_entries()))
+    assert list(target.load_entries()["ID"]) == list(source.load_entries()["ID"])
+    # Importing the same export again adds nothing
+    assert import_entries(target, io.BytesIO(exported), fmt, 12.0, "Cafe")[0] == 0
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_rejected_rows_are_numbered_across_chunks(fmt):
+    rows = pd.DataFrame([make_entry(date(2026, 8, 3) + timedelta(days=i)) for i in range(12)]).drop(columns=["Earnings"])
+    rows.loc[[1, 8], "End time"] = "08:00"
+    rows.loc[11, "Date"] = "not a date"
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        rows.to_parquet(buffer, index=False)
+    else:
+        buffer.write(rows.to_csv(index=False).encode("utf-8"))
+    buffer.seek(0)
+    target = open_backend("memory")
+    imported, errors = import_entries(target, buffer, fmt, 12.0, "Cafe", chunksize=5)
+    assert imported == 9
+    assert list(errors["Row"]) == [2, 9, 12]
+    assert set(pd.to_numeric(target.load_entries()["Earnings"])) == {90.0}
@@ -0,0 +1,34 @@
+import threading
+
+import pytest
+
+from timetrackermetrics import Metrics, summarize_run
+
+
+def test_failed_calls_are_recorded_as_errors():
+    metrics = Metrics()
+
+    def append_rows(rows):
+        if not rows:
+            raise ConnectionError("quota exceeded")
+        return {"updates": len(rows)}
+
+    timed = metrics.timed("sheet.entries.append_rows", append_rows, measure_bytes=True)
+    run = metrics.start_run("rerun")
+    timed([["Cafe", "2026-05-04"]])
+    with pytest.raises(ConnectionError):
+        timed([])
+    metrics.finish_run(run)
+    summary = summarize_run(run)
+    assert summary["sheet_calls"] == 2 and summary["sheet_errors"] == 1
+    assert metrics.totals["sheet.entries.append_rows"]["errors"] == 1
+
+
+def test_calls_outside_a_run_count_per_thread():
+    metrics = Metrics()
+    timed = metrics.timed("sheet.entries.get_all_records", lambda: [])
+    worker = threading.Thread(target=timed, name="writer-alice")
+    worker.start()
+    worker.join()
+    assert metrics.background_sheet_calls("writer-alice") == 1
+    assert metrics.background_sheet_calls("writer-bob") == 0
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from timetrackeraggregation import compact_entries
+from timetrackerfunctions import minutes_to_time
+from timetrackerquery import EntryIndex, find_conflicts
+
+
+def random_entries(n, seed):
+    # Few days and coarse times, so that overlaps, touching shifts and exact duplicates are common
+    rng = np.random.default_rng(seed)
+    start = rng.integers(6, 20, n) * 30
+    end = start + rng.integers(1, 8, n) * 30
+    start = np.where(rng.random(n) < 0.05, np.nan, start)
+    days = [date(2026, 7, 1) + timedelta(days=int(day)) for day in rng.integers(0, 6, n)]
+    return pd.DataFrame({
+        "Job Name": rng.choice(["Cafe", "Library"], n),
+        "Date": [str(day) for day in days],
+        "Start time": minutes_to_time(start),
+        "End time": minutes_to_time(end),
+        "Break minutes": 0,
+        "Hours worked": (end - np.nan_to_num(start)) / 60,
+        "Earnings": 0.0,
+        "ID": [f"e{i}" for i in range(n)],
+        "Modified": ""
+    })
+
+
+def brute_force_conflicts(entries_df):
+    """
+    IDs of the entries that overlap any earlier-starting entry of their day, found by comparing all pairs
+    in the order of the entry index (by day, start and end time, stable).
+    """
+    entries = compact_entries(entries_df)
+    starts = entries["Start time"].to_numpy(dtype=float, na_value=-1)
+    ends = entries["End time"].to_numpy(dtype=float, na_value=np.nan)
+    days = entries["Date"].to_numpy()
+    order = sorted(range(len(entries)), key=lambda i: (days[i], starts[i], np.nan_to_num(ends[i], nan=np.inf)))
+    valid = (starts >= 0) & ~np.isnan(ends)
+    flagged = set()
+    for position, i in enumerate(order):
+        for j in order[:position]:
+            if valid[i] and valid[j] and days[i] == days[j] and ends[j] > starts[i]:
+                flagged.add(entries["ID"].iloc[i])
+    return flagged
+
+
+def test_find_conflicts_matches_brute_force():
+    for seed in range(20):
+        entries = random_entries(60, seed)
+        conflicts = find_conflicts(entries)
+        assert set(conflicts["ID"]) == brute_force_conflicts(entries)
+
+        by_id = compact_entries(entries).set_index("ID")
+        for _, row in conflicts.iterrows():
+            partner = by_id.loc[row["Conflicts with"]]
+            assert partner["Date"] == row["Date"]
+            assert partner["Start time"] <= row["Start time"] < partner["End time"]
+            same_times = partner["Start time"] == row["Start time"] and partner["End time"] == row["End time"]
+            assert (row["Conflict"] == "duplicate") == same_times
+
+
+def test_index_queries_match_filtering():
+    entries = random_entries(200, 1)
+    index = EntryIndex(entries)
+    compact = compact_entries(entries)
+    start, end = date(2026, 7, 2), date(2026, 7, 4)
+    mask = (compact["Date"] >= pd.Timestamp(start)) & (compact["Date"] <= pd.Timestamp(end))
+    assert index.count(start, end) == mask.sum()
+    assert index.count(start, end, "Cafe") == (mask & (compact["Job Name"] == "Cafe")).sum()
+    between = index.entries_between(start, end)
+    assert set(between["ID"]) == set(compact.loc[mask, "ID"])
+    assert between["Date"].is_monotonic_increasing
+    page = index.page(offset=5, limit=10)
+    assert len(page) == 10 and page["Date"].is_monotonic_decreasing
+
+
+def test_totals_by_job_per_month():
+    entries = random_entries(200, 2)
+    entries["Date"] = [str(date(2026, 6, 20) + timedelta(days=i % 20)) for i in range(len(entries))]
+    entries.loc[3, "Date"] = ""
+    compact = compact_entries(entries).dropna(subset=["Date"])
+    index = EntryIndex(entries)
+    for start in (None, date(2026, 7, 1)):
+        selected = compact if start is None else compact[compact["Date"] >= pd.Timestamp(start)]
+        expected = selected.assign(
+            **{"Job Name": selected["Job Name"].astype(str), "Month": selected["Date"].dt.strftime("%Y-%m")}
+        ).groupby(["Job Name", "Month"])["Hours worked"].sum().round(2)
+        totals = index.totals_by_job("month", start).set_index(["Job Name", "Month"])["total_hours"]
+        pd.testing.assert_series_equal(totals, expected, check_names=False)
@@ -0,0 +1,101 @@
+import json
+from datetime import date
+
+from conftest import open_backend, make_entry
+from timetrackerfunctions import stamp_entry
+from timetrackerqueue import WriteBehindStorage
+from timetrackerrollups import RollupStorage, check_rollups
+
+
+class FlakyStorage:
+    """
+    Pass calls through to a storage, but let the first `failures` entry writes fail:
+    before writing (`lost_response=False`) or after the rows were written, like a timeout.
+    """
+
+    def __init__(self, storage, failures=1, lost_response=True):
+        self.storage = storage
+        self.failures = failures
+        self.lost_response = lost_response
+
+    def __getattr__(self, name):
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    def _call(self, name, *args):
+        if self.failures:
+            self.failures -= 1
+            if self.lost_response:
+                getattr(self.storage, name)(*args)
+            raise ConnectionError("request failed")
+        return getattr(self.storage, name)(*args)
+
+    def save_entries(self, entries):
+        return self._call("save_entries", entries)
+
+    def delete_entries(self, entry_ids):
+        return self._call("delete_entries", entry_ids)
+
+
+def queue(storage, journal_path):
+    return WriteBehindStorage(storage, str(journal_path), delay=0.0, backoff=0.01, max_backoff=0.05)
+
+
+def test_retry_after_lost_response_writes_once(tmp_path):
+    base = open_backend("memory")
+    writer = queue(FlakyStorage(base), tmp_path / "journal.json")
+    saved = writer.save_entries([make_entry(date(2026, 5, day)) for day in range(4, 8)])
+    assert writer.flush(5)
+    writer.close()
+    assert sorted(base.load_entries()["ID"]) == sorted(entry["ID"] for entry in saved)
+
+
+def test_journal_replay_after_restart(tmp_path):
+    journal_path = tmp_path / "journal.json"
+    base = open_backend("sqlite")
+    kept = base.save_entries([make_entry(date(2026, 5, 4)), make_entry(date(2026, 5, 5))])
+
+    # The storage is unreachable: the changes only reach the journal
+    offline = queue(FlakyStorage(base, failures=1000, lost_response=False), journal_path)
+    saved = offline.save_entries([make_entry(date(2026, 5, 6)), make_entry(date(2026, 5, 7))])
+    offline.delete_entry(kept[0]["ID"])
+    assert len(offline.load_entries()) == 3
+    offline.close(timeout=0.1)
+    journal = json.loads(journal_path.read_text())
+    assert len(journal["saves"]) == 2 and len(journal["deletes"]) == 1
+
+    # The next start replays the journal into the storage exactly once
+    for _ in range(2):
+        writer = queue(base, journal_path)
+        assert writer.flush(5)
+        writer.close()
+    expected = sorted([kept[1]["ID"]] + [entry["ID"] for entry in saved])
+    assert sorted(base.load_entries()["ID"]) == expected
+    assert json.loads(journal_path.read_text()) == {"saves": [], "deletes": [], "rollups": None}
+
+
+def test_rollups_follow_queued_writes(tmp_path):
+    base = open_backend("memory")
+    storage = RollupStorage(queue(FlakyStorage(base), tmp_path / "journal.json"))
+    saved = storage.save_entries([make_entry(date(2026, 5, day)) for day in range(4, 11)])
+    storage.delete_entries([saved[0]["ID"], saved[3]["ID"]])
+    storage.update_entries([{"ID": saved[1]["ID"], "Earnings": 50.0}])
+    assert storage.flush(5)
+    storage.close()
+    assert len(base.load_entries()) == 5
+    assert check_rollups(base).empty
+
+
+def test_journal_replay_of_saves_that_were_already_written(tmp_path):
+    # The process died after the rows were appended but before the journal was updated
+    journal_path = tmp_path / "journal.json"
+    base = open_backend("memory")
+    saved = [stamp_entry(make_entry(date(2026, 5, day))) for day in range(4, 7)]
+    base.save_entries(saved[:2])
+    journal_path.write_text(json.dumps({"saves": saved, "deletes": [], "rollups": None}))
+
+    writer = queue(base, journal_path)
+    assert writer.flush(5)
+    writer.close()
+    assert sorted(base.load_entries()["ID"]) == sorted(entry["ID"] for entry in saved)
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from conftest import open_backend, make_entry
+from timetrackerfunctions import RATE_COLUMNS
+from timetrackerrates import reprice_entries
+from timetrackerrollups import RollupStorage, check_rollups
+
+
+def flat_rate(wage):
+    return pd.DataFrame([["Cafe", "2026-01-01", wage, 0.0, 0.0, 0.0]], columns=RATE_COLUMNS)
+
+
+def stored_with_entries(backend):
+    storage = RollupStorage(backend)
+    saved = storage.save_entries([make_entry(date(2026, 6, day), break_minutes=0) for day in range(1, 11)])
+    storage.save_rates(flat_rate(12.0))
+    return storage, saved
+
+
+def test_reprice_updates_earnings_in_place(backend):
+    storage, saved = stored_with_entries(backend)
+    assert reprice_entries(storage) == 10
+    entries = storage.load_entries()
+    assert list(entries["ID"]) == [entry["ID"] for entry in saved]
+    assert set(pd.to_numeric(entries["Earnings"])) == {96.0}
+    assert check_rollups(storage).empty
+    assert reprice_entries(storage) == 0
+
+
+def test_reprice_since_only_touches_later_weeks(backend):
+    storage, _ = stored_with_entries(backend)
+    assert reprice_entries(storage, since=date(2026, 6, 8)) == 3
+    earnings = pd.to_numeric(storage.load_entries()["Earnings"])
+    assert sorted(earnings) == [80.0] * 7 + [96.0] * 3
+    assert check_rollups(storage).empty
+
+
+def test_failed_reprice_keeps_entries_and_rollups():
+    backend = open_backend("memory")
+    storage, saved = stored_with_entries(backend)
+
+    def fail(*args, **kwargs):
+        raise ConnectionError("quota exceeded")
+
+    backend.entries_sheet.batch_update = fail
+    with pytest.raises(ConnectionError):
+        reprice_entries(storage)
+    entries = storage.load_entries()
+    assert list(entries["ID"]) == [entry["ID"] for entry in saved]
+    assert set(pd.to_numeric(entries["Earnings"])) == {80.0}
+    assert check_rollups(storage).empty
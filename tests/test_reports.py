@@ -0,0 +1,78 @@
+import csv
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import timetrackerreports
+from conftest import SETTINGS, make_entry
+from timetrackeraggregation import normalize_entries
+from timetrackerreports import build_report, generate_reports, period_range, plan_tasks
+from timetrackerstorage import SQLiteStorage, user_partition
+
+USERS = ["alice", "bob"]
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = {"storage_backend": "sqlite", "sqlite_path": str(tmp_path / "timetracker.db"),
+              "users": {user: {} for user in USERS}}
+    for n, user in enumerate(USERS):
+        storage = SQLiteStorage(user_partition(config, user))
+        storage.save_settings(SETTINGS)
+        storage.save_entries([
+            make_entry(date(2026, 8, 25) + timedelta(days=i), job="Library" if i % 2 else "Cafe", wage=10.0 + n)
+            for i in range(14)
+        ])
+    # Users are cached per process; every test starts from its own files
+    timetrackerreports._user_data.clear()
+    yield config
+    timetrackerreports._user_data.clear()
+
+
+def test_period_range():
+    assert period_range("2026-09") == (date(2026, 9, 1), date(2026, 9, 30))
+    assert period_range("2026-12") == (date(2026, 12, 1), date(2026, 12, 31))
+    assert period_range("2024-02")[1] == date(2024, 2, 29)
+    assert period_range("2026") == (date(2026, 1, 1), date(2026, 12, 31))
+
+
+def test_report_only_counts_days_of_the_period():
+    storage = SQLiteStorage(":memory:")
+    storage.save_entries([make_entry(date(2026, 8, 25) + timedelta(days=i)) for i in range(14)])
+    entries = normalize_entries(storage.load_entries())
+    report = build_report(entries, SETTINGS, {}, "2026-09")
+    assert len(report["entries"]) == 7 and report["entries"]["Date"].is_monotonic_increasing
+    assert report["hours"] == 52.5 and report["earnings"] == 525.0
+    # The week of Monday 2026-08-31 starts in August; only its September days count
+    assert report["weekly"]["total_hours"].tolist() == [45.0, 7.5]
+    assert build_report(entries, SETTINGS, {}, "2026-09", job="Library")["entries"].empty
+
+
+def test_plan_tasks_splits_periods_for_few_users():
+    periods = ["2026-07", "2026-08", "2026-09"]
+    assert plan_tasks(USERS, periods, 2) == [("alice", periods), ("bob", periods)]
+    tasks = plan_tasks(["alice"], periods, 3)
+    assert [user for user, _ in tasks] == ["alice"] * 3
+    assert sum((user_periods for _, user_periods in tasks), []) == periods
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_generate_reports_per_user_and_job(config, tmp_path, workers):
+    output = tmp_path / "reports"
+    paths, errors = generate_reports(config, USERS, ["2026-08", "2026-09"], str(output), formats=("csv", "html"),
+                                     by_job=True, chart="none", workers=workers, timeout=60 if workers > 1 else None)
+    assert errors == {}
+    names = sorted(os.path.basename(path) for path in paths)
+    assert "alice-2026-09-Cafe.csv" in names and "bob-2026-08-Library.html" in names
+    assert len(names) == len(set(names)) == 2 * 2 * 2 * 3
+    with open(output / "bob-2026-09-Cafe.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert {row["Job Name"] for row in rows} == {"Cafe"} and float(rows[0]["Earnings"]) == 82.5
+
+
+def test_failing_user_is_reported_as_error(config, tmp_path):
+    # Google Sheets without a service account can't be opened
+    config["storage_backend"] = "gsheets"
+    paths, errors = generate_reports(config, ["alice"], ["2026-09"], str(tmp_path / "reports"), workers=1)
+    assert paths == [] and set(errors) == {"alice"}
@@ -0,0 +1,56 @@
+import io
+from datetime import date, timedelta
+
+import pandas as pd
+
+from conftest import make_entry
+from timetrackerio import import_entries
+from timetrackerrollups import RollupStorage, check_rollups, rebuild_rollups, rollups_match
+
+
+def spread_entries(n, first=date(2026, 1, 26)):
+    # Crosses ISO week and month boundaries
+    return [make_entry(first + timedelta(days=i), job="Library" if i % 4 else "Cafe") for i in range(n)]
+
+
+def assert_consistent(storage):
+    assert check_rollups(storage).empty
+    assert rollups_match(storage.load_rollups(), storage.entry_index())
+
+
+def test_rollups_follow_saves_and_deletes(backend):
+    storage = RollupStorage(backend)
+    saved = storage.save_entries(spread_entries(12))
+    assert_consistent(storage)
+    storage.save_entry(make_entry(date(2026, 2, 3), "18:00", "20:00", 0))
+    assert_consistent(storage)
+    storage.delete_entry(saved[0]["ID"])
+    assert_consistent(storage)
+    storage.delete_entries([entry["ID"] for entry in saved[5:9]])
+    assert_consistent(storage)
+    storage.update_entries([{"ID": saved[10]["ID"], "Earnings": 1.0}])
+    assert_consistent(storage)
+    # Deleting every entry of a week removes the week
+    storage.delete_entries([entry["ID"] for entry in saved])
+    assert_consistent(storage)
+
+
+def test_rollups_follow_imports(backend):
+    storage = RollupStorage(backend)
+    storage.save_entries(spread_entries(3))
+    rows = pd.DataFrame(spread_entries(8, date(2026, 3, 28))).drop(columns=["Earnings"])
+    rows.loc[2, "End time"] = ""
+    source = io.BytesIO(rows.to_csv(index=False).encode("utf-8"))
+    imported, errors = import_entries(storage, source, "csv", 15.0, "Cafe")
+    assert imported == 7 and list(errors["Row"]) == [3]
+    assert_consistent(storage)
+
+
+def test_drifted_rollups_are_detected_and_rebuilt(backend):
+    storage = RollupStorage(backend)
+    storage.save_entries(spread_entries(10))
+    # An update that never reached the rollups, e.g. a row added directly in the sheet
+    backend.save_entries([make_entry(date(2026, 2, 20))])
+    assert not rollups_match(storage.load_rollups(), storage.entry_index())
+    rebuild_rollups(storage)
+    assert_consistent(storage)
@@ -0,0 +1,121 @@
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from conftest import BACKENDS, open_backend, make_entry
+from timetrackeraggregation import compact_entries
+from timetrackerfunctions import ENTRY_COLUMNS, stamp_entry
+from timetrackerstorage import CachedStorage, SQL_ENTRY_COLUMNS
+
+VALUE_COLUMNS = ["Job Name", "Date", "Start time", "End time", "Break minutes", "Hours worked", "Earnings"]
+
+
+def sample_entries():
+    first = date(2026, 3, 2)
+    return [
+        make_entry(first + timedelta(days=i // 2), "08:00" if i % 2 else "13:00", "12:00" if i % 2 else "18:30",
+                   job="Library" if i % 3 == 0 else "Cafe")
+        for i in range(20)
+    ]
+
+
+def values(df):
+    # Compare entries without IDs and timestamps, which differ between backends
+    df = compact_entries(df)[VALUE_COLUMNS]
+    df["Job Name"] = df["Job Name"].astype(str)
+    return df.reset_index(drop=True)
+
+
+def test_save_assigns_ids_and_keeps_values(backend):
+    saved = backend.save_entries(sample_entries())
+    entries = backend.load_entries()
+    assert len(entries) == 20
+    assert list(entries["ID"]) == [entry["ID"] for entry in saved]
+    assert entries["ID"].is_unique and (entries["Modified"] != "").all()
+    pd.testing.assert_frame_equal(values(entries), values(pd.DataFrame(sample_entries())))
+
+
+def test_delete_entries_returns_deleted(backend):
+    saved = backend.save_entries(sample_entries())
+    deleted = backend.delete_entries([saved[1]["ID"], saved[5]["ID"], "unknown"])
+    assert sorted(entry["ID"] for entry in deleted) == sorted([saved[1]["ID"], saved[5]["ID"]])
+    assert backend.delete_entry(saved[0]["ID"])["ID"] == saved[0]["ID"]
+    assert backend.delete_entry(saved[0]["ID"]) is None
+    remaining = [entry["ID"] for entry in saved if entry["ID"] not in {saved[0]["ID"], saved[1]["ID"], saved[5]["ID"]}]
+    assert list(backend.load_entries()["ID"]) == remaining
+
+
+def test_update_entries_in_place(backend):
+    saved = backend.save_entries(sample_entries())
+    before, after = backend.update_entries([{"ID": saved[3]["ID"], "Earnings": 123.45}, {"ID": "unknown", "Earnings": 1}])
+    assert [entry["ID"] for entry in before] == [entry["ID"] for entry in after] == [saved[3]["ID"]]
+    entries = backend.load_entries()
+    assert list(entries["ID"]) == [entry["ID"] for entry in saved]
+    row = entries[entries["ID"] == saved[3]["ID"]].iloc[0]
+    assert float(row["Earnings"]) == 123.45
+    assert row["Modified"] >= saved[3]["Modified"]
+
+
+def test_backends_agree_on_queries():
+    storages = [open_backend(name) for name in BACKENDS]
+    for storage in storages:
+        saved = storage.save_entries(sample_entries())
+        storage.delete_entries([saved[0]["ID"], saved[7]["ID"]])
+    for query in (
+        dict(),
+        dict(start=date(2026, 3, 4), end=date(2026, 3, 8)),
+        dict(job="Library"),
+        dict(start=date(2026, 3, 5), job="Cafe", offset=2, limit=3),
+    ):
+        pages = [storage.load_entries_page(**query) for storage in storages]
+        pd.testing.assert_frame_equal(values(pages[0]), values(pages[1]))
+        filters = {key: value for key, value in query.items() if key in ("start", "end", "job")}
+        counts = {storage.count_entries(**filters) for storage in storages}
+        assert len(counts) == 1
+        between = [storage.entries_between(**filters) for storage in storages]
+        pd.testing.assert_frame_equal(values(between[0]), values(between[1]))
+    page = storages[0].load_entries_page()
+    assert page["Date"].is_monotonic_decreasing
+
+
+def test_sync_picks_up_changes(backend):
+    saved = backend.save_entries(sample_entries())
+    local = backend.load_entries()
+    # Changes by another session: a new entry, a deletion and an update
+    backend.save_entries([make_entry(date(2026, 4, 1))])
+    backend.delete_entries([saved[2]["ID"]])
+    backend.update_entries([{"ID": saved[4]["ID"], "Earnings": 99.0}])
+    for frame in (local, compact_entries(local)):
+        synced = backend.sync_entries(frame)
+        pd.testing.assert_frame_equal(values(synced), values(backend.load_entries()))
+        assert list(synced["ID"]) == list(backend.load_entries()["ID"])
+
+
+def test_cached_storage_follows_other_writers(backend):
+    cached = CachedStorage(backend, ttl=0)
+    saved = cached.save_entries(sample_entries())
+    backend.delete_entries([saved[0]["ID"]])
+    backend.save_entries([make_entry(date(2026, 4, 2))])
+    entries = cached.load_entries()
+    assert list(entries["ID"]) == list(backend.load_entries()["ID"])
+    assert cached.count_entries(start=date(2026, 4, 1)) == 1
+
+
+def test_sync_picks_up_rows_stamped_before_the_newest_local_one(backend):
+    # Another writer stamps its entry first but commits it after our save
+    early = stamp_entry(make_entry(date(2026, 4, 3)))
+    time.sleep(0.01)
+    backend.save_entries(sample_entries())
+    local = backend.load_entries()
+    if hasattr(backend, "conn"):
+        backend.conn.execute(
+            f"INSERT INTO entries ({', '.join(SQL_ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(SQL_ENTRY_COLUMNS))})",
+            [early[column] for column in ENTRY_COLUMNS]
+        )
+    else:
+        backend.entries_sheet.append_rows([[early[column] for column in ENTRY_COLUMNS]])
+    synced = backend.sync_entries(local)
+    assert list(synced["ID"]) == list(backend.load_entries()["ID"])
+    assert not synced["Job Name"].isna().any()
+    pd.testing.assert_frame_equal(values(synced), values(backend.load_entries()))
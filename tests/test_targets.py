@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from timetrackerfunctions import calculate_overtime
+from timetrackertargets import (
+    MISSING_WEEK,
+    TargetCalendar,
+    part_time_week,
+    week_id,
+    week_ordinal,
+    week_ordinal_of_dates
+)
+
+
+def test_week_ordinals_match_iso_weeks():
+    days = [date(2020, 12, 28) + timedelta(days=i) for i in range(0, 2200, 3)]
+    ordinals = week_ordinal_of_dates(days)
+    iso = [day.isocalendar() for day in days]
+    np.testing.assert_array_equal(ordinals, week_ordinal([y for y, _, _ in iso], [w for _, w, _ in iso]))
+    assert [week_id(ordinal) for ordinal in ordinals] == [f"{y}-{w:02d}" for y, w, _ in iso]
+    assert week_ordinal_of_dates(["", None])[0] == MISSING_WEEK
+
+
+def test_targets_carry_forward_and_holidays_take_a_share():
+    calendar = TargetCalendar({"2026-10": 30.0, "2026-20": 20.0}, default=40.0, holidays="2026-05-14, 2026-05-16")
+    weeks = week_ordinal(2026, [5, 10, 19, 20, 21])
+    # Before the first change the first value applies; 2026-05-14 is a Thursday of week 20, the 16th a Saturday
+    np.testing.assert_allclose(calendar.targets(weeks), [30.0, 30.0, 30.0, 16.0, 20.0])
+    assert TargetCalendar({}, default=38.5).targets(weeks).tolist() == [38.5] * 5
+    assert np.isnan(calendar.targets([MISSING_WEEK]))[0]
+    with pytest.raises(ValueError):
+        TargetCalendar({}, holidays="2026-02-30")
+
+
+def test_part_time_week_only_changes_that_week():
+    whist = {"2026-01": 40.0}
+    updated = part_time_week(whist, "2026-12", 20.0)
+    assert updated == {"2026-01": 40.0, "2026-12": 20.0, "2026-13": 40.0}
+    # A following week with its own value keeps it
+    assert part_time_week(updated, "2026-11", 10.0)["2026-12"] == 20.0
+
+
+def test_overtime_uses_the_calendar():
+    weekly = pd.DataFrame({"Year": [2026, 2026, 2026], "Week": [19, 20, 21], "total_hours": [35.0, 35.0, 45.0]})
+    settings = {"estimated_weekly_hours": 40.0, "holidays": "2026-05-14"}
+    result = calculate_overtime(weekly, settings, {"2026-19": 30.0})
+    assert result["Estimated weekly hours"].tolist() == [30.0, 24.0, 30.0]
+    assert result["Overtime"].tolist() == [5.0, 11.0, 15.0]
@@ -1,80 +1,169 @@
 import streamlit as st
-import pandas as pd
 import hashlib
-import gspread
-from google.oauth2.service_account import Credentials
-from datetime import date, timedelta
-
-from timetrackerfunctions import (
-    calculate_daily_hours,
-    calculate_earnings,
-    validate_entry,
-    summarize_weekly_hours,
-    summarize_monthly_hours,
-    calculate_overtime,
-    plot_weekly_hours,
-    fmt_time,
-    load_settings_gsheet,
-    save_settings_gsheet,
-    load_entries_gsheet,
-    save_entry_gsheet,
-    load_weekly_hours_history_gsheet,
-    save_weekly_hours_history_gsheet,
-    safe_float,
-    safe_sum,
-    style_summary_table_with_overtime,
-    style_summary_table
-)
 
 def check_password():
     """
     Simple password protection for the Streamlit app.
-    Stores authentication status in session_state.
+    With [users.<name>] tables (each with a password_hash) in the secrets, every user logs in
+    with their own name and gets their own data; otherwise one shared password_hash is used.
+    Stores authentication status and the user name (None for the shared password) in session_state.
     Stops execution if the entered password is wrong.
     """
+    users = st.secrets.get("users", {})
+
     def password_entered():
-        if hashlib.sha256(st.session_state["pw"].encode()).hexdigest() == st.secrets["password_hash"]:
+        if users:
+            user = st.session_state.get("username", "")
+            expected = users.get(user, {}).get("password_hash")
+        else:
+            user, expected = None, st.secrets["password_hash"]
+        if expected is not None and hashlib.sha256(st.session_state["pw"].encode()).hexdigest() == expected:
             st.session_state["authenticated"] = True
+            st.session_state["user"] = user
             del st.session_state["pw"]
         else:
             st.session_state["authenticated"] = False
 
-    if "authenticated" not in st.session_state:
-        st.text_input("Password", type="password", key="pw", on_change=password_entered)
-        st.stop()
-    elif not st.session_state["authenticated"]:
+    if not st.session_state.get("authenticated"):
+        if users:
+            st.text_input("User name", key="username")
         st.text_input("Password", type="password", key="pw", on_change=password_entered)
-        st.error("Wrong password. Try again.")
+        if "authenticated" in st.session_state:
+            st.error("Wrong password. Try again.")
         st.stop()
 
 # Authenticate user before loading the app
+# Only streamlit and hashlib are needed up to here, so the password screen renders without
+# loading pandas, numpy or the storage libraries; those are imported after login.
 check_password()
+user = st.session_state.get("user")
+
+import pandas as pd
+import json
+import logging
+import math
+import os
+from datetime import date, timedelta
+
+from timetrackerfunctions import (
+    calculate_daily_hours,
+    calculate_earnings,
+    validate_entry,
+    plot_weekly_hours,
+    CHART_WINDOWS,
+    fmt_time,
+    format_entries_table,
+    CALENDAR_WINDOWS,
+    build_calendar,
+    render_calendar_html,
+    style_summary_table_with_overtime,
+    style_summary_table
+)
+from timetrackeraggregation import aggregate_entries
+from timetrackerstorage import open_storage, open_gsheet_client, CachedStorage
+from timetrackerrollups import RollupStorage, rebuild_rollups, rollups_match
+from timetrackerio import import_entries, export_entries, detect_format
+from timetrackerqueue import WriteBehindStorage, JOURNAL_PATH
+from timetrackerquery import weeks_over_target, find_conflicts
+from timetrackerrates import normalize_rates, rates_changed_since, price_entry, reprice_entries
+from timetrackertargets import TargetCalendar, parse_holidays, part_time_week, week_ordinal_of_dates
+from timetrackermetrics import Metrics, instrument_sheets, instrument_functions, summarize_run, log_run
+
+# Instrumentation (metrics = true in the secrets)
+# Record call count, latency and bytes of every worksheet call and timetrackerfunctions function
+# per rerun. Each finished rerun is logged as one JSON line on the 'timetracker.metrics' logger
+# (also appended to metrics_log if set) and shown in the debug panel at the bottom of the sidebar.
+metrics_enabled = st.secrets.get("metrics", False)
+
+@st.cache_resource
+def get_metrics(log_path):
+    """
+    One metrics recorder per process, optionally logging to a JSON-lines file.
+    """
+    if log_path:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logging.getLogger("timetracker.metrics").addHandler(handler)
+        logging.getLogger("timetracker.metrics").setLevel(logging.INFO)
+    return Metrics()
+
+if metrics_enabled:
+    metrics = get_metrics(st.secrets.get("metrics_log", ""))
+    instrument_functions(metrics, namespaces=[globals()])
+    # The previous rerun of this session is complete (or was cut short by st.rerun)
+    previous_run = st.session_state.get("metrics_run")
+    if previous_run is not None:
+        log_run(previous_run)
+        metrics_history = st.session_state.setdefault("metrics_history", [])
+        metrics_history.append(summarize_run(previous_run))
+        del metrics_history[:-100]
+    st.session_state["metrics_run"] = metrics.start_run(user or "")
 
 # App title
 st.title("Time Tracker")
 
-# Connect to Google Sheets
-# Set up Google Sheets client using credentials stored in Streamlit secrets.
-# Access three worksheets: entries (main), settings, and weekly hours history.
+# Connect to storage
+# By default, set up Google Sheets client using credentials stored in Streamlit secrets
+# and open the spreadsheet once for all worksheets: entries (main), settings, weekly hours history and rollups.
+# Set storage_backend = "sqlite" (optionally with sqlite_path) or "memory" in the secrets for local runs.
+# In multi-user mode each user has their own spreadsheet / database file (see user_partition);
+# all sessions share one authorized Google client, and all sessions of a user share one storage.
+# Loaded data is cached across reruns for cache_ttl seconds (default 60); saves and deletes patch the cache
+# and update the stored weekly/monthly rollups.
+# Saves and deletes are confirmed from a local journal (journal_path) and written to the storage in the
+# background, batched and retried with backoff; set write_behind = false to write synchronously instead.
 # The integration and API usage were accelerated and debugged with the help of AI (ChatGPT).
 
-scope = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive"
-]
-creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scope)
-client = gspread.authorize(creds)
+@st.cache_resource
+def get_gsheet_client():
+    """
+    Authorize the Google Sheets client once per process; shared by all sessions and users.
+    """
+    return open_gsheet_client(st.secrets)
 
-sheet = client.open("timetracker-data").sheet1
-settings_sheet = client.open("timetracker-data").worksheet("Settings")
-weekly_sheet = client.open("timetracker-data").worksheet("WeeklyHistory")
+def writer_thread_name(user):
+    """
+    Name of the write-behind thread of a user; its Sheets calls are reported under this name.
+    """
+    return "write-behind" if user is None else f"write-behind-{user}"
 
-# Load settings and weekly hour targets
-# Retrieve app settings (default job, wage, target hours) and weekly hour history from Google Sheets.
-settings = load_settings_gsheet(settings_sheet)
-whist = load_weekly_hours_history_gsheet(weekly_sheet)
+@st.cache_resource
+def get_storage(backend, ttl, write_behind, user, metrics_enabled):
+    """
+    Open the configured storage backend once per process and user, wrapped in a read cache,
+    the write-behind queue and rollup maintenance.
+    """
+    client = get_gsheet_client() if backend == "gsheets" else None
+    storage = open_storage(st.secrets, user, client)
+    if metrics_enabled:
+        instrument_sheets(storage, get_metrics(st.secrets.get("metrics_log", "")))
+    storage = CachedStorage(storage, ttl)
+    if write_behind:
+        journal_path = st.secrets.get("journal_path", JOURNAL_PATH)
+        if user is not None:
+            stem, ext = os.path.splitext(journal_path)
+            journal_path = f"{stem}-{user}{ext}"
+        storage = WriteBehindStorage(storage, journal_path, name=writer_thread_name(user))
+    return RollupStorage(storage)
+
+storage = get_storage(
+    st.secrets.get("storage_backend", "gsheets"),
+    st.secrets.get("cache_ttl", 60),
+    st.secrets.get("write_behind", True),
+    user,
+    metrics_enabled
+)
 
-estimated_weekly_hours = settings.get("estimated_weekly_hours", 40)
+# Load settings and weekly hour targets
+# Retrieve app settings (default job, wage, target hours) and weekly hour history from storage.
+settings = storage.load_settings()
+whist = storage.load_weekly_hours_history()
+rates = normalize_rates(storage.load_rates())
+
+# This week's target from the target-hours calendar (part-time weeks and holidays included)
+estimated_weekly_hours = float(
+    TargetCalendar.from_settings(settings, whist).targets(week_ordinal_of_dates([date.today()]))[0]
+)
 job_name = settings.get("default_job_name", "")
 hourly_wage = settings.get("default_hourly_wage", 0.0)
 
@@ -83,7 +172,7 @@ st.markdown(
     f"<span style='color:green; font-weight:bold;'>"
     f"Active job: {job_name}   |   "
     f"Hourly wage: {hourly_wage:.2f} €   |   "
-    f"Estimated weekly hours: {estimated_weekly_hours}"
+    f"Estimated weekly hours: {estimated_weekly_hours:g}"
     f"</span>",
     unsafe_allow_html=True
 )
@@ -94,10 +183,32 @@ work_date = st.date_input("Date")
 start_time = st.time_input("Start Time")
 end_time = st.time_input("End Time")
 break_minutes = st.number_input("Break (minutes)", min_value=0, value=0)
+allow_overlap = st.checkbox("Allow overlap with existing entries", value=False)
+
+# Sidebar: Current user and log out (multi-user mode only)
+if user is not None:
+    st.sidebar.caption(f"Logged in as **{user}**")
+    if st.sidebar.button("Log out"):
+        del st.session_state["authenticated"]
+        del st.session_state["user"]
+        st.rerun()
+
+# Sidebar: Reload button
+# Drop the cached data, e.g. after editing the sheet directly or from another device.
+if st.sidebar.button("Reload data"):
+    storage.invalidate()
+
+# Sidebar: Sync status
+# Show changes that are saved locally but not yet written to the storage (e.g. while rate limited).
+pending = storage.pending_count() if hasattr(storage, "pending_count") else 0
+if pending:
+    st.sidebar.caption(f"{pending} changes waiting to sync.")
+    if storage.last_error is not None:
+        st.sidebar.warning(f"Sync failed, retrying: {storage.last_error}")
 
 # Sidebar: Settings form
 # Provide a sidebar form for editing and saving default job name, hourly wage, and estimated weekly hours.
-# Updates settings and weekly hour history in Google Sheets.
+# Updates settings and weekly hour history in storage.
 st.sidebar.header("Settings")
 with st.sidebar.form("settings_form"):
     new_job_name = st.text_input("Default job name", value=settings.get("default_job_name", ""))
@@ -115,138 +226,179 @@ with st.sidebar.form("settings_form"):
         value=float(settings.get("estimated_weekly_hours", 40)),
         step=0.5
     )
+    # A part-time week only changes this week's target; the next week goes back to the previous value
+    part_time = st.checkbox("Only this week (part-time week)")
+    # Each holiday on a workday reduces the target of its week by one workday's share
+    new_holidays = st.text_input(
+        "Holidays (YYYY-MM-DD, comma-separated)", value=str(settings.get("holidays", ""))
+    )
     save_btn = st.form_submit_button("Save settings")
     if save_btn:
-        settings["default_job_name"] = new_job_name
-        settings["default_hourly_wage"] = new_hourly_wage
-        settings["estimated_weekly_hours"] = new_weekly_hours
-        save_settings_gsheet(settings, settings_sheet)
-
-        year, week, _ = date.today().isocalendar()
-        week_id = f"{year}-{week:02d}"
-        whist[week_id] = new_weekly_hours
-        save_weekly_hours_history_gsheet(whist, weekly_sheet)
-
-        st.success("Settings saved!")
-        st.rerun()
+        try:
+            holidays = parse_holidays(new_holidays)
+        except ValueError:
+            st.error("Please enter holidays as dates like 2026-12-24, separated by commas.")
+        else:
+            year, week, _ = date.today().isocalendar()
+            week_id = f"{year}-{week:02d}"
+            settings["default_job_name"] = new_job_name
+            settings["default_hourly_wage"] = new_hourly_wage
+            settings["holidays"] = ",".join(day.isoformat() for day in holidays)
+            if part_time:
+                whist = part_time_week(whist, week_id, new_weekly_hours, TargetCalendar.from_settings(settings, whist))
+            else:
+                settings["estimated_weekly_hours"] = new_weekly_hours
+                whist[week_id] = new_weekly_hours
+            storage.save_settings(settings)
+            storage.save_weekly_hours_history(whist)
+
+            st.success("Settings saved!")
+            st.rerun()
+
+# Sidebar: Wage rates
+# Effective-dated wages per job (empty job = all jobs) with weekend, night (22:00-06:00) and
+# overtime surcharges as fractions (0.25 = +25 %). New entries are priced with the rate valid
+# on their date, otherwise with the default hourly wage. Saving changed rates re-prices the
+# stored entries from the earliest changed date on.
+with st.sidebar.expander("Wage rates"):
+    rates_table = st.data_editor(
+        rates.assign(**{"Valid from": pd.to_datetime(rates["Valid from"]).dt.date}),
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={
+            "Valid from": st.column_config.DateColumn(required=True),
+            "Hourly wage": st.column_config.NumberColumn(min_value=0.0, format="%.2f €"),
+            "Weekend surcharge": st.column_config.NumberColumn(min_value=0.0, step=0.05),
+            "Night surcharge": st.column_config.NumberColumn(min_value=0.0, step=0.05),
+            "Overtime surcharge": st.column_config.NumberColumn(min_value=0.0, step=0.05)
+        },
+        key="rates_editor"
+    )
+    if st.button("Save rates"):
+        new_rates = normalize_rates(rates_table)
+        changed_since = rates_changed_since(rates, new_rates)
+        storage.save_rates(new_rates)
+        repriced = reprice_entries(storage, changed_since, new_rates) if changed_since is not None else 0
+        rates = new_rates
+        st.success(f"Rates saved, {repriced} entries re-priced.")
+
+# Sidebar: Import / export
+# Bulk import entries from a CSV or Parquet file and download all entries as a backup.
+# Rows without a job name or hourly wage use the defaults from the settings.
+with st.sidebar.expander("Import / export"):
+    upload = st.file_uploader("Import entries", type=["csv", "parquet"])
+    if upload is not None and st.button("Import"):
+        imported, import_errors = import_entries(
+            storage, upload, detect_format(upload.name), settings.get("default_hourly_wage", 0.0), settings.get("default_job_name", "")
+        )
+        st.success(f"Imported {imported} entries.")
+        if not import_errors.empty:
+            st.warning(f"{len(import_errors)} rows were skipped.")
+            st.dataframe(import_errors, hide_index=True)
+    # The files are only built when a button is clicked, not on every rerun
+    st.download_button(
+        "Export CSV", lambda: export_entries(storage, "csv"), "timetracker_entries.csv", "text/csv", on_click="ignore"
+    )
+    st.download_button(
+        "Export Parquet", lambda: export_entries(storage, "parquet"), "timetracker_entries.parquet",
+        "application/octet-stream", on_click="ignore"
+    )
 
-# Save new entry to Google Sheets
+# Save new entry to storage
 # Button to validate and save a new work entry.
 # Shows error messages for invalid input and success message after saving.
+# Entries that overlap or duplicate an existing entry of that day are rejected unless allowed above.
 if st.button("Save Entry"):
     error_msg = validate_entry(start_time, end_time, break_minutes, hourly_wage)
+    conflicts = storage.entry_index().conflicts(
+        work_date, start_time.hour * 60 + start_time.minute, end_time.hour * 60 + end_time.minute
+    ) if not error_msg and not allow_overlap else None
     if error_msg:
         st.error(error_msg)
+    elif conflicts is not None and not conflicts.empty:
+        overlapping = ", ".join(
+            f"{job} {start}–{end}" for job, start, end
+            in zip(conflicts["Job Name"], fmt_time(conflicts["Start time"]), fmt_time(conflicts["End time"]))
+        )
+        st.error(f"This entry overlaps with: {overlapping}. Tick 'Allow overlap' to save it anyway.")
     else:
         duration = calculate_daily_hours(start_time, end_time, break_minutes)
-        earnings = calculate_earnings(duration, hourly_wage)
         entry = {
             "Job Name": job_name,
             "Date": str(work_date),
             "Start time": start_time.strftime("%H:%M"),
             "End time": end_time.strftime("%H:%M"),
             "Break minutes": break_minutes,
-            "Hours worked": round(duration, 2),
-            "Earnings": round(earnings, 2)
+            "Hours worked": round(duration, 2)
         }
-        save_entry_gsheet(entry, sheet)
+        # The week's other entries count towards the overtime surcharge
+        work_monday = work_date - timedelta(days=work_date.weekday())
+        earnings = price_entry(
+            entry, rates, storage.entries_between(work_monday, work_monday + timedelta(days=6)), settings, whist
+        ) if not rates.empty else None
+        if earnings is None:
+            earnings = calculate_earnings(duration, hourly_wage)
+        entry["Earnings"] = round(earnings, 2)
+        storage.save_entry(entry)
         st.success(f"Worked hours: {duration:.2f}\nEarnings: {earnings:.2f} €")
         st.rerun()
 st.caption('To delete an entry, go to **All entries**.')
 
-# Load and preprocess all work entries
-# Read all entries from Google Sheets, convert date/time columns,
-# and sort entries by date and start time (descending).
-entries_df = load_entries_gsheet(sheet)
-entries_df["Date"] = pd.to_datetime(entries_df["Date"], errors='coerce')
-if "Start time" in entries_df.columns:
-    entries_df["Start time"] = pd.to_datetime(entries_df["Start time"], format="%H:%M", errors="coerce")
-entries_df = entries_df.sort_values(
-    by=["Date", "Start time"], ascending=[False, False]
-).reset_index(drop=True)
-
-# Weekly overview: calendar-style display for current week
-# Show a grid with each weekday, displaying job, times, hours, and earnings for each day.
-# Summarize total hours and earnings for the current week.
+# Load and aggregate work entries
+# The entry index keeps all entries sorted by date, so only this week's entries are read
+# and normalized (typed date/time columns, sorted by date and start time descending).
+# Weekly and monthly totals come from the stored rollups. They are rebuilt when they are missing or
+# their entry count no longer matches the entries (e.g. after edits in the sheet or a lost update).
 today = date.today()
-year_now, week_now, _ = today.isocalendar()
-mask_this_week = (
-    entries_df["Date"].dt.isocalendar().year == year_now
-) & (
-    entries_df["Date"].dt.isocalendar().week == week_now
-)
-entries_this_week = entries_df[mask_this_week].copy()
-
 weekday_today = today.weekday()  # Monday=0
 monday = today - timedelta(days=weekday_today)
 weekdays = [monday + timedelta(days=i) for i in range(7)]
-weekday_labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-
-st.subheader("This Week")
-if not entries_this_week.empty:
-    cols = st.columns(7)
-    for col, wd, label in zip(cols, weekdays, weekday_labels):
-        col.markdown(f"**{label}<br>{wd.strftime('%d.%m.')}**", unsafe_allow_html=True)
-        day_entries = entries_this_week[entries_this_week["Date"].dt.date == wd]
-        if not day_entries.empty:
-            for _, row in day_entries.iterrows():
-                start = fmt_time(row['Start time'])
-                end = fmt_time(row['End time'])
-                hours = safe_float(row['Hours worked'])
-                earnings = safe_float(row['Earnings'])
-                job = row['Job Name']
-
-                if start and end:
-                    time_str = f"{start}–{end}"
-                elif start:
-                    time_str = f"{start}"
-                elif end:
-                    time_str = f"{end}"
-                else:
-                    time_str = ""
-
-                col.markdown(
-                    f"<b>{job}</b><br>"
-                    f"{time_str}<br>"
-                    f"⏰ {hours:.2f}h<br>"
-                    f"💶 {earnings:.2f}€",
-                    unsafe_allow_html=True
-                )
-        else:
-            col.write("–")
-    total_hours = safe_sum(entries_this_week["Hours worked"])
-    total_earnings = safe_sum(entries_this_week["Earnings"])
-    if pd.isna(total_hours):
-        total_hours = 0.0
-    if pd.isna(total_earnings):
-        total_earnings = 0.0
+
+entry_index = storage.entry_index()
+rollups = storage.load_rollups()
+if not rollups_match(rollups, entry_index):
+    # The cached entries and rollups may just be of different ages; compare fresh copies first
+    storage.invalidate("entries")
+    storage.invalidate("rollups")
+    entry_index = storage.entry_index()
+    rollups = storage.load_rollups()
+    if not rollups_match(rollups, entry_index):
+        rollups = rebuild_rollups(storage)
+aggregated = aggregate_entries(entry_index.entries_between(monday, weekdays[-1]), settings, whist, today, rollups)
+entries_this_week = aggregated["this_week"]
+
+# Weekly overview: calendar-style display for the current week (or the last 2 / 4 weeks)
+# The entries are bucketed by day in one pass and shown as one HTML grid with job, times,
+# hours and earnings per entry. Summarize total hours and earnings below.
+calendar_window = st.session_state.get("calendar_window", "This Week")
+calendar_weeks = CALENDAR_WINDOWS[calendar_window]
+st.subheader(calendar_window)
+st.radio("Calendar range", list(CALENDAR_WINDOWS), horizontal=True, key="calendar_window", label_visibility="collapsed")
+calendar_start = monday - timedelta(weeks=calendar_weeks - 1)
+calendar_entries = entries_this_week if calendar_weeks == 1 else entry_index.entries_between(calendar_start, weekdays[-1])
+period = "this week" if calendar_weeks == 1 else f"in the last {calendar_weeks} weeks"
+if not calendar_entries.empty:
+    calendar = build_calendar(calendar_entries, calendar_start, calendar_weeks)
+    st.markdown(render_calendar_html(calendar), unsafe_allow_html=True)
+    total_hours = sum(day["hours"] for week in calendar for day in week)
+    total_earnings = sum(day["earnings"] for week in calendar for day in week)
 
     st.info(
-        f"**Total this week:** {total_hours:.2f} hours   |   {total_earnings:.2f} €",
+        f"**Total {period}:** {total_hours:.2f} hours   |   {total_earnings:.2f} €",
         icon="🧮"
     )
 else:
-    st.info("No entries for this week yet.")
+    st.info(f"No entries {period} yet.")
 
 # Summaries and charts: weekly and monthly
 # Display weekly and monthly summaries of worked hours and earnings.
 # Show a bar chart for the last 4 weeks, expandable tables for weekly and monthly summaries,
 # and a full entries table with delete option.
-if not entries_df.empty:
-    entries_df["Hours worked"] = pd.to_numeric(entries_df["Hours worked"], errors="coerce").round(2)
-    entries_df["Earnings"] = pd.to_numeric(entries_df["Earnings"], errors="coerce").round(2)
-
-    # Weekly summary (per week)
-    weekly_summary = summarize_weekly_hours(entries_df)
-    weekly_summary["total_hours"] = weekly_summary["total_hours"].round(2)
-    weekly_summary["total_earnings"] = weekly_summary["total_earnings"].round(2)
-    weekly_summary = calculate_overtime(weekly_summary, settings, whist)
-
+if len(entry_index):
+    # Weekly summary (per week, with overtime)
     # Ascending for chart, descending for table
-    weekly_summary_chart = weekly_summary.sort_values(
-        by=["Year", "Week"], ascending=[True, True]
-    ).reset_index(drop=True)
-    weekly_summary = weekly_summary.sort_values(
+    weekly_summary_chart = aggregated["weekly"]
+    weekly_summary = weekly_summary_chart.sort_values(
         by=["Year", "Week"], ascending=[False, False]
     ).reset_index(drop=True)
     weekly_summary = weekly_summary.rename(columns={
@@ -257,67 +409,115 @@ if not entries_df.empty:
     })
 
     # Monthly summary
-    monthly_summary = summarize_monthly_hours(entries_df)
-    monthly_summary["total_hours"] = monthly_summary["total_hours"].round(2)
-    monthly_summary["total_earnings"] = monthly_summary["total_earnings"].round(2)
-    monthly_summary = monthly_summary.sort_values(by="Month", ascending=False).reset_index(drop=True)
+    monthly_summary = aggregated["monthly"].sort_values(by="Month", ascending=False).reset_index(drop=True)
     monthly_summary = monthly_summary.rename(columns={
         "total_hours": "Total hours",
         "total_earnings": "Total earnings"
     })
 
-    # Bar chart: last 4 weeks
-    st.subheader("4 Weeks Overview")
-    fig = plot_weekly_hours(weekly_summary_chart)
+    # Bar chart: last 4 weeks, quarter or year (the year is shown per month)
+    chart_window = st.session_state.get("chart_window", "4 Weeks")
+    st.subheader(f"{chart_window} Overview")
+    st.radio("Range", list(CHART_WINDOWS), horizontal=True, key="chart_window", label_visibility="collapsed")
+    fig = plot_weekly_hours(weekly_summary_chart, weeks=CHART_WINDOWS[chart_window], today=today)
     st.plotly_chart(fig, use_container_width=True)
 
     # Expanders for summaries and all entries
     with st.expander("Weekly summary"):
+        over_target = weeks_over_target(weekly_summary_chart, today - timedelta(weeks=CHART_WINDOWS[chart_window] - 1), today)
+        st.caption(f"{len(over_target)} of the last {CHART_WINDOWS[chart_window]} weeks were over the target hours.")
         st.write(style_summary_table_with_overtime(weekly_summary))
 
     with st.expander("Monthly summary"):
         st.write(style_summary_table(monthly_summary))
 
+    # Per-job summary: hours and earnings of each job per month (newest first), for the months
+    # of the chart range only, so a rerun does not group the whole history
+    with st.expander("Per job summary"):
+        job_start = (today - timedelta(weeks=CHART_WINDOWS[chart_window] - 1)).replace(day=1)
+        st.caption(f"Months since {job_start:%B %Y}.")
+        job_summary = entry_index.totals_by_job("month", job_start, today).sort_values(
+            by=["Month", "Job Name"], ascending=[False, True]
+        ).reset_index(drop=True)
+        job_summary = job_summary.rename(columns={
+            "total_hours": "Total hours",
+            "total_earnings": "Total earnings"
+        })[["Month", "Job Name", "Total hours", "Total earnings"]]
+        st.write(style_summary_table(job_summary))
+
     with st.expander("All entries"):
-        cols = st.columns([2, 2, 2, 2, 2, 1])
-        headers = ["Date", "Start–End", "Job Name", "Hours worked", "Earnings", ""]
-        for col, header in zip(cols, headers):
-            col.markdown(f"**{header}**")
-
-        for idx, row in entries_df.iterrows():
-            try:
-                date_str = pd.to_datetime(row["Date"]).strftime("%d.%m.%Y")
-            except Exception:
-                date_str = str(row["Date"])
-
-            start_fmt = fmt_time(row['Start time'])
-            end_fmt = fmt_time(row['End time'])
-
-            if start_fmt and end_fmt:
-                start_end_str = f"{start_fmt}–{end_fmt}"
-            elif start_fmt:
-                start_end_str = start_fmt
-            elif end_fmt:
-                start_end_str = end_fmt
+        # Filters are applied by the storage backend; only the current page is fetched and rendered
+        # as one table. Tick entries in the last column to delete several at once.
+        filter_cols = st.columns([3, 2, 1])
+        date_range = filter_cols[0].date_input("Date range", value=(), key="entries_range")
+        jobs = entry_index.jobs()
+        job_choice = filter_cols[1].selectbox("Job", ["All jobs"] + jobs, key="entries_job")
+        page_size = filter_cols[2].selectbox("Per page", [25, 50, 100], key="entries_page_size")
+
+        range_start = date_range[0] if len(date_range) > 0 else None
+        range_end = date_range[1] if len(date_range) > 1 else range_start
+        job_filter = None if job_choice == "All jobs" else job_choice
+
+        total_entries = storage.count_entries(range_start, range_end, job_filter)
+        n_pages = max(math.ceil(total_entries / page_size), 1)
+        # Keep the page number valid when a filter shrinks the result
+        st.session_state["entries_page"] = min(st.session_state.get("entries_page", 1), n_pages)
+        page = st.number_input(
+            f"Page (of {n_pages}, {total_entries} entries)", min_value=1, max_value=n_pages, key="entries_page"
+        )
+        page_df = storage.load_entries_page(
+            range_start, range_end, job_filter, offset=(page - 1) * page_size, limit=page_size
+        )
+
+        edited = st.data_editor(
+            format_entries_table(page_df),
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Date", "Start–End", "Job Name", "Hours worked", "Earnings"],
+            column_config={"Delete": st.column_config.CheckboxColumn("🗑️"), "ID": None},
+            column_order=["Date", "Start–End", "Job Name", "Hours worked", "Earnings", "Delete"],
+            key=f"entries_table_{page}_{page_size}_{job_choice}_{range_start}_{range_end}"
+        )
+        # Delete button: removes the ticked entries from storage by their IDs (independent of the sort order)
+        selected_ids = edited.loc[edited["Delete"], "ID"].tolist()
+        if st.button(f"Delete selected ({len(selected_ids)})", disabled=not selected_ids):
+            storage.delete_entries(selected_ids)
+            st.rerun()
+
+        # Scan the whole history for duplicates and overlapping shifts (on demand, one pass)
+        if st.button("Check for overlaps"):
+            conflicts = find_conflicts(storage.load_entries())
+            if conflicts.empty:
+                st.success("No overlapping or duplicate entries.")
             else:
-                start_end_str = "-"
-
-            job = row["Job Name"]
-            hours = f"{row['Hours worked']:.2f} h"
-            earnings = f"{row['Earnings']:.2f} €"
-
-            cols = st.columns([2, 2, 2, 2, 2, 1])
-            cols[0].write(date_str)
-            cols[1].write(start_end_str)
-            cols[2].write(job)
-            cols[3].write(hours)
-            cols[4].write(earnings)
-            # Delete button: removes row in Google Sheet (idx+2 because header is row 1)
-            if cols[5].button("🗑️", key=f"del_{idx}"):
-                sheet.delete_rows(idx + 2, idx + 2)
-                st.rerun()
-                break
-
-
-
-
+                st.warning(f"{len(conflicts)} entries overlap an earlier entry of the same day.")
+                conflict_table = format_entries_table(conflicts).drop(columns=["Delete", "ID"])
+                conflict_table["Conflict"] = conflicts["Conflict"]
+                st.dataframe(conflict_table, hide_index=True)
+
+# Sidebar: Debug panel (metrics = true in the secrets)
+# Calls of this rerun so far, sorted by total time, and the Sheets API usage of this session.
+# Saves and deletes are written by the user's write-behind thread outside the reruns; its calls are
+# shared by all sessions of the user and shown separately (counted from the start of this session).
+if metrics_enabled:
+    run = st.session_state["metrics_run"]
+    metrics.finish_run(run)
+    current = summarize_run(run)
+    metrics_history = st.session_state.get("metrics_history", [])
+    background_calls = metrics.background_sheet_calls(writer_thread_name(user))
+    background_calls -= st.session_state.setdefault("metrics_background_start", background_calls)
+    with st.sidebar.expander("Debug: timings"):
+        st.caption(
+            f"This rerun: {current['ms']:.0f} ms, {current['sheet_calls']} Sheets API calls "
+            f"({current['sheet_bytes'] / 1024:.1f} KB, {current['sheet_errors']} failed)"
+        )
+        st.dataframe(pd.DataFrame(current["calls"]), hide_index=True)
+        session_calls = sum(r["sheet_calls"] for r in metrics_history) + current["sheet_calls"]
+        st.caption(f"This session: {session_calls} Sheets API calls in {len(metrics_history) + 1} reruns")
+        st.caption(f"Background writes since this session started: {background_calls} Sheets API calls")
+        st.download_button(
+            "Export metrics (JSON)",
+            json.dumps(metrics_history + [current], indent=2),
+            "timetracker_metrics.json",
+            "application/json"
+        )
@@ -0,0 +1,141 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import calculate_overtime, time_to_minutes, minutes_to_time
+
+
+#NORMALIZATION
+
+# Compact typed schema of the entries used for all computations (see compact_entries).
+# Hours and earnings stay float64 so that sums are exact to the cent, like the stored rollups.
+ENTRY_DTYPES = {
+    "Job Name": "category",
+    "Date": "datetime64[s]",
+    "Start time": "Int16",
+    "End time": "Int16",
+    "Break minutes": "Int16",
+    "Hours worked": "float64",
+    "Earnings": "float64",
+    "ID": "str",
+    "Modified": "datetime64[ms, UTC]"
+}
+
+def _minutes(column):
+    # Times as minutes since midnight; already compact columns are kept as they are.
+    # Mixed columns (compact rows plus newly saved 'HH:MM' rows) keep their numbers.
+    if pd.api.types.is_numeric_dtype(column):
+        return column
+    minutes = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+    text = np.isnan(minutes)
+    if text.any():
+        minutes[text] = time_to_minutes(column[text])
+    return minutes
+
+def is_compact(entries_df):
+    """
+    True if all schema columns of the entries already have the dtypes of ENTRY_DTYPES.
+    """
+    return all(
+        str(entries_df[column].dtype) == dtype for column, dtype in ENTRY_DTYPES.items() if column in entries_df.columns
+    )
+
+def compact_entries(entries_df):
+    """
+    Return a copy of the entries in the compact typed schema (ENTRY_DTYPES): dates as datetime64,
+    start/end times and breaks as small integers (minutes since midnight, <NA> if missing),
+    hours and earnings as floats and the job name as a category.
+    Invalid values become missing; columns that are not in the schema are kept unchanged.
+    Calling it on already compact entries is cheap and returns the same values.
+    """
+    df = entries_df.copy()
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    for column in ("Start time", "End time"):
+        if column in df.columns:
+            df[column] = np.round(_minutes(df[column]))
+    for column in ("Break minutes", "Hours worked", "Earnings"):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    if "Break minutes" in df.columns:
+        df["Break minutes"] = df["Break minutes"].round()
+    if "Modified" in df.columns:
+        df["Modified"] = pd.to_datetime(df["Modified"], errors="coerce", utc=True, format="ISO8601")
+    return df.astype({column: dtype for column, dtype in ENTRY_DTYPES.items() if column in df.columns})
+
+def expand_entries(entries_df):
+    """
+    Return a copy of the entries in the stored format, the reverse of compact_entries:
+    dates as 'YYYY-MM-DD', times as 'HH:MM', 'Modified' as an ISO timestamp and the job name
+    as text ('' for missing dates, times and timestamps). Used for exports and journals.
+    """
+    df = compact_entries(entries_df)
+    if "Job Name" in df.columns:
+        df["Job Name"] = df["Job Name"].astype(object).where(df["Job Name"].notna(), "")
+    if "Date" in df.columns:
+        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d").astype(object).where(df["Date"].notna(), "")
+    for column in ("Start time", "End time"):
+        if column in df.columns:
+            df[column] = minutes_to_time(df[column].astype(float))
+    if "Modified" in df.columns:
+        modified = df["Modified"].dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3] + "+00:00"
+        df["Modified"] = modified.astype(object).where(df["Modified"].notna(), "")
+    return df
+
+def normalize_entries(entries_df):
+    """
+    Return the entries in the compact typed schema (see compact_entries), sorted by date and
+    start time (descending), with hours/earnings rounded to cents and the ISO 'Year'/'Week'
+    and 'Month' keys used by all summaries. The input is not modified.
+    """
+    df = compact_entries(entries_df)
+    df["Hours worked"] = df["Hours worked"].round(2)
+    df["Earnings"] = df["Earnings"].round(2)
+    iso = df["Date"].dt.isocalendar()
+    df["Year"] = iso["year"].astype("UInt16")
+    df["Week"] = iso["week"].astype("UInt8")
+    # 'YYYY-MM' via datetime64[M]; much faster than strftime on large frames
+    months = np.datetime_as_string(df["Date"].to_numpy().astype("datetime64[M]"), unit="M")
+    df["Month"] = pd.Categorical(np.where(df["Date"].isna(), None, months))
+    return df.sort_values(by=["Date", "Start time"], ascending=[False, False]).reset_index(drop=True)
+
+#AGGREGATION
+
+def aggregate_entries(entries_df, settings, whist, today=None, rollups=None):
+    """
+    Compute everything the app displays from the entries in one pass.
+    Returns a dict with:
+    - 'entries': the normalized entries (see normalize_entries)
+    - 'this_week': entries of the current ISO week
+    - 'weekly': Year, Week, total_hours, total_earnings, Estimated weekly hours, Overtime (ascending)
+    - 'monthly': Month, total_hours, total_earnings (ascending)
+    If stored rollups are given, 'weekly' and 'monthly' are read from them instead.
+    """
+    entries = normalize_entries(entries_df)
+    if today is None:
+        today = date.today()
+    year_now, week_now, _ = today.isocalendar()
+    this_week = entries[(entries["Year"] == year_now) & (entries["Week"] == week_now)]
+
+    if rollups is not None:
+        # Imported here because timetrackerrollups builds on this module
+        from timetrackerrollups import rollup_summaries
+        weekly, monthly = rollup_summaries(rollups, settings, whist)
+    else:
+        weekly = entries.groupby(["Year", "Week"]).agg(
+            total_hours=("Hours worked", "sum"),
+            total_earnings=("Earnings", "sum")
+        ).round(2).reset_index()
+        weekly = calculate_overtime(weekly, settings, whist)
+
+        monthly = entries.groupby("Month").agg(
+            total_hours=("Hours worked", "sum"),
+            total_earnings=("Earnings", "sum")
+        ).round(2).reset_index()
+
+    return {
+        "entries": entries,
+        "this_week": this_week.reset_index(drop=True),
+        "weekly": weekly,
+        "monthly": monthly
+    }
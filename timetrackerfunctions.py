@@ -1,11 +1,64 @@
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta, timezone
+import hashlib
+import html
+import threading
+import uuid
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
 
+from timetrackertargets import TargetCalendar, week_ordinal
+
+
+ENTRY_COLUMNS = [
+    "Job Name", "Date", "Start time", "End time", "Break minutes", "Hours worked", "Earnings",
+    "ID", "Modified"
+]
+
+# Precomputed totals per ISO week ('2026-07') or month ('2026-02'), see timetrackerrollups
+ROLLUP_COLUMNS = ["Period", "Key", "Total hours", "Total earnings", "Entries"]
+
+# Effective-dated wage rates, see timetrackerrates. An empty 'Job Name' applies to all jobs;
+# surcharges are fractions of the hourly wage (0.25 = +25 %).
+RATE_COLUMNS = [
+    "Job Name", "Valid from", "Hourly wage", "Weekend surcharge", "Night surcharge", "Overtime surcharge"
+]
+
+#ENTRY IDS
+
+def new_entry_id():
+    """
+    Return a new stable entry ID.
+    The 'e' prefix keeps gspread from turning hex IDs like '12e4...' into numbers.
+    """
+    return "e" + uuid.uuid4().hex[:16]
+
+def stamp_entry(entry):
+    """
+    Return a copy of the entry with an ID (kept if present) and a fresh 'Modified' timestamp.
+    """
+    stamped = dict(entry)
+    if not stamped.get("ID"):
+        stamped["ID"] = new_entry_id()
+    stamped["Modified"] = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    return stamped
+
+def merge_entry_changes(local_df, ids, changed_df):
+    """
+    Rebuild the entries frame for the given ID order (as currently stored).
+    Rows in changed_df replace or add entries; all other rows come from local_df.
+    IDs that are no longer listed (deleted entries) are dropped.
+    """
+    local = local_df.set_index("ID")
+    changed = changed_df.set_index("ID")
+    unchanged = local[~local.index.isin(changed.index)]
+    merged = pd.concat([unchanged, changed]) if not changed.empty else unchanged
+    merged = merged.reindex(ids)
+    return merged.reset_index()[ENTRY_COLUMNS]
 
 #GOOGLE SHEETS
 
+ID_COLUMNS = ("H", "I")  # sheet columns holding 'ID' and 'Modified'
+
 def load_entries_gsheet(sheet):
     """
     Load all time entries from the main Google Sheet.
@@ -14,25 +67,144 @@ def load_entries_gsheet(sheet):
     data = sheet.get_all_records()
     df = pd.DataFrame(data)
     if df.empty:
-        df = pd.DataFrame(columns=[
-            "Job Name", "Date", "Start time", "End time", "Break minutes", "Hours worked", "Earnings"
-        ])
+        df = pd.DataFrame(columns=ENTRY_COLUMNS)
     return df
 
+def sync_entries_gsheet(local_df, sheet):
+    """
+    Bring a previously loaded entries frame up to date.
+    Reads only the ID/Modified columns, then fetches just the rows that are new or changed
+    (one batch_get), and drops entries that were deleted from the sheet.
+    """
+    versions = sheet.batch_get([f"{ID_COLUMNS[0]}2:{ID_COLUMNS[1]}"], value_render_option="UNFORMATTED_VALUE")[0]
+    versions = [list(row) + [""] * (2 - len(row)) for row in versions]
+    if any(not entry_id for entry_id, _ in versions) or "ID" not in local_df.columns:
+        # Rows added by hand (without ID): assign IDs and fall back to a full load
+        ensure_entry_ids_gsheet(sheet)
+        return load_entries_gsheet(sheet)
+
+    # Compare parsed timestamps, so that compact frames (datetime 'Modified') sync like stored ones
+    parse = lambda values: pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", utc=True, format="ISO8601")
+    ids = [entry_id for entry_id, _ in versions]
+    local = pd.Series(parse(local_df["Modified"]).to_numpy(), index=local_df["ID"].to_numpy())
+    local = local[~local.index.duplicated()]
+    known = pd.Index(ids).isin(local.index)
+    local = local.reindex(ids).to_numpy()
+    remote = parse([modified for _, modified in versions]).to_numpy()
+    # Known rows without a timestamp on both sides count as unchanged
+    changed = ~known | ~((local == remote) | (pd.isna(local) & pd.isna(remote)))
+    runs = row_runs([i + 2 for i in np.flatnonzero(changed)])
+    changed_df = pd.DataFrame(fetch_entry_rows_gsheet(runs, sheet), columns=ENTRY_COLUMNS)
+    return merge_entry_changes(local_df, ids, changed_df)
+
+def ensure_entry_ids_gsheet(sheet):
+    """
+    Add the 'ID' and 'Modified' columns to an entries sheet that predates them
+    and give every row without an ID a new one. Writes at most one batch update.
+    """
+    values = sheet.get_all_values(value_render_option="UNFORMATTED_VALUE")
+    if not values:
+        sheet.batch_update([{"range": a1_range(1, 1, len(ENTRY_COLUMNS)), "values": [ENTRY_COLUMNS]}])
+        return
+    id_index = ENTRY_COLUMNS.index("ID")
+    now = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    columns = [["ID", "Modified"]]
+    missing = values[0][id_index:id_index + 2] != ["ID", "Modified"]
+    for row in values[1:]:
+        row = list(row) + [""] * (len(ENTRY_COLUMNS) - len(row))
+        if row[id_index]:
+            columns.append(row[id_index:id_index + 2])
+        else:
+            columns.append([new_entry_id(), now])
+            missing = True
+    if not missing:
+        return
+    if sheet.col_count < len(ENTRY_COLUMNS):
+        sheet.add_cols(len(ENTRY_COLUMNS) - sheet.col_count)
+    sheet.batch_update([{"range": f"{ID_COLUMNS[0]}1:{ID_COLUMNS[1]}{len(columns)}", "values": columns}])
+
 def save_entry_gsheet(entry, sheet):
     """
     Save a single time entry (dict) as a new row in the main Google Sheet.
-    """
-    row = [
-        entry["Job Name"],
-        entry["Date"],
-        entry["Start time"],
-        entry["End time"],
-        entry["Break minutes"],
-        entry["Hours worked"],
-        entry["Earnings"]
+    Returns the saved entry including its 'ID' and 'Modified' values.
+    """
+    entry = stamp_entry(entry)
+    sheet.append_row([entry[col] for col in ENTRY_COLUMNS])
+    return entry
+
+def save_entries_gsheet(entries, sheet):
+    """
+    Save several time entries (dicts) with a single append_rows call.
+    Returns the saved entries including their 'ID' and 'Modified' values.
+    """
+    entries = [stamp_entry(entry) for entry in entries]
+    if entries:
+        sheet.append_rows([[entry[col] for col in ENTRY_COLUMNS] for entry in entries])
+    return entries
+
+def delete_entry_gsheet(entry_id, sheet):
+    """
+    Delete the entry with the given ID and return it as a dict (None if not found).
+    """
+    deleted = delete_entries_gsheet([entry_id], sheet)
+    return deleted[0] if deleted else None
+
+def delete_entries_gsheet(entry_ids, sheet):
+    """
+    Delete all entries with the given IDs and return them as dicts.
+    Rows are looked up in the ID column right before deleting, so this does not
+    depend on how the entries are sorted in the app. The rows are read in one batch_get
+    and removed bottom-up with one delete_rows call per block of adjacent rows.
+    """
+    wanted = set(entry_ids)
+    ids = sheet.col_values(ENTRY_COLUMNS.index("ID") + 1)
+    runs = row_runs([i + 1 for i, entry_id in enumerate(ids) if i > 0 and entry_id in wanted])
+    deleted = fetch_entry_rows_gsheet(runs, sheet)
+    for first, last in reversed(runs):
+        sheet.delete_rows(first, last)
+    return deleted
+
+def update_entries_gsheet(updates, sheet):
+    """
+    Change stored entries in place. Each update is a dict with the 'ID' and the new values of
+    some columns (e.g. 'Earnings'). The rows are looked up in the ID column, read in one batch_get
+    and only the changed columns plus a fresh 'Modified' (so other sessions sync the change)
+    are written, in one batch_update. Rows keep their position and ID.
+    Returns (entries before, entries after the update) as lists of dicts.
+    """
+    updates = {update["ID"]: update for update in updates}
+    ids = sheet.col_values(ENTRY_COLUMNS.index("ID") + 1)
+    runs = row_runs([i + 1 for i, entry_id in enumerate(ids) if i > 0 and entry_id in updates])
+    before = fetch_entry_rows_gsheet(runs, sheet)
+    after = [stamp_entry({**entry, **updates[entry["ID"]]}) for entry in before]
+    columns = [col for col in ENTRY_COLUMNS[:-2] if any(col in update for update in updates.values())] + ["Modified"]
+    data = []
+    position = 0
+    for first, last in runs:
+        block = after[position:position + last - first + 1]
+        position += len(block)
+        for col in columns:
+            letter = column_letter(ENTRY_COLUMNS.index(col) + 1)
+            data.append({"range": f"{letter}{first}:{letter}{last}", "values": [[entry[col]] for entry in block]})
+    if data:
+        sheet.batch_update(data)
+    return before, after
+
+def fetch_entry_rows_gsheet(runs, sheet):
+    """
+    Read the entry rows of the given [first, last] row blocks with a single batch_get.
+    Returns a list of entry dicts.
+    """
+    if not runs:
+        return []
+    width = len(ENTRY_COLUMNS)
+    blocks = sheet.batch_get(
+        [a1_range(first, last, width) for first, last in runs], value_render_option="UNFORMATTED_VALUE"
+    )
+    return [
+        dict(zip(ENTRY_COLUMNS, list(row) + [""] * (width - len(row))))
+        for block in blocks for row in block
     ]
-    sheet.append_row(row)
 
 def load_settings_gsheet(sheet):
     """
@@ -51,13 +223,49 @@ def load_settings_gsheet(sheet):
 def save_settings_gsheet(settings, sheet):
     """
     Save the current settings dictionary to the 'Settings' worksheet.
-    Clears and overwrites the sheet.
+    Only rows that differ from the sheet are rewritten, in a single batch update.
+    """
+    rows = [["key", "value"]] + [[k, v] for k, v in settings.items()]
+    write_rows_gsheet(rows, sheet)
+
+def load_rollups_gsheet(sheet):
+    """
+    Load the precomputed weekly/monthly totals from the 'Rollups' worksheet.
+    Returns a DataFrame with ROLLUP_COLUMNS (empty if nothing is stored yet).
+    """
+    df = pd.DataFrame(sheet.get_all_records())
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    df["Key"] = df["Key"].astype(str)
+    return df[ROLLUP_COLUMNS]
+
+def save_rollups_gsheet(rollups, sheet):
+    """
+    Save the rollups DataFrame to the 'Rollups' worksheet.
+    Only rows that differ from the sheet are rewritten, in a single batch update.
+    """
+    rows = [ROLLUP_COLUMNS] + rollups[ROLLUP_COLUMNS].values.tolist()
+    write_rows_gsheet(rows, sheet)
+
+def load_rates_gsheet(sheet):
+    """
+    Load the wage rate table from the 'Rates' worksheet.
+    Returns a DataFrame with RATE_COLUMNS (empty if no rates are stored yet).
     """
-    data = [[k, v] for k, v in settings.items()]
-    sheet.clear()
-    sheet.append_row(["key", "value"])
-    for row in data:
-        sheet.append_row(row)
+    df = pd.DataFrame(sheet.get_all_records())
+    if df.empty:
+        return pd.DataFrame(columns=RATE_COLUMNS)
+    df["Job Name"] = df["Job Name"].astype(str)
+    df["Valid from"] = df["Valid from"].astype(str)
+    return df[RATE_COLUMNS]
+
+def save_rates_gsheet(rates, sheet):
+    """
+    Save the wage rate table to the 'Rates' worksheet.
+    Only rows that differ from the sheet are rewritten, in a single batch update.
+    """
+    rows = [RATE_COLUMNS] + rates[RATE_COLUMNS].values.tolist()
+    write_rows_gsheet(rows, sheet)
 
 def load_weekly_hours_history_gsheet(weekly_sheet):
     """
@@ -70,12 +278,77 @@ def load_weekly_hours_history_gsheet(weekly_sheet):
 def save_weekly_hours_history_gsheet(whist, weekly_sheet):
     """
     Save the weekly hour targets history to the 'WeeklyHistory' worksheet.
-    Overwrites the entire sheet.
+    Only rows that differ from the sheet are rewritten, in a single batch update.
+    """
+    rows = [["week_id", "estimated_weekly_hours"]] + [[week_id, hours] for week_id, hours in whist.items()]
+    write_rows_gsheet(rows, weekly_sheet)
+
+def write_rows_gsheet(rows, sheet):
+    """
+    Make the sheet contain exactly `rows` (header included) with one read and at most one write.
+    Changed rows are sent together in a single batch_update; surplus old rows are blanked
+    in the same request, so readers never see a cleared or half-written sheet.
     """
-    weekly_sheet.clear()
-    weekly_sheet.append_row(["week_id", "estimated_weekly_hours"])
-    for week_id, hours in whist.items():
-        weekly_sheet.append_row([week_id, hours])
+    current = sheet.get_all_values(value_render_option="UNFORMATTED_VALUE")
+    width = max([len(row) for row in rows + current] or [1])
+    target = [list(row) + [""] * (width - len(row)) for row in rows]
+    target += [[""] * width] * (len(current) - len(rows))
+    current = [list(row) + [""] * (width - len(row)) for row in current]
+
+    changed = [i + 1 for i, row in enumerate(target) if i >= len(current) or row != current[i]]
+    runs = row_runs(changed)
+    if runs:
+        sheet.batch_update([
+            {"range": a1_range(first, last, width), "values": target[first - 1:last]}
+            for first, last in runs
+        ])
+
+def row_runs(rows):
+    """
+    Group sorted row numbers into blocks of adjacent rows: [2, 3, 4, 7] -> [[2, 4], [7, 7]].
+    """
+    runs = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+def a1_range(first_row, last_row, n_cols):
+    """
+    Build an A1 range like 'A2:B5' for the given 1-based rows and the first n_cols columns.
+    """
+    return f"A{first_row}:{column_letter(n_cols)}{last_row}"
+
+def column_letter(n):
+    """
+    Sheet column letter(s) of a 1-based column number: 1 -> 'A', 7 -> 'G', 27 -> 'AA'.
+    """
+    letters = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+#QUERIES
+
+def filter_entries(df, start=None, end=None, job=None):
+    """
+    Return the entries between start and end (dates, inclusive) and of the given job,
+    newest first. Filters that are None are not applied.
+    """
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates <= pd.Timestamp(end)
+    if job is not None:
+        mask &= df["Job Name"] == job
+    result = df[mask].assign(_date=dates[mask])
+    result = result.sort_values(by=["_date", "Start time"], ascending=[False, False])
+    return result.drop(columns="_date").reset_index(drop=True)
 
 #VALIDATION
 
@@ -94,6 +367,31 @@ def validate_entry(start_time, end_time, break_minutes, hourly_wage):
         return "Please enter an hourly wage greater than 0."
     return ""
 
+def validate_entries_batch(start_minutes, end_minutes, break_minutes, hourly_wage):
+    """
+    Vectorized validate_entry for whole columns (times as minutes since midnight, NaN if missing).
+    Returns a NumPy array with one error message per row ('' if the row is valid).
+    """
+    start_minutes = np.asarray(start_minutes, dtype=float)
+    end_minutes = np.asarray(end_minutes, dtype=float)
+    breaks = np.broadcast_to(np.asarray(break_minutes, dtype=float), start_minutes.shape)
+    wages = np.broadcast_to(np.asarray(hourly_wage, dtype=float), start_minutes.shape)
+    return np.select(
+        [
+            np.isnan(start_minutes) | np.isnan(end_minutes),
+            end_minutes <= start_minutes,
+            breaks < 0,
+            ~(wages > 0)
+        ],
+        [
+            "Please enter both start and end time.",
+            "End time must be after start time.",
+            "Break cannot be negative.",
+            "Please enter an hourly wage greater than 0."
+        ],
+        default=""
+    )
+
 #CALCULATION
 
 def calculate_daily_hours(start_time: time, end_time: time, break_minutes: float = 0):
@@ -113,15 +411,60 @@ def calculate_earnings(hours_worked: float, hourly_wage: float) -> float:
     """
     return round(hours_worked * hourly_wage, 2)
 
+def time_to_minutes(times):
+    """
+    Convert a column of times ('HH:MM' strings, 'HH:MM:SS' strings or datetime.time)
+    to minutes since midnight. Invalid or missing values become NaN.
+    Numeric columns are taken as minutes already and returned as floats.
+    """
+    times = pd.Series(times)
+    if pd.api.types.is_numeric_dtype(times):
+        return times.to_numpy(dtype=float, na_value=np.nan)
+    times = times.astype(str)
+    # Fast path for the stored 'HH:MM' format; anything else goes through the regex
+    parsed = pd.to_datetime(times, format="%H:%M", errors="coerce")
+    minutes = (parsed.dt.hour * 60 + parsed.dt.minute).astype(float)
+    other = minutes.isna()
+    if other.any():
+        parts = times[other].str.extract(r"(\d{1,2}):(\d{2})").astype(float)
+        minutes[other] = parts[0] * 60 + parts[1]
+    return minutes.to_numpy()
+
+def minutes_to_time(minutes):
+    """
+    Format a column of minutes since midnight as 'HH:MM' strings ('' for missing values).
+    """
+    minutes = pd.Series(minutes, dtype=float)
+    hours = (minutes // 60).astype("Int64").astype(str).str.zfill(2)
+    mins = (minutes % 60).astype("Int64").astype(str).str.zfill(2)
+    return (hours + ":" + mins).where(minutes.notna(), "").to_numpy()
+
+def calculate_daily_hours_batch(start_times, end_times, break_minutes=0):
+    """
+    Vectorized calculate_daily_hours for whole columns of start/end times and breaks.
+    Returns a NumPy array of hours, clipped at 0.
+    """
+    breaks = break_minutes
+    if np.ndim(break_minutes):
+        breaks = pd.to_numeric(pd.Series(break_minutes), errors="coerce").to_numpy()
+    duration = (time_to_minutes(end_times) - time_to_minutes(start_times) - breaks) / 60
+    return np.clip(duration, 0, None)
+
+def calculate_earnings_batch(hours_worked, hourly_wage):
+    """
+    Vectorized calculate_earnings; hourly_wage may be a single value or one per row.
+    """
+    return np.round(np.asarray(hours_worked, dtype=float) * np.asarray(hourly_wage, dtype=float), 2)
+
 
 def summarize_weekly_hours(df):
     """
     Summarize total hours and earnings per week.
     Returns a DataFrame with columns: Year, Week, total_hours, total_earnings.
+    The input DataFrame is not modified.
     """
-    df["Date"] = pd.to_datetime(df["Date"])
-    df["Year"] = df["Date"].dt.isocalendar().year
-    df["Week"] = df["Date"].dt.isocalendar().week
+    iso = pd.to_datetime(df["Date"]).dt.isocalendar()
+    df = df.assign(Year=iso["year"], Week=iso["week"])
     week_summary = df.groupby(["Year", "Week"]).agg(
         total_hours=("Hours worked", "sum"),
         total_earnings=("Earnings", "sum")
@@ -132,9 +475,9 @@ def summarize_monthly_hours(df):
     """
     Summarize total hours and earnings per month
     Returns a DataFrame with columns: Month, total_hours, total_earnings.
+    The input DataFrame is not modified.
     """
-    df["Date"] = pd.to_datetime(df["Date"])
-    df["Month"] = df["Date"].dt.strftime("%Y-%m")
+    df = df.assign(Month=pd.to_datetime(df["Date"]).dt.strftime("%Y-%m"))
     month_summary = df.groupby("Month").agg(
         total_hours=("Hours worked", "sum"),
         total_earnings=("Earnings", "sum")
@@ -144,52 +487,90 @@ def summarize_monthly_hours(df):
 def calculate_overtime(weekly_summary, settings, whist):
     """
     Add columns 'Estimated weekly hours' and 'Overtime' to weekly_summary DataFrame.
-    Fills with target hours from weekly history (whist) or falls back to settings.
-    """
-    def get_estimated_weekly_hours(year, week):
-        week_id = f"{year}-{week:02d}"
-        return whist.get(week_id, settings.get("estimated_weekly_hours", 40))
-
-    overtime_list = []
-    used_weekly_hours = []
-    for _, row in weekly_summary.iterrows():
-        year = row["Year"]
-        week = row["Week"]
-        est_hours = get_estimated_weekly_hours(year, week)
-        used_weekly_hours.append(est_hours)
-        overtime = max(row["total_hours"] - est_hours, 0)
-        overtime_list.append(overtime)
-
-    weekly_summary["Estimated weekly hours"] = used_weekly_hours
-    weekly_summary["Overtime"] = overtime_list
+    Target hours come from the target-hours calendar (see timetrackertargets): the latest weekly
+    history value at or before each week, less holidays, or the settings without any history.
+    """
+    calendar = TargetCalendar.from_settings(settings, whist)
+    est_hours = calendar.targets(week_ordinal(
+        weekly_summary["Year"].to_numpy(dtype=np.int64), weekly_summary["Week"].to_numpy(dtype=np.int64)
+    ))
+    weekly_summary["Estimated weekly hours"] = est_hours
+    weekly_summary["Overtime"] = np.clip(weekly_summary["total_hours"].to_numpy() - est_hours, 0, None)
     return weekly_summary
 
 # VISUALIZATION
 
-def plot_weekly_hours(weekly_summary):
+# Selectable chart ranges (in weeks); ranges longer than MONTHLY_CHART_WEEKS are shown per month
+CHART_WINDOWS = {"4 Weeks": 4, "Quarter": 13, "Year": 52}
+MONTHLY_CHART_WEEKS = 26
+
+# Figures built by plot_weekly_hours, keyed by a hash of the chart data (most recent last).
+# Shared by all sessions (threads) of the app, so every access holds the lock.
+_figure_cache = {}
+_figure_cache_lock = threading.Lock()
+FIGURE_CACHE_SIZE = 16
+
+def weekly_chart_data(weekly_summary, weeks=None, today=None, monthly=None):
+    """
+    Prepare the bars for plot_weekly_hours: one row per week (or month) with
+    'Label', 'Worked' (hours up to the target) and 'Overtime'.
+    Only the last `weeks` ISO weeks up to today are kept (all weeks if None).
+    With monthly=True (default: for windows longer than MONTHLY_CHART_WEEKS) the weeks
+    are summed per month of their Monday; weekly overtime is summed, not netted.
+    """
+    if today is None:
+        today = date.today()
+    mondays = pd.to_datetime([
+        date.fromisocalendar(int(y), int(w), 1) for y, w in zip(weekly_summary["Year"], weekly_summary["Week"])
+    ])
+    hours = weekly_summary["total_hours"].to_numpy(dtype=float)
+    target = weekly_summary["Estimated weekly hours"].to_numpy(dtype=float)
+    overtime = np.maximum(hours - target, 0)
+    chart = pd.DataFrame({"Monday": mondays, "Worked": hours - overtime, "Overtime": overtime})
+    if weeks is not None:
+        this_monday = pd.Timestamp(today - timedelta(days=today.weekday()))
+        chart = chart[(chart["Monday"] > this_monday - pd.Timedelta(weeks=weeks)) & (chart["Monday"] <= this_monday)]
+    chart = chart.sort_values("Monday")
+    if monthly is None:
+        monthly = weeks is not None and weeks > MONTHLY_CHART_WEEKS
+    if monthly:
+        chart = chart.groupby(chart["Monday"].dt.strftime("%Y-%m"))[["Worked", "Overtime"]].sum()
+        return chart.rename_axis("Label").reset_index()
+    labels = [f"{m.isocalendar()[0]}-KW{m.isocalendar()[1]:02d}" for m in chart["Monday"]]
+    return pd.DataFrame({"Label": labels, "Worked": chart["Worked"].to_numpy(), "Overtime": chart["Overtime"].to_numpy()})
+
+def plot_weekly_hours(weekly_summary, weeks=None, today=None, monthly=None):
     """
     Create a stacked bar chart of worked hours vs. target (overtime highlighted).
+    `weeks`, `today` and `monthly` select the time window, see weekly_chart_data.
+    Figures are memoized on the chart data, so unchanged data returns the same figure.
     Returns a Plotly figure.
     """
-    x = [f"{int(y)}-KW{int(w):02d}" for y, w in zip(weekly_summary["Year"], weekly_summary["Week"])]
-    y_hours = weekly_summary["total_hours"].values
-    y_target = weekly_summary["Estimated weekly hours"].values
-
-    normal_hours = np.minimum(y_hours, y_target)
-    overtime_hours = np.maximum(y_hours - y_target, 0)
+    if monthly is None:
+        monthly = weeks is not None and weeks > MONTHLY_CHART_WEEKS
+    chart = weekly_chart_data(weekly_summary, weeks, today, monthly)
+    x_title = "Month" if monthly else "Week"
+    key = (x_title, hashlib.sha1(pd.util.hash_pandas_object(chart, index=False).to_numpy().tobytes()).hexdigest())
+    with _figure_cache_lock:
+        fig = _figure_cache.pop(key, None)
+        if fig is not None:
+            _figure_cache[key] = fig
+            return fig
+    # Imported on first use, so that the app starts without loading plotly
+    import plotly.graph_objects as go
 
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
-        x=x,
-        y=normal_hours,
+        x=chart["Label"],
+        y=chart["Worked"],
         name="Worked (target or less)",
         marker_color="royalblue"
     ))
 
     fig.add_trace(go.Bar(
-        x=x,
-        y=overtime_hours,
+        x=chart["Label"],
+        y=chart["Overtime"],
         name="Overtime",
         marker_color="red"
     ))
@@ -197,12 +578,94 @@ def plot_weekly_hours(weekly_summary):
     fig.update_layout(
         barmode="stack",
         yaxis_title="Hours",
-        xaxis_title="Week",
+        xaxis_title=x_title,
         legend_title="Legend",
         bargap=0.2
     )
+    with _figure_cache_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.pop(next(iter(_figure_cache)))
     return fig
 
+# Selectable ranges of the calendar view (in weeks, ending with the current week)
+CALENDAR_WINDOWS = {"This Week": 1, "2 Weeks": 2, "4 Weeks": 4}
+WEEKDAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def build_calendar(entries_df, start, weeks=1):
+    """
+    Bucket entries into the days of `weeks` weeks from `start` (a Monday) in one pass.
+    Returns a list of weeks, each a list of 7 day dicts with 'date', 'label' ('Mon'), 'day' ('13.10.'),
+    'hours' and 'earnings' (day totals) and 'entries': dicts with formatted 'job', 'time', 'hours'
+    and 'earnings', ordered by start time. The cost does not depend on the number of days shown.
+    """
+    n_days = 7 * weeks
+    start = pd.Timestamp(start).normalize()
+    offsets = (pd.to_datetime(entries_df["Date"], errors="coerce") - start).dt.days.to_numpy(dtype=float)
+    in_range = (offsets >= 0) & (offsets < n_days)
+    df = entries_df[in_range]
+    offsets = offsets[in_range].astype(np.int64)
+
+    start_minutes = df["Start time"] if pd.api.types.is_numeric_dtype(df["Start time"]) else time_to_minutes(df["Start time"])
+    order = np.lexsort((pd.Series(start_minutes, dtype=float).fillna(-1).to_numpy(), offsets))
+    offsets = offsets[order]
+    df = df.iloc[order]
+
+    starts = np.asarray(fmt_time(df["Start time"]), dtype=object)
+    ends = np.asarray(fmt_time(df["End time"]), dtype=object)
+    times = np.where((starts != "") & (ends != ""), starts + "–" + ends, starts + ends)
+    hours = pd.to_numeric(df["Hours worked"], errors="coerce").to_numpy(dtype=float)
+    earnings = pd.to_numeric(df["Earnings"], errors="coerce").to_numpy(dtype=float)
+    jobs = df["Job Name"].astype(object).fillna("").astype(str).to_numpy()
+    hours_text = pd.Series(hours).map("{:.2f}".format).to_numpy()
+    earnings_text = pd.Series(earnings).map("{:.2f}".format).to_numpy()
+
+    day_hours = np.bincount(offsets, weights=np.nan_to_num(hours), minlength=n_days)
+    day_earnings = np.bincount(offsets, weights=np.nan_to_num(earnings), minlength=n_days)
+    bounds = np.searchsorted(offsets, np.arange(n_days + 1))
+
+    calendar = []
+    for day in range(n_days):
+        current = (start + pd.Timedelta(days=day)).date()
+        first, last = bounds[day], bounds[day + 1]
+        if day % 7 == 0:
+            calendar.append([])
+        calendar[-1].append({
+            "date": current,
+            "label": WEEKDAY_LABELS[day % 7],
+            "day": current.strftime("%d.%m."),
+            "hours": float(day_hours[day]),
+            "earnings": float(day_earnings[day]),
+            "entries": [
+                {"job": job, "time": time_str, "hours": h, "earnings": e}
+                for job, time_str, h, e in zip(
+                    jobs[first:last], times[first:last], hours_text[first:last], earnings_text[first:last]
+                )
+            ]
+        })
+    return calendar
+
+def render_calendar_html(calendar):
+    """
+    Render a calendar from build_calendar as one HTML block: a 7-column grid with one row per week.
+    """
+    cells = []
+    for week in calendar:
+        for day in week:
+            lines = [f"<b>{day['label']}<br>{day['day']}</b>"]
+            for entry in day["entries"]:
+                lines.append(
+                    f"<div style='margin-top:0.5rem'><b>{html.escape(entry['job'])}</b><br>"
+                    f"{entry['time']}<br>⏰ {entry['hours']}h<br>💶 {entry['earnings']}€</div>"
+                )
+            if not day["entries"]:
+                lines.append("<div style='margin-top:0.5rem'>–</div>")
+            cells.append(f"<div>{''.join(lines)}</div>")
+    return (
+        "<div style='display:grid; grid-template-columns:repeat(7, minmax(0, 1fr)); "
+        "gap:1rem 0.75rem; margin-bottom:1rem'>" + "".join(cells) + "</div>"
+    )
+
 #UTILITIES
 
 def safe_float(x):
@@ -227,24 +690,36 @@ def safe_sum(series):
 
 def fmt_time(t):
     """
-    Format a time value for display as 'HH:MM'.
-    Returns '' if input is None or invalid.
-    """
-    if pd.isnull(t) or t is None:
-        return ""
-    if hasattr(t, "strftime"):
-        return t.strftime("%H:%M")
-    t_str = str(t)
-    if len(t_str) >= 5 and t_str[2] == ":":
-        return t_str[:5]
-    if " " in t_str and ":" in t_str:
-        try:
-            return t_str.split(" ")[1][:5]
-        except Exception:
-            pass
-    if ":" in t_str:
-        return t_str[-5:]
-    return ""
+    Format time values for display as 'HH:MM' ('' for missing or invalid values).
+    Takes a single value or a whole column of minutes since midnight, 'HH:MM' strings
+    or datetime.time values; a column is formatted in one vectorized pass.
+    """
+    if np.ndim(t) == 0:
+        return fmt_time([t])[0]
+    values = pd.Series(t)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = time_to_minutes(values)
+    return minutes_to_time(values)
+
+def format_entries_table(df):
+    """
+    Build the display table for the 'All entries' view: formatted date, 'HH:MM–HH:MM',
+    job, hours and earnings, plus the entry ID and an unchecked 'Delete' column.
+    """
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    start = pd.Series(fmt_time(df["Start time"]), index=df.index)
+    end = pd.Series(fmt_time(df["End time"]), index=df.index)
+    both = (start != "") & (end != "")
+    start_end = (start + "–" + end).where(both, (start + end).replace("", "-"))
+    return pd.DataFrame({
+        "Delete": False,
+        "Date": dates.dt.strftime("%d.%m.%Y").fillna("-"),
+        "Start–End": start_end,
+        "Job Name": df["Job Name"],
+        "Hours worked": pd.to_numeric(df["Hours worked"], errors="coerce").map("{:.2f} h".format),
+        "Earnings": pd.to_numeric(df["Earnings"], errors="coerce").map("{:.2f} €".format),
+        "ID": df["ID"]
+    }, index=df.index)
 
 def style_summary_table_with_overtime(df):
     """
@@ -0,0 +1,439 @@
+"""
+Clock-in / clock-out ingestion service for terminals and scripts.
+
+A small asyncio HTTP server (standard library only) accepts start and stop events,
+pairs them into entries with the validation and earnings logic of the app and writes
+the entries to storage in micro-batches: every `interval` seconds (or as soon as
+`batch_size` entries are waiting) one save_entries call appends the whole batch and
+updates the rollups once, so hundreds of events per second cost a few API requests.
+Earnings are computed per batch in one vectorized pass (rate table, else default wage).
+Open shifts and waiting entries are written to a small state file with every flush,
+so a restart does not lose clock-ins. Entries that can't be priced (no rate and no
+default wage) are rejected at flush time and listed under /status.
+
+Events must name a user listed under [users.<name>] in the secrets; in single-user mode
+they must not name one. Requests with other users are refused with 400, so that events
+can't create spreadsheets or database files for unknown users.
+
+    python -m timetrackeringest --port 8765
+
+    POST /events   {"action": "start", "user": "alice", "job": "Cafe", "time": "2026-10-16T09:00"}
+                   {"action": "stop", "user": "alice", "time": "2026-10-16T17:30", "break_minutes": 30}
+                   (one event or a list; 'time' defaults to now, 'job' to the default job;
+                   times with an offset such as 'Z' or '+02:00' are converted to local time)
+    GET  /status   open shifts, waiting entries and counters
+
+If the secrets set ingest_token, requests need the header 'Authorization: Bearer <token>'.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import (
+    new_entry_id,
+    validate_entry,
+    validate_entries_batch,
+    time_to_minutes,
+    safe_float,
+    calculate_daily_hours,
+    calculate_earnings_batch
+)
+from timetrackerstorage import open_storage, open_gsheet_client, load_secrets, CachedStorage
+from timetrackerrates import RateTable, normalize_rates, price_new_entries
+
+STATE_PATH = "timetracker_clock.json"
+MAX_BODY_BYTES = 1 << 20
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 413: "Payload Too Large"}
+
+
+class ClockService:
+    """
+    Pairs start/stop events per user into entries and saves them in micro-batches.
+    `open_user_storage(user)` returns the storage of a user (None in single-user mode).
+    `users` are the accepted user names; None means single-user mode, where events carry no user.
+    Events are handled on the event loop; batches are written in worker threads, `writers` users at a time.
+    """
+
+    def __init__(self, open_user_storage, batch_size=500, interval=0.5, state_path=STATE_PATH, writers=4,
+                 users=None):
+        self.open_user_storage = open_user_storage
+        self.users = None if users is None else set(users)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.state_path = state_path
+        self.writers = writers
+        self.storages = {}
+        self.open_shifts = {}   # user -> {"job", "start" (ISO datetime)}
+        self.pending = []       # (user, entry) waiting for the next flush
+        self.rejected = deque(maxlen=100)   # latest entries that could not be priced
+        self.stats = {"events": 0, "rejected": 0, "saved": 0, "batches": 0}
+        self.last_error = None
+        self._state_changed = False
+        self._failed_users = set()
+        self._wakeup = None
+        self._stopping = False
+        self._read_state()
+
+    #STATE
+
+    def _read_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.open_shifts = {shift.pop("user"): shift for shift in state["open_shifts"]}
+            self.pending = [(item["user"], item["entry"]) for item in state["pending"]]
+
+    def _write_state(self):
+        # Written atomically, like the write-behind journal
+        if not self.state_path:
+            return
+        state = {
+            "open_shifts": [{"user": user, **shift} for user, shift in self.open_shifts.items()],
+            "pending": [{"user": user, "entry": entry} for user, entry in self.pending]
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        self._state_changed = False
+
+    def check_user(self, user):
+        """
+        Error message if events of `user` are not accepted, else None.
+        """
+        if self.users is None:
+            return None if user is None else "Unknown user: this service runs in single-user mode."
+        if user not in self.users:
+            return f"Unknown user {user!r}."
+        return None
+
+    def storage(self, user):
+        if user not in self.storages:
+            self.storages[user] = self.open_user_storage(user)
+        return self.storages[user]
+
+    #EVENTS
+
+    def handle_event(self, event):
+        """
+        Apply one start/stop event. Returns a result dict with 'status' ('open', 'queued' or 'error')
+        and the open shift, the queued entry or the error message.
+        """
+        self.stats["events"] += 1
+        try:
+            error_msg = self.check_user(event.get("user"))
+            result = {"status": "error", "error": error_msg} if error_msg else self._apply(event)
+        except (KeyError, TypeError, ValueError) as e:
+            result = {"status": "error", "error": f"Invalid event: {e}"}
+        if result["status"] == "error":
+            self.stats["rejected"] += 1
+        else:
+            self._state_changed = True
+        return result
+
+    def _apply(self, event):
+        user = event.get("user")
+        action = event["action"]
+        at = datetime.fromisoformat(event["time"]) if event.get("time") else datetime.now()
+        if at.tzinfo is not None:
+            # Entries are stored in local time: convert times with an offset (e.g. 'Z') instead of dropping it
+            at = at.astimezone()
+        at = at.replace(second=0, microsecond=0, tzinfo=None)
+        if action == "start":
+            if user in self.open_shifts:
+                return {"status": "error", "error": "Already clocked in.", "shift": self.open_shifts[user]}
+            # Without a job, the default job is filled in when the batch is written (no storage calls here)
+            self.open_shifts[user] = {"job": event.get("job"), "start": at.isoformat(timespec="minutes")}
+            return {"status": "open", "shift": self.open_shifts[user]}
+        if action != "stop":
+            raise ValueError(f"unknown action {action!r}")
+
+        shift = self.open_shifts.get(user)
+        if shift is None:
+            return {"status": "error", "error": "Not clocked in."}
+        start = datetime.fromisoformat(shift["start"])
+        break_minutes = float(event.get("break_minutes", 0))
+        if at.date() != start.date():
+            error_msg = "Shifts must end on the day they start."
+        else:
+            # The wage is checked when the batch is priced; only the times are validated here
+            error_msg = validate_entry(start.time(), at.time(), break_minutes, 1.0)
+        if error_msg:
+            if at > start:
+                # The shift can't be saved as it is; drop it so that the user can clock in again
+                del self.open_shifts[user]
+            return {"status": "error", "error": error_msg, "shift": shift}
+
+        del self.open_shifts[user]
+        entry = {
+            "ID": new_entry_id(),
+            "Job Name": shift["job"],
+            "Date": start.date().isoformat(),
+            "Start time": start.strftime("%H:%M"),
+            "End time": at.strftime("%H:%M"),
+            "Break minutes": break_minutes,
+            "Hours worked": round(calculate_daily_hours(start.time(), at.time(), break_minutes), 2)
+        }
+        self.pending.append((user, entry))
+        if len(self.pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return {"status": "queued", "entry": entry}
+
+    #BATCHES
+
+    def flush(self, batch):
+        """
+        Price and save a batch of (user, entry) pairs with one save_entries call per user;
+        up to `writers` users are written at the same time (each user has its own storage).
+        Returns (saved entries, pairs that could not be written, rejected (user, entry, error) triples).
+        """
+        users = {}
+        for user, entry in batch:
+            users.setdefault(user, []).append(entry)
+        storages = {user: self.storage(user) for user in users}
+        saved, failed, rejected = [], [], []
+        with ThreadPoolExecutor(min(self.writers, len(users)) or 1) as pool:
+            for user_saved, user_failed, user_rejected in pool.map(
+                lambda user: self._flush_user(user, storages[user], users[user]), users
+            ):
+                saved += user_saved
+                failed += user_failed
+                rejected += user_rejected
+        return saved, failed, rejected
+
+    def _flush_user(self, user, storage, entries):
+        try:
+            if user in self._failed_users:
+                # A failed attempt may still have reached the storage; don't append those entries twice
+                if hasattr(storage, "invalidate"):
+                    storage.invalidate("entries")
+                stored = set(storage.load_entries()["ID"])
+                entries = [entry for entry in entries if entry["ID"] not in stored]
+            priced, rejected = price_batch(storage, entries) if entries else ([], [])
+            saved = storage.save_entries(priced) if priced else []
+            self._failed_users.discard(user)
+            return saved, [], [(user, entry, error) for entry, error in rejected]
+        except Exception as e:
+            self.last_error = str(e)
+            self._failed_users.add(user)
+            return [], [(user, entry) for entry in entries], []
+
+    async def flush_loop(self):
+        """
+        Write waiting entries every `interval` seconds, or earlier once a batch is full.
+        Failed batches are kept and retried with the next flush. Returns after the flush
+        that follows stop().
+        """
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            stopping = self._stopping
+            await self.flush_pending()
+            if stopping:
+                return
+
+    def stop(self):
+        """
+        Let the flush loop write the waiting entries once more and end.
+        """
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush_pending(self):
+        batch, self.pending = self.pending, []
+        if batch:
+            saved, failed, rejected = await asyncio.to_thread(self.flush, batch)
+            self.pending = failed + self.pending
+            if not failed:
+                self.last_error = None
+            if rejected:
+                self.last_error = f"{len(rejected)} entries rejected: {rejected[0][2]}"
+                self.rejected.extend({"user": user, "entry": entry, "error": error} for user, entry, error in rejected)
+            self.stats["saved"] += len(saved)
+            self.stats["rejected"] += len(rejected)
+            self.stats["batches"] += 1
+            self._state_changed = True
+        if self._state_changed:
+            self._write_state()
+
+    def status(self):
+        return {
+            "open_shifts": [{"user": user, **shift} for user, shift in self.open_shifts.items()],
+            "pending": len(self.pending),
+            "last_error": self.last_error,
+            "rejected_entries": list(self.rejected),
+            **self.stats
+        }
+
+    #HTTP
+
+    async def handle_connection(self, reader, writer, token=None):
+        """
+        Serve HTTP/1.1 requests on one connection (keep-alive) until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "Request body too large."}
+                    await self._respond(writer, status, payload, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = self.route(method, path, headers, body, token)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, path, headers, body, token=None):
+        if token and headers.get("authorization") != f"Bearer {token}":
+            return 401, {"error": "Missing or wrong token."}
+        if method == "GET" and path == "/status":
+            return 200, self.status()
+        if method == "POST" and path == "/events":
+            try:
+                events = json.loads(body or b"null")
+            except ValueError:
+                return 400, {"error": "Body must be JSON."}
+            batch = [events] if isinstance(events, dict) else events
+            if not isinstance(batch, list) or not all(isinstance(event, dict) for event in batch):
+                return 400, {"error": "Body must be an event object or a list of events."}
+            for event in batch:
+                error_msg = self.check_user(event.get("user"))
+                if error_msg:
+                    return 400, {"error": error_msg}
+            results = [self.handle_event(event) for event in batch]
+            return 200, results[0] if isinstance(events, dict) else results
+        return 404, {"error": "Not found."}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive=True):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8765, token=None, ready=None):
+        """
+        Run the HTTP server and the flush loop until cancelled; waiting entries are written on the way out.
+        `ready` (an asyncio.Event) is set once the server accepts connections.
+        """
+        server = await asyncio.start_server(
+            lambda reader, writer: self.handle_connection(reader, writer, token), host, port
+        )
+        flusher = asyncio.create_task(self.flush_loop())
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # A batch that is being written must not be cut off; wait for the last flush instead
+            self.stop()
+            await flusher
+
+
+def price_batch(storage, entries):
+    """
+    Add 'Earnings' to new entries of one user in one pass: from the rate table where a rate applies
+    (with the stored entries of their weeks, for overtime), else with the default wage.
+    Entries without a job get the default job. Entries without a rate are checked with the
+    default wage like the app checks new entries (the events only validated the times).
+    Returns (priced entries, [(entry, error message)] for the rejected ones).
+    """
+    settings = storage.load_settings()
+    default_job = settings.get("default_job_name", "")
+    entries = [{**entry, "Job Name": default_job} if entry["Job Name"] is None else entry for entry in entries]
+    rates = RateTable(normalize_rates(storage.load_rates()))
+    hours = np.array([entry["Hours worked"] for entry in entries], dtype=float)
+    default_wage = safe_float(settings.get("default_hourly_wage", 0.0))
+    earnings = calculate_earnings_batch(hours, default_wage)
+    rated = np.zeros(len(entries), dtype=bool)
+    if len(rates):
+        dates = pd.to_datetime([entry["Date"] for entry in entries])
+        first = dates.min() - timedelta(days=dates.min().weekday())
+        last = dates.max() + timedelta(days=6 - dates.max().weekday())
+        context = storage.entries_between(first.date(), last.date())
+        priced = price_new_entries(entries, rates, context, settings, storage.load_weekly_hours_history())
+        rated = ~np.isnan(priced)
+        earnings = np.where(rated, priced, earnings)
+    errors = validate_entries_batch(
+        time_to_minutes([entry["Start time"] for entry in entries]),
+        time_to_minutes([entry["End time"] for entry in entries]),
+        [entry["Break minutes"] for entry in entries],
+        default_wage
+    )
+    errors = np.where(rated, "", errors)
+    priced = [
+        {**entry, "Earnings": float(amount)}
+        for entry, amount, error in zip(entries, earnings, errors) if not error
+    ]
+    return priced, [(entry, str(error)) for entry, error in zip(entries, errors) if error]
+
+
+#COMMAND LINE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accept clock-in/clock-out events over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-size", type=int, default=500, help="flush as soon as this many entries wait")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between flushes")
+    parser.add_argument("--writers", type=int, default=4, help="users written at the same time per flush")
+    parser.add_argument("--state", default=STATE_PATH, help="file keeping open shifts across restarts")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="path to the Streamlit secrets file")
+    args = parser.parse_args(argv)
+
+    # Rollups must follow the saved entries
+    from timetrackerrollups import RollupStorage
+
+    config = load_secrets(args.secrets)
+    # One authorized Sheets client for all users, instead of one per user storage
+    client = open_gsheet_client(config) if config.get("storage_backend", "gsheets") == "gsheets" else None
+    service = ClockService(
+        lambda user: RollupStorage(CachedStorage(open_storage(config, user, client))),
+        args.batch_size, args.interval, args.state, args.writers,
+        users=set(config["users"]) if config.get("users") else None
+    )
+    print(f"Listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, config.get("ingest_token")))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
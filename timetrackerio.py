@@ -0,0 +1,168 @@
+"""
+Bulk import and export of time entries as CSV or Parquet.
+
+Imports are parsed in chunks, validated with the same rules as validate_entry,
+priced in batch and written to storage with a single batched append.
+
+    python -m timetrackerio import timesheets.csv --wage 15
+    python -m timetrackerio export backup.parquet
+"""
+import argparse
+import io
+import sys
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import (
+    ENTRY_COLUMNS,
+    time_to_minutes,
+    minutes_to_time,
+    validate_entries_batch,
+    calculate_daily_hours_batch,
+    calculate_earnings_batch
+)
+from timetrackerstorage import open_storage, load_secrets
+from timetrackeraggregation import expand_entries
+
+FORMATS = ("csv", "parquet")
+IMPORT_CHUNK_ROWS = 10_000
+
+
+#READING
+
+def detect_format(name):
+    """
+    Guess 'csv' or 'parquet' from a file name.
+    """
+    return "parquet" if str(name).lower().endswith((".parquet", ".pq")) else "csv"
+
+def read_entry_chunks(source, fmt="csv", chunksize=IMPORT_CHUNK_ROWS):
+    """
+    Yield DataFrames of at most `chunksize` rows from a CSV or Parquet file (path or file object),
+    so large files are never parsed into memory in one piece.
+    """
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize, dtype={"Start time": str, "End time": str})
+
+#PREPARATION
+
+def prepare_entries(chunk, hourly_wage, job_name="", row_offset=0):
+    """
+    Turn a chunk of imported rows into storable entries.
+    Needs 'Date', 'Start time' and 'End time'; 'Job Name', 'Break minutes', 'Hourly wage',
+    'Earnings' and 'ID' are optional. Hours are always recomputed; earnings are kept when the
+    file has them and otherwise priced with 'Hourly wage' or the given default wage.
+    `row_offset` is the number of data rows in the file before this chunk.
+    Returns (entries DataFrame with ENTRY_COLUMNS minus 'Modified', errors DataFrame with the
+    1-based data 'Row' in the file and 'Error').
+    """
+    n = len(chunk)
+    column = lambda name, default: chunk[name] if name in chunk.columns else pd.Series([default] * n, index=chunk.index)
+
+    dates = pd.to_datetime(column("Date", None), errors="coerce")
+    start = time_to_minutes(column("Start time", None))
+    end = time_to_minutes(column("End time", None))
+    breaks = pd.to_numeric(column("Break minutes", 0), errors="coerce").fillna(0).to_numpy()
+    wages = pd.to_numeric(column("Hourly wage", hourly_wage), errors="coerce").to_numpy()
+
+    errors = validate_entries_batch(start, end, breaks, wages)
+    errors = np.where(dates.isna().to_numpy() & (errors == ""), "Invalid date.", errors)
+
+    hours = np.round(calculate_daily_hours_batch(start, end, breaks), 2)
+    earnings = pd.to_numeric(column("Earnings", np.nan), errors="coerce").to_numpy()
+    earnings = np.where(np.isnan(earnings), calculate_earnings_batch(hours, wages), earnings)
+
+    entries = pd.DataFrame({
+        "Job Name": column("Job Name", job_name).fillna(job_name).astype(str),
+        "Date": dates.dt.strftime("%Y-%m-%d"),
+        "Start time": minutes_to_time(start),
+        "End time": minutes_to_time(end),
+        "Break minutes": breaks,
+        "Hours worked": hours,
+        "Earnings": np.round(earnings, 2),
+        "ID": column("ID", "").fillna("").astype(str)
+    }, index=chunk.index)
+    valid = errors == ""
+    # Row numbers from the position: Parquet batches restart their index at 0
+    error_rows = pd.DataFrame({"Row": row_offset + np.flatnonzero(~valid) + 1, "Error": errors[~valid]})
+    return entries[valid].reset_index(drop=True), error_rows
+
+#IMPORT / EXPORT
+
+def import_entries(storage, source, fmt="csv", hourly_wage=0.0, job_name="", chunksize=IMPORT_CHUNK_ROWS):
+    """
+    Import entries from a CSV or Parquet file into storage.
+    Rows whose ID already exists in storage are skipped, so re-importing an export is harmless.
+    All valid rows are written with one storage.save_entries call.
+    Returns (number of imported entries, DataFrame of rejected rows with 'Row' and 'Error').
+    """
+    existing_ids = set(storage.load_entries()["ID"])
+    parts, errors = [], []
+    rows = 0
+    for chunk in read_entry_chunks(source, fmt, chunksize):
+        entries, chunk_errors = prepare_entries(chunk, hourly_wage, job_name, rows)
+        rows += len(chunk)
+        parts.append(entries[~entries["ID"].isin(existing_ids)])
+        errors.append(chunk_errors)
+    entries = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=ENTRY_COLUMNS)
+    entries = entries[(entries["ID"] == "") | ~entries["ID"].duplicated()]
+    storage.save_entries(entries.to_dict("records"))
+    errors = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=["Row", "Error"])
+    return len(entries), errors
+
+def export_entries(storage, fmt="csv"):
+    """
+    Export all entries as CSV or Parquet and return the file content as bytes.
+    The entries are written in the stored format, so that an export can be imported again.
+    """
+    entries = expand_entries(storage.load_entries()[ENTRY_COLUMNS])
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        entries.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    return entries.to_csv(index=False).encode("utf-8")
+
+
+#COMMAND LINE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export time entries as CSV or Parquet.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--wage", type=float, help="hourly wage for rows without one (default: from settings)")
+    parser.add_argument("--job", help="job name for rows without one (default: from settings)")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="path to the Streamlit secrets file")
+    parser.add_argument("--user", help="user whose data to use in multi-user mode")
+    args = parser.parse_args(argv)
+
+    # Rollups must follow the imported entries
+    from timetrackerrollups import RollupStorage
+
+    storage = RollupStorage(open_storage(load_secrets(args.secrets), args.user))
+    fmt = args.format or detect_format(args.path)
+    if args.command == "export":
+        with open(args.path, "wb") as f:
+            f.write(export_entries(storage, fmt))
+        print(f"Exported entries to {args.path}.")
+        return 0
+
+    settings = storage.load_settings()
+    wage = args.wage if args.wage is not None else settings.get("default_hourly_wage", 0.0)
+    job = args.job if args.job is not None else settings.get("default_job_name", "")
+    imported, errors = import_entries(storage, args.path, fmt, wage, job)
+    print(f"Imported {imported} entries.")
+    if not errors.empty:
+        print(errors.to_string(index=False))
+        print(f"{len(errors)} rows were rejected.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Instrumentation: call counts, latency and payload size per rerun.
+
+Worksheets are wrapped in InstrumentedWorksheet and the functions of
+timetrackerfunctions are wrapped by instrument_functions; both report to a
+Metrics recorder. Each Streamlit rerun collects its own calls (start_run), so
+the app can show them in a debug panel, log one JSON line per rerun and add
+them up per session for quota budgeting. Calls outside a rerun (e.g. the
+write-behind thread of a user) are collected per thread name (Metrics.background),
+so the debug panel can show the background writes next to the session's own calls.
+"""
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger("timetracker.metrics")
+
+
+def payload_bytes(value):
+    """
+    Rough size of a worksheet payload: the characters of all cell values.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + payload_bytes(item) for key, item in value.items())
+    return len(str(value))
+
+def _add(calls, name, ms, nbytes, error):
+    stats = calls.setdefault(name, {"calls": 0, "errors": 0, "ms": 0.0, "max_ms": 0.0, "bytes": 0})
+    stats["calls"] += 1
+    stats["errors"] += int(error)
+    stats["ms"] += ms
+    stats["max_ms"] = max(stats["max_ms"], ms)
+    stats["bytes"] += nbytes
+
+
+class Metrics:
+    """
+    Thread-safe recorder of timed calls. Keeps process-wide totals and, per thread,
+    the calls of the rerun that is currently running (see start_run). Calls made
+    outside a run are added up per thread name in `background`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.background = {}    # thread name -> calls made outside a run
+        self._local = threading.local()
+
+    def record(self, name, ms, nbytes=0, error=False):
+        run = getattr(self._local, "run", None)
+        with self.lock:
+            _add(self.totals, name, ms, nbytes, error)
+            if run is None:
+                _add(self.background.setdefault(threading.current_thread().name, {}), name, ms, nbytes, error)
+        if run is not None:
+            _add(run["calls"], name, ms, nbytes, error)
+            run["last"] = time.perf_counter()
+
+    def background_sheet_calls(self, thread_name):
+        """
+        Number of Sheets API calls the named thread made outside a run so far.
+        """
+        with self.lock:
+            calls = self.background.get(thread_name, {})
+            return sum(stats["calls"] for name, stats in calls.items() if name.startswith("sheet."))
+
+    def start_run(self, label=""):
+        """
+        Start collecting the calls made by this thread and return the new run.
+        A run is a dict; pass it to summarize_run at any time. Runs cut short
+        (e.g. by st.rerun()) count up to their last recorded call.
+        """
+        run = {
+            "label": label,
+            "started": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "start": time.perf_counter(),
+            "calls": {}
+        }
+        self._local.run = run
+        return run
+
+    def finish_run(self, run):
+        """
+        Mark the end of a run.
+        """
+        run["end"] = time.perf_counter()
+
+    def timed(self, name, func, measure_bytes=False):
+        """
+        Wrap func so that every call is recorded under `name`, including calls that raise
+        (counted in 'errors' as well). With measure_bytes, the size of the arguments plus
+        the result is recorded too.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, error = None, True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                nbytes = payload_bytes([list(args), kwargs, result]) if measure_bytes else 0
+                self.record(name, ms, nbytes, error)
+
+        wrapper._instrumented = True
+        return wrapper
+
+
+def summarize_run(run):
+    """
+    Turn a run into a JSON-ready dict: label, start time, elapsed ms and one row per call name
+    (sorted by total time), plus the Sheets API call, error and byte counts.
+    """
+    calls = [{"name": name, **stats} for name, stats in run["calls"].items()]
+    calls.sort(key=lambda row: row["ms"], reverse=True)
+    sheet_calls = [row for row in calls if row["name"].startswith("sheet.")]
+    return {
+        "label": run["label"],
+        "started": run["started"],
+        "ms": round((run.get("end", run.get("last", time.perf_counter())) - run["start"]) * 1000, 2),
+        "sheet_calls": sum(row["calls"] for row in sheet_calls),
+        "sheet_errors": sum(row["errors"] for row in sheet_calls),
+        "sheet_bytes": sum(row["bytes"] for row in sheet_calls),
+        "calls": [{**row, "ms": round(row["ms"], 3), "max_ms": round(row["max_ms"], 3)} for row in calls]
+    }
+
+def log_run(run):
+    """
+    Log a finished run as one JSON line on the 'timetracker.metrics' logger.
+    """
+    logger.info(json.dumps(summarize_run(run)))
+
+
+#WORKSHEETS
+
+class InstrumentedWorksheet:
+    """
+    Wrap a gspread worksheet (or MemoryWorksheet) and record every method call as
+    'sheet.<title>.<method>' with its latency and payload size. Other attributes pass through.
+    """
+
+    def __init__(self, sheet, metrics):
+        self.sheet = sheet
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        if name == "sheet":
+            raise AttributeError(name)
+        attr = getattr(self.sheet, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        title = getattr(self.sheet, "title", "sheet")
+        return self.metrics.timed(f"sheet.{title}.{name}", attr, measure_bytes=True)
+
+def instrument_sheets(storage, metrics):
+    """
+    Wrap the worksheets of a SheetStorage in place; other storages are left unchanged.
+    """
+    for attr in ("entries_sheet", "settings_sheet", "weekly_sheet", "rollups_sheet", "rates_sheet"):
+        sheet = getattr(storage, attr, None)
+        if sheet is not None and not isinstance(sheet, InstrumentedWorksheet):
+            setattr(storage, attr, InstrumentedWorksheet(sheet, metrics))
+    return storage
+
+
+#FUNCTIONS
+
+def instrument_functions(metrics, module_name="timetrackerfunctions", namespaces=()):
+    """
+    Wrap every function defined in the module so its calls are recorded as 'fn.<name>'.
+    Modules that imported the functions by name ('timetracker*' modules and the given
+    namespaces, e.g. the app script's globals()) are updated too. Safe to call repeatedly.
+    """
+    module = sys.modules[module_name]
+    wrapped = {}
+    for name, func in inspect.getmembers(module, inspect.isfunction):
+        if getattr(func, "_instrumented", False):
+            wrapped[func.__wrapped__] = func
+        elif func.__module__ == module_name:
+            wrapped[func] = metrics.timed(f"fn.{name}", func)
+    targets = [vars(m) for name, m in list(sys.modules.items()) if name.startswith("timetracker")]
+    for namespace in targets + list(namespaces):
+        for name, value in list(namespace.items()):
+            if inspect.isfunction(value) and value in wrapped:
+                namespace[name] = wrapped[value]
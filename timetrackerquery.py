@@ -0,0 +1,178 @@
+"""
+Date-range and per-job queries over the entries.
+
+EntryIndex sorts the entries by date once and answers range queries with a
+binary search on the sorted dates (and on a per-job date array when a job is
+given), so the this-week view, paging and per-job totals only touch the rows
+inside the range instead of scanning the whole history.
+"""
+import numpy as np
+import pandas as pd
+
+from timetrackeraggregation import compact_entries, is_compact
+
+
+def _day(value):
+    # Day as int64 nanoseconds, comparable with EntryIndex.days
+    return pd.Timestamp(value).normalize().value
+
+
+class EntryIndex:
+    """
+    Entries in the compact typed schema (see compact_entries), sorted by date, start time and
+    end time (ascending), plus the sorted date keys. Entries without a valid date sort first and only
+    match queries without a start date.
+    Build it once per loaded entries frame; it does not follow later changes.
+    An already compact frame is referenced, not copied (it must not be modified afterwards);
+    the index only keeps the sort order and the arrays it searches.
+    """
+
+    def __init__(self, entries_df):
+        entries = entries_df if is_compact(entries_df) else compact_entries(entries_df)
+        self._frame = entries.reset_index(drop=True)
+        days = entries["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+        starts = entries["Start time"].fillna(-1).to_numpy(dtype=np.int16)
+        # The end time as last key puts entries with identical times next to each other
+        ends = entries["End time"].to_numpy(dtype=float, na_value=np.nan)
+        self._order = np.lexsort((ends, starts, days))
+        self.days = days[self._order]
+        self.hours = entries["Hours worked"].to_numpy(dtype=float, na_value=np.nan)[self._order]
+        self.earnings = entries["Earnings"].to_numpy(dtype=float, na_value=np.nan)[self._order]
+        jobs = pd.Series(entries["Job Name"].to_numpy()[self._order])
+        self._jobs = {job: positions for job, positions in jobs.groupby(jobs, sort=False).indices.items()}
+        self._job_days = {job: self.days[positions] for job, positions in self._jobs.items()}
+        # Missing start times are -1 so that the starts stay sorted within each day
+        self.starts = entries["Start time"].to_numpy(dtype=float, na_value=-1)[self._order]
+        self.ends = ends[self._order]
+
+    def __len__(self):
+        return len(self._order)
+
+    def rows(self, positions):
+        """
+        The entries at the given sorted positions, as a new frame.
+        """
+        return self._frame.iloc[self._order[positions]].reset_index(drop=True)
+
+    def jobs(self):
+        """
+        Sorted list of all job names.
+        """
+        return sorted(str(job) for job in self._jobs)
+
+    def _positions(self, start=None, end=None, job=None):
+        # Row positions between start and end (inclusive), ascending
+        if job is None:
+            days, positions = self.days, None
+        elif job in self._jobs:
+            days, positions = self._job_days[job], self._jobs[job]
+        else:
+            return np.empty(0, dtype=np.intp)
+        lo = 0 if start is None else np.searchsorted(days, _day(start), side="left")
+        hi = len(days) if end is None else np.searchsorted(days, _day(end), side="right")
+        return np.arange(lo, hi) if positions is None else positions[lo:hi]
+
+    def entries_between(self, start=None, end=None, job=None):
+        """
+        Return the entries between start and end (dates, inclusive) and of the given job, oldest first.
+        Filters that are None are not applied.
+        """
+        return self.rows(self._positions(start, end, job))
+
+    def count(self, start=None, end=None, job=None):
+        """
+        Number of entries entries_between would return.
+        """
+        return len(self._positions(start, end, job))
+
+    def page(self, start=None, end=None, job=None, offset=0, limit=50):
+        """
+        Return one page of the matching entries, newest first (like filter_entries).
+        """
+        return self.rows(self._positions(start, end, job)[::-1][offset:offset + limit])
+
+    def conflicts(self, day, start_minutes, end_minutes):
+        """
+        Return the entries on `day` whose time overlaps start_minutes..end_minutes
+        (minutes since midnight), regardless of the job. Touching shifts (one ends when the
+        other starts) do not overlap. Binary search finds the day; only its entries are checked.
+        """
+        lo = np.searchsorted(self.days, _day(day), side="left")
+        hi = np.searchsorted(self.days, _day(day), side="right")
+        # Entries of a day are sorted by start, so later ones start too late to overlap
+        hi = lo + np.searchsorted(self.starts[lo:hi], end_minutes, side="left")
+        overlapping = lo + np.flatnonzero((self.ends[lo:hi] > start_minutes) & (self.starts[lo:hi] >= 0))
+        return self.rows(overlapping)
+
+    def totals_by_job(self, period=None, start=None, end=None):
+        """
+        Sum hours and earnings per job for the entries between start and end.
+        period=None gives one row per job; 'week' adds ISO 'Year' and 'Week' columns and
+        'month' a 'Month' column. Returns columns Job Name, [period keys], total_hours, total_earnings.
+        """
+        positions = self._positions(start, end)
+        totals = pd.DataFrame({
+            "Job Name": self._frame["Job Name"].iloc[self._order[positions]].to_numpy(dtype=object),
+            "total_hours": self.hours[positions],
+            "total_earnings": self.earnings[positions]
+        })
+        keys = ["Job Name"]
+        dates = pd.Series(self.days[positions].astype("datetime64[ns]"))
+        if period == "week":
+            iso = dates.dt.isocalendar()
+            totals["Year"], totals["Week"] = iso["year"], iso["week"]
+            keys += ["Year", "Week"]
+        elif period == "month":
+            # 'YYYY-MM' via datetime64[M] as in normalize_entries; much faster than strftime
+            months = self.days[positions].view("datetime64[ns]").astype("datetime64[M]")
+            totals["Month"] = np.where(np.isnat(months), None, np.datetime_as_string(months, unit="M"))
+            keys += ["Month"]
+        return totals.groupby(keys).sum().round(2).reset_index()
+
+
+def weeks_over_target(weekly_summary, start=None, end=None):
+    """
+    Return the weeks of a weekly summary (ascending, with 'Overtime', see calculate_overtime)
+    between the ISO weeks of start and end (inclusive) whose hours exceeded the target.
+    """
+    keys = weekly_summary["Year"].to_numpy(dtype=int) * 100 + weekly_summary["Week"].to_numpy(dtype=int)
+    lo, hi = 0, len(keys)
+    if start is not None:
+        year, week, _ = pd.Timestamp(start).isocalendar()
+        lo = np.searchsorted(keys, year * 100 + week, side="left")
+    if end is not None:
+        year, week, _ = pd.Timestamp(end).isocalendar()
+        hi = np.searchsorted(keys, year * 100 + week, side="right")
+    weeks = weekly_summary.iloc[lo:hi]
+    return weeks[weeks["Overtime"] > 0].reset_index(drop=True)
+
+
+def find_conflicts(entries_df):
+    """
+    Scan all entries for duplicates and overlapping shifts on the same day.
+    Returns one row per entry that overlaps an earlier-starting entry of its day, in the
+    compact schema plus 'Conflict' ('duplicate' for identical times, otherwise 'overlap')
+    and 'Conflicts with' (the ID of that earlier entry).
+    """
+    index = EntryIndex(entries_df)
+    n = len(index)
+    positions = np.arange(n)
+    day = pd.Series(index.days)
+    valid = (index.starts >= 0) & ~np.isnan(index.ends)
+    # Running maximum of (end, position) over the earlier entries of the same day,
+    # encoded in one number so that the entry with the latest end comes along with it
+    key = pd.Series(np.where(valid, index.ends * (n + 1) + positions, -1))
+    latest = key.groupby(day).cummax().groupby(day).shift().fillna(-1).to_numpy()
+    latest_end = np.floor(latest / (n + 1))
+    overlap = valid & (latest >= 0) & (index.starts < latest_end)
+    partners = np.where(latest >= 0, latest % (n + 1), 0).astype(np.intp)
+    # Identical times sort next to each other; prefer the twin as the partner
+    previous = np.maximum(positions - 1, 0)
+    duplicate = overlap & (positions > 0) & (index.days == index.days[previous]) \
+        & (index.starts == index.starts[previous]) & (index.ends == index.ends[previous])
+    partners = np.where(duplicate, previous, partners)
+    flagged = np.flatnonzero(overlap)
+    conflicts = index.rows(flagged)
+    conflicts["Conflict"] = np.where(duplicate[flagged], "duplicate", "overlap")
+    conflicts["Conflicts with"] = index.rows(partners[flagged])["ID"].to_numpy()
+    return conflicts
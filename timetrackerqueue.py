@@ -0,0 +1,326 @@
+"""
+Write-behind queue for entry saves and deletes.
+
+WriteBehindStorage accepts saves and deletes immediately: they are recorded in a
+local journal file (fsynced) and applied to the reads right away, while a
+background thread writes them to the wrapped storage. Pending changes are
+coalesced, so a burst of saves becomes one append request, a burst of deletes
+one delete request, and an entry deleted before it was written never reaches
+the storage at all (one that was being written is deleted right after). Failed writes (quota errors, network problems) are retried
+with exponential backoff; pending changes survive a restart via the journal.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import pandas as pd
+
+from timetrackerfunctions import ROLLUP_COLUMNS, stamp_entry
+from timetrackerstorage import Storage
+from timetrackeraggregation import expand_entries
+
+JOURNAL_PATH = "timetracker_journal.json"
+
+
+class WriteBehindStorage(Storage):
+    """
+    Wrap another storage and write entries and rollups to it in the background.
+    Settings, the weekly history and the rates are rare, small writes and go through directly.
+    `delay` is how long the writer waits to collect more changes before a flush;
+    retries wait `backoff` seconds, doubling up to `max_backoff`.
+    `name` names the writer thread (e.g. per user, for the metrics of its background writes).
+    """
+
+    def __init__(self, storage, journal_path=JOURNAL_PATH, delay=0.5, backoff=1.0, max_backoff=60.0,
+                 name="write-behind"):
+        self.storage = storage
+        self.journal_path = journal_path
+        self.delay = delay
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.condition = threading.Condition()
+        self.attempts = 0
+        self.last_error = None
+        self._saves = {}        # ID -> entry waiting to be appended
+        self._deletes = {}      # ID -> stored entry waiting to be deleted
+        self._rollups = None    # latest rollup records waiting to be written
+        self._writing = set()   # IDs of the saves that are being written right now
+        self._replayed = False  # saves came from the journal and may have been written before a crash
+        self._closed = False
+        self._read_journal()
+        self.name = name
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        # Pass through extras of the wrapped storage such as CachedStorage.invalidate
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    #JOURNAL
+
+    def _read_journal(self):
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            journal = json.load(f)
+        self._saves = {entry["ID"]: entry for entry in journal.get("saves", [])}
+        self._deletes = {entry["ID"]: entry for entry in journal.get("deletes", [])}
+        self._rollups = journal.get("rollups")
+        self._replayed = bool(self._saves)
+
+    def _write_journal(self):
+        # Called with the condition held. Write-then-rename keeps the old journal if we crash midway.
+        if not self.journal_path:
+            return
+        journal = {
+            "saves": list(self._saves.values()),
+            "deletes": list(self._deletes.values()),
+            "rollups": self._rollups
+        }
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(journal, f, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    #QUEUE
+
+    def pending_count(self):
+        """
+        Number of entry saves and deletes not yet written to the wrapped storage.
+        """
+        with self.condition:
+            return len(self._saves) + len(self._deletes)
+
+    def _has_pending(self):
+        return bool(self._saves or self._deletes or self._rollups is not None)
+
+    def flush(self, timeout=None):
+        """
+        Wait until all pending changes are written. Returns False if `timeout` seconds passed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.condition.notify_all()
+            while self._has_pending():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """
+        Stop the writer after trying to flush for up to `timeout` seconds.
+        Whatever is still pending stays in the journal for the next start.
+        """
+        self.flush(timeout)
+        with self.condition:
+            self._closed = True
+            self.condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._has_pending() and not self._closed:
+                    self.condition.wait()
+                if self._closed:
+                    return
+            # Let more changes arrive so they are written in the same request
+            time.sleep(self.delay)
+            try:
+                self._write_pending()
+                self.attempts = 0
+                self.last_error = None
+            except Exception as e:
+                self.attempts += 1
+                self.last_error = e
+                wait = min(self.max_backoff, self.backoff * 2 ** (self.attempts - 1))
+                with self.condition:
+                    self.condition.wait(wait * random.uniform(0.5, 1.0))
+
+    def _write_pending(self):
+        with self.condition:
+            deletes = list(self._deletes)
+            saves = list(self._saves.values())
+            rollups = self._rollups
+            self._writing = {entry["ID"] for entry in saves}
+        if deletes:
+            self.storage.delete_entries(deletes)
+            self._done(deletes=deletes)
+        if saves:
+            try:
+                if self.attempts or self._replayed:
+                    # A failed attempt, or the run that wrote the journal, may still have reached
+                    # the storage; don't append those entries twice
+                    if hasattr(self.storage, "invalidate"):
+                        self.storage.invalidate("entries")
+                    stored = set(self.storage.load_entries()["ID"])
+                    self.storage.save_entries([entry for entry in saves if entry["ID"] not in stored])
+                else:
+                    self.storage.save_entries(saves)
+                self._replayed = False
+            finally:
+                with self.condition:
+                    self._writing = set()
+                    self.condition.notify_all()
+            self._done(saves=saves)
+        if rollups is not None:
+            self.storage.save_rollups(pd.DataFrame(rollups, columns=ROLLUP_COLUMNS))
+            self._done(rollups=rollups)
+        with self.condition:
+            if not self._has_pending():
+                self.condition.notify_all()
+
+    def _done(self, saves=(), deletes=(), rollups=None):
+        # Drop written changes, unless they were replaced while the request was running
+        with self.condition:
+            for entry in saves:
+                if self._saves.get(entry["ID"]) is entry:
+                    del self._saves[entry["ID"]]
+            for entry_id in deletes:
+                self._deletes.pop(entry_id, None)
+            if rollups is not None and self._rollups is rollups:
+                self._rollups = None
+            self._write_journal()
+            self.condition.notify_all()
+
+    def _apply_pending(self, entries_df):
+        with self.condition:
+            hidden = list(self._saves) + list(self._deletes)
+            added = list(self._saves.values())
+        if not hidden:
+            return entries_df
+        entries_df = entries_df[~entries_df["ID"].isin(hidden)]
+        if added:
+            entries_df = pd.concat([entries_df, pd.DataFrame(added, columns=entries_df.columns)], ignore_index=True)
+        return entries_df.reset_index(drop=True)
+
+    #STORAGE API
+
+    def load_entries(self):
+        return self._apply_pending(self.storage.load_entries())
+
+    def sync_entries(self, local_df):
+        return self._apply_pending(self.storage.sync_entries(local_df))
+
+    def count_entries(self, start=None, end=None, job=None):
+        if not self.pending_count():
+            return self.storage.count_entries(start, end, job)
+        return super().count_entries(start, end, job)
+
+    def load_entries_page(self, start=None, end=None, job=None, offset=0, limit=50):
+        if not self.pending_count():
+            return self.storage.load_entries_page(start, end, job, offset, limit)
+        return super().load_entries_page(start, end, job, offset, limit)
+
+    def entry_index(self):
+        if not self.pending_count():
+            return self.storage.entry_index()
+        return super().entry_index()
+
+    def entries_between(self, start=None, end=None, job=None):
+        if not self.pending_count():
+            return self.storage.entries_between(start, end, job)
+        return super().entries_between(start, end, job)
+
+    def save_entry(self, entry):
+        return self.save_entries([entry])[0]
+
+    def save_entries(self, entries):
+        entries = [stamp_entry(entry) for entry in entries]
+        with self.condition:
+            for entry in entries:
+                self._saves[entry["ID"]] = entry
+            self._write_journal()
+            self.condition.notify_all()
+        return entries
+
+    def delete_entry(self, entry_id):
+        deleted = self.delete_entries([entry_id])
+        return deleted[0] if deleted else None
+
+    def delete_entries(self, entry_ids):
+        entry_ids = set(entry_ids)
+        with self.condition:
+            # Entries that were never written are simply dropped from the queue. Saves that are being
+            # written right now may still reach the storage, so they are deleted there as well.
+            deleted = [self._saves.pop(entry_id) for entry_id in list(entry_ids) if entry_id in self._saves]
+            for entry in deleted:
+                if entry["ID"] in self._writing:
+                    self._deletes[entry["ID"]] = entry
+            entry_ids -= {entry["ID"] for entry in deleted}
+            entry_ids -= set(self._deletes)
+        if entry_ids:
+            stored = self.storage.load_entries()
+            # The wrapped storage may hand out compact entries; the journal needs plain values
+            stored = expand_entries(stored[stored["ID"].isin(entry_ids)]).to_dict("records")
+            deleted += stored
+        with self.condition:
+            for entry in deleted:
+                if entry["ID"] in entry_ids:
+                    self._deletes[entry["ID"]] = entry
+            self._write_journal()
+            self.condition.notify_all()
+        return deleted
+
+    def update_entries(self, updates):
+        # Entries still waiting in the queue are changed there; all others are updated in the
+        # storage right away (updates are rare bulk changes like re-pricing)
+        updates = {update["ID"]: update for update in updates}
+        before, after = [], []
+        with self.condition:
+            # A save that is being written can't be changed any more: wait for it, then update the stored row
+            while self._writing & set(updates):
+                self.condition.wait()
+            for entry_id in list(updates):
+                if entry_id in self._saves:
+                    before.append(self._saves[entry_id])
+                    after.append(stamp_entry({**self._saves[entry_id], **updates.pop(entry_id)}))
+                    self._saves[entry_id] = after[-1]
+                elif entry_id in self._deletes:
+                    del updates[entry_id]
+            if after:
+                self._write_journal()
+        if updates:
+            stored_before, stored_after = self.storage.update_entries(list(updates.values()))
+            before += stored_before
+            after += stored_after
+        return before, after
+
+    def load_settings(self):
+        return self.storage.load_settings()
+
+    def save_settings(self, settings):
+        self.storage.save_settings(settings)
+
+    def load_weekly_hours_history(self):
+        return self.storage.load_weekly_hours_history()
+
+    def save_weekly_hours_history(self, whist):
+        self.storage.save_weekly_hours_history(whist)
+
+    def load_rates(self):
+        return self.storage.load_rates()
+
+    def save_rates(self, rates):
+        self.storage.save_rates(rates)
+
+    def load_rollups(self):
+        with self.condition:
+            rollups = self._rollups
+        if rollups is not None:
+            return pd.DataFrame(rollups, columns=ROLLUP_COLUMNS)
+        return self.storage.load_rollups()
+
+    def save_rollups(self, rollups):
+        with self.condition:
+            self._rollups = rollups[ROLLUP_COLUMNS].to_dict("records")
+            self._write_journal()
+            self.condition.notify_all()
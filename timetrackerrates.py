@@ -0,0 +1,244 @@
+"""
+Effective-dated wage rates and the earnings engine.
+
+The rate table (RATE_COLUMNS) has one row per job and start date: the hourly wage and
+the weekend, night and overtime surcharges valid from that date until the next row of
+the same job. Rows with an empty job name apply to all jobs without rates of their own.
+RateTable sorts the table once into a date-to-rate lookup, so a whole history is priced
+with one binary search per entry and a few array operations. After a retroactive rate
+change, reprice_entries updates the earnings of the affected entries in place, in bulk.
+
+Re-price stored entries from the command line:
+    python -m timetrackerrates reprice
+    python -m timetrackerrates reprice --since 2026-01-01 --user alice
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import RATE_COLUMNS
+from timetrackeraggregation import compact_entries
+from timetrackerstorage import open_storage, load_secrets
+from timetrackertargets import TargetCalendar, week_ordinal_of_dates
+
+# Night hours for the night surcharge: 22:00 to 06:00 (minutes since midnight)
+NIGHT_START = 22 * 60
+NIGHT_END = 6 * 60
+
+SURCHARGE_COLUMNS = ["Weekend surcharge", "Night surcharge", "Overtime surcharge"]
+
+# Lookup keys are job code * DAY_SPAN + day number (+ DAY_OFFSET, so days before 1970 stay positive)
+DAY_OFFSET = 1 << 20
+DAY_SPAN = 1 << 22
+
+
+#RATE TABLE
+
+def normalize_rates(rates):
+    """
+    Return a clean copy of a rate table (e.g. as edited in the app): rows without a valid date
+    or a positive wage are dropped, missing surcharges become 0, 'Valid from' is an ISO date string
+    and the rows are sorted by job and date. Of several rows for the same job and date the last one wins.
+    """
+    df = pd.DataFrame(rates, columns=RATE_COLUMNS)
+    df["Job Name"] = df["Job Name"].fillna("").astype(str).str.strip()
+    valid_from = pd.to_datetime(df["Valid from"], errors="coerce")
+    df["Hourly wage"] = pd.to_numeric(df["Hourly wage"], errors="coerce").astype(float)
+    for column in SURCHARGE_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype(float).fillna(0.0)
+    df = df[valid_from.notna() & (df["Hourly wage"] > 0)]
+    df["Valid from"] = valid_from[df.index].dt.strftime("%Y-%m-%d")
+    df = df.drop_duplicates(subset=["Job Name", "Valid from"], keep="last")
+    return df.sort_values(["Job Name", "Valid from"]).reset_index(drop=True)
+
+def rates_changed_since(old_rates, new_rates):
+    """
+    Earliest 'Valid from' date of the rows that differ between two rate tables,
+    i.e. the first day whose earnings may change. None if the tables are equal.
+    """
+    old = normalize_rates(old_rates)
+    new = normalize_rates(new_rates)
+    merged = old.merge(new, how="outer", indicator=True)
+    changed = merged.loc[merged["_merge"] != "both", "Valid from"]
+    if changed.empty:
+        return None
+    return date.fromisoformat(changed.min())
+
+
+class RateTable:
+    """
+    The rate table sorted into a binary-searchable date-to-rate lookup.
+    lookup() finds, for every (job, date), the last rate of that job valid on that date,
+    falling back to the rates without a job name.
+    """
+
+    def __init__(self, rates):
+        rates = normalize_rates(rates)
+        self.jobs = {job: code for code, job in enumerate(sorted(rates["Job Name"].unique()))}
+        codes = rates["Job Name"].map(self.jobs).to_numpy(dtype=np.int64)
+        days = pd.to_datetime(rates["Valid from"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        keys = codes * DAY_SPAN + days + DAY_OFFSET
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.codes = codes[order]
+        # One row per rate plus a final all-NaN row for entries without a rate
+        values = rates[["Hourly wage"] + SURCHARGE_COLUMNS].to_numpy(dtype=float)[order]
+        self.values = np.vstack([values, np.full((1, values.shape[1]), np.nan)])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _find(self, codes, days):
+        # Position of the last rate with the same job code at or before each day (-1 if none)
+        if not len(self.keys):
+            return np.full(len(codes), -1)
+        pos = np.searchsorted(self.keys, codes * DAY_SPAN + days + DAY_OFFSET, side="right") - 1
+        safe = np.clip(pos, 0, None)
+        found = (pos >= 0) & (codes >= 0) & (self.codes[safe] == codes)
+        return np.where(found, pos, -1)
+
+    def lookup(self, jobs, dates):
+        """
+        Return the rates for parallel arrays of job names and dates as a dict of float arrays
+        ('Hourly wage' and the surcharges); NaN where no rate is valid (or the date is missing).
+        """
+        jobs = pd.Series(np.asarray(jobs, dtype=object)).fillna("").astype(str)
+        dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+        days = dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+        codes = jobs.map(self.jobs).fillna(-1).to_numpy(dtype=np.int64)
+        pos = self._find(codes, days)
+        generic = self.jobs.get("")
+        if generic is not None:
+            fallback = self._find(np.full(len(codes), generic, dtype=np.int64), days)
+            pos = np.where(pos < 0, fallback, pos)
+        pos = np.where(dates.isna().to_numpy(), -1, pos)
+        rows = self.values[pos]
+        return {column: rows[:, i] for i, column in enumerate(["Hourly wage"] + SURCHARGE_COLUMNS)}
+
+
+#EARNINGS
+
+def night_hours(start_minutes, end_minutes):
+    """
+    Hours of each shift between NIGHT_START and NIGHT_END (shifts end on the day they start).
+    """
+    start = np.asarray(start_minutes, dtype=float)
+    end = np.asarray(end_minutes, dtype=float)
+    early = np.clip(np.minimum(end, NIGHT_END) - start, 0, None)
+    late = np.clip(end - np.maximum(start, NIGHT_START), 0, None)
+    return np.nan_to_num(early + late) / 60
+
+def overtime_hours(entries_df, settings=None, whist=None):
+    """
+    Hours of each entry beyond the target hours of its ISO week (see TargetCalendar),
+    counting the entries of a week in date and start time order. Returns a float array.
+    """
+    df = compact_entries(entries_df[["Date", "Start time", "Hours worked"]])
+    hours = df["Hours worked"].fillna(0.0).to_numpy(dtype=float)
+    weeks = week_ordinal_of_dates(df["Date"])
+    target = TargetCalendar.from_settings(settings or {}, whist or {}).targets(weeks)
+
+    order = np.lexsort((df["Start time"].fillna(-1).to_numpy(dtype=np.int64), df["Date"].to_numpy()))
+    worked = pd.Series(hours[order]).groupby(weeks[order]).cumsum().to_numpy()
+    overtime = np.empty(len(df))
+    overtime[order] = np.clip(worked - target[order], 0, hours[order])
+    return overtime
+
+def price_entries(entries_df, rates, settings=None, whist=None):
+    """
+    Compute the earnings of all entries from the rate table in one vectorized pass.
+    Each entry is paid the wage of its job valid on its date; on top of that, hours on
+    Saturdays and Sundays earn the weekend surcharge, hours between NIGHT_START and NIGHT_END
+    the night surcharge and hours beyond the weekly target the overtime surcharge (surcharges add up).
+    Breaks are taken from the daytime hours first.
+    `rates` is a rate table DataFrame or a RateTable. Returns the earnings as a Series with the index
+    of entries_df, NaN for entries without a valid rate.
+    """
+    table = rates if isinstance(rates, RateTable) else RateTable(rates)
+    df = compact_entries(entries_df[["Job Name", "Date", "Start time", "End time", "Hours worked"]])
+    rate = table.lookup(df["Job Name"].astype(object).to_numpy(), df["Date"])
+    hours = df["Hours worked"].to_numpy(dtype=float)
+    night = np.minimum(night_hours(
+        df["Start time"].to_numpy(dtype=float, na_value=np.nan), df["End time"].to_numpy(dtype=float, na_value=np.nan)
+    ), hours)
+    weekend = (df["Date"].dt.dayofweek >= 5).to_numpy()
+    overtime = overtime_hours(df, settings, whist)
+    earnings = rate["Hourly wage"] * (
+        hours * (1 + weekend * rate["Weekend surcharge"])
+        + night * rate["Night surcharge"]
+        + overtime * rate["Overtime surcharge"]
+    )
+    return pd.Series(np.round(earnings, 2), index=entries_df.index)
+
+def price_new_entries(entries, rates, context=None, settings=None, whist=None):
+    """
+    Earnings of new entries (dicts) from the rate table in one pass, as a float array
+    (NaN where no rate applies). Pass the stored entries of their ISO weeks as `context`
+    so that their overtime hours are counted.
+    """
+    columns = ["Job Name", "Date", "Start time", "End time", "Hours worked"]
+    frames = [compact_entries(pd.DataFrame(entries)[columns])]
+    if context is not None and len(context):
+        frames.insert(0, compact_entries(context[columns]))
+    df = pd.concat([frame.astype({"Job Name": object}) for frame in frames], ignore_index=True)
+    return price_entries(df, rates, settings, whist).to_numpy()[-len(entries):]
+
+def price_entry(entry, rates, week_entries=None, settings=None, whist=None):
+    """
+    Earnings of one new entry (dict) from the rate table, or None if no rate applies.
+    Pass the other entries of its ISO week so that its overtime hours are counted.
+    """
+    earnings = price_new_entries([entry], rates, week_entries, settings, whist)[0]
+    return None if np.isnan(earnings) else float(earnings)
+
+def reprice_entries(storage, since=None, rates=None):
+    """
+    Re-price the stored entries with the rate table (the stored one unless given), e.g. after
+    a retroactive rate change. With `since`, only entries from the Monday of that week on are
+    considered. Entries without a valid rate keep their earnings. The earnings of the changed
+    entries are updated in place with one batched update_entries call, which keeps the rollups
+    up to date. Returns the number of re-priced entries.
+    """
+    rates = storage.load_rates() if rates is None else rates
+    entries = storage.load_entries()
+    if since is not None:
+        monday = since - timedelta(days=since.weekday())
+        entries = entries[pd.to_datetime(entries["Date"], errors="coerce") >= pd.Timestamp(monday)]
+    if entries.empty:
+        return 0
+    earnings = price_entries(entries, rates, storage.load_settings(), storage.load_weekly_hours_history())
+    old = pd.to_numeric(entries["Earnings"], errors="coerce")
+    changed = earnings.notna() & (old.isna() | ((earnings - old).abs() >= 0.005))
+    updates = [
+        {"ID": entry_id, "Earnings": float(amount)}
+        for entry_id, amount in zip(entries.loc[changed, "ID"], earnings[changed])
+    ]
+    if not updates:
+        return 0
+    storage.update_entries(updates)
+    return len(updates)
+
+
+#COMMAND LINE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-price the stored entries with the wage rate table.")
+    parser.add_argument("command", choices=["reprice"])
+    parser.add_argument("--since", type=date.fromisoformat, help="only entries from this date (YYYY-MM-DD) on")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="path to the Streamlit secrets file")
+    parser.add_argument("--user", help="user whose data to use in multi-user mode")
+    args = parser.parse_args(argv)
+
+    # Rollups must follow the new earnings
+    from timetrackerrollups import RollupStorage
+
+    storage = RollupStorage(open_storage(load_secrets(args.secrets), args.user))
+    repriced = reprice_entries(storage, args.since)
+    print(f"Re-priced {repriced} entries.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
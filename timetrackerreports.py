@@ -0,0 +1,314 @@
+"""
+Headless timesheet reports, e.g. for month-end payroll runs.
+
+Builds monthly ('2026-09') and yearly ('2026') reports per user (and optionally per job)
+as CSV and/or HTML with the weekly hours chart, without Streamlit. Report jobs are spread
+over a process pool; each user's entries are loaded and normalized only once per run and
+reused for all periods and jobs of that user. The whole run is bounded by --timeout.
+
+    python -m timetrackerreports 2026-09
+    python -m timetrackerreports 2026-07 2026-08 2026-09 --all-users --by-job --format csv html
+    python -m timetrackerreports 2025 --user alice --chart png --output reports/2025
+"""
+import argparse
+import html
+import multiprocessing
+import os
+import sys
+import time
+from datetime import date, timedelta
+import pandas as pd
+
+from timetrackerfunctions import (
+    summarize_weekly_hours,
+    summarize_monthly_hours,
+    calculate_overtime,
+    plot_weekly_hours,
+    fmt_time
+)
+from timetrackeraggregation import normalize_entries
+from timetrackerstorage import open_storage, load_secrets
+
+FORMATS = ("csv", "html")
+CHARTS = ("json", "png", "none")
+REPORT_COLUMNS = ["Date", "Job Name", "Start time", "End time", "Break minutes", "Hours worked", "Earnings"]
+
+
+#PERIODS
+
+def period_range(period):
+    """
+    First and last day of a period: 'YYYY' (a year) or 'YYYY-MM' (a month).
+    """
+    if len(period) == 4:
+        year = int(period)
+        return date(year, 1, 1), date(year, 12, 31)
+    year, month = map(int, period.split("-"))
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+def last_month(today=None):
+    """
+    The previous month as 'YYYY-MM' (the default period of a payroll run).
+    """
+    today = today or date.today()
+    return (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+
+#REPORTS
+
+def build_report(entries, settings, whist, period, job=None):
+    """
+    Compute one report from normalized entries (see normalize_entries).
+    Returns a dict with 'period', 'job', 'entries' (REPORT_COLUMNS, oldest first),
+    'weekly' (with overtime, see calculate_overtime), 'monthly' and the 'hours'/'earnings' totals.
+    Weeks at the edges of the period only count the days inside the period.
+    """
+    first, last = period_range(period)
+    mask = (entries["Date"] >= pd.Timestamp(first)) & (entries["Date"] <= pd.Timestamp(last))
+    if job is not None:
+        mask &= entries["Job Name"] == job
+    selected = entries[mask].sort_values(["Date", "Start time"])
+
+    weekly = summarize_weekly_hours(selected).sort_values(["Year", "Week"]).round(2).reset_index(drop=True)
+    weekly = calculate_overtime(weekly, settings, whist)
+    monthly = summarize_monthly_hours(selected).sort_values("Month").round(2).reset_index(drop=True)
+    table = pd.DataFrame({
+        "Date": selected["Date"].dt.strftime("%Y-%m-%d"),
+        "Job Name": selected["Job Name"].astype(object),
+        "Start time": fmt_time(selected["Start time"]),
+        "End time": fmt_time(selected["End time"]),
+        "Break minutes": selected["Break minutes"],
+        "Hours worked": selected["Hours worked"],
+        "Earnings": selected["Earnings"]
+    }, index=selected.index)[REPORT_COLUMNS].reset_index(drop=True)
+    return {
+        "period": period,
+        "job": job,
+        "entries": table,
+        "weekly": weekly,
+        "monthly": monthly,
+        "hours": round(float(selected["Hours worked"].sum()), 2),
+        "earnings": round(float(selected["Earnings"].sum()), 2)
+    }
+
+def report_name(user, report):
+    """
+    File name stem of a report: '<user>-<period>[-<job>]' (without the user in single-user mode).
+    """
+    parts = [user, report["period"], report["job"]]
+    name = "-".join(str(part) for part in parts if part)
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name)
+
+def write_report_csv(report, stem):
+    """
+    Write the entries of a report to '<stem>.csv' and its weekly summary to '<stem>-weekly.csv'.
+    """
+    report["entries"].to_csv(f"{stem}.csv", index=False)
+    report["weekly"].to_csv(f"{stem}-weekly.csv", index=False)
+    return [f"{stem}.csv", f"{stem}-weekly.csv"]
+
+def chart_html(report, chart="json"):
+    """
+    The weekly hours chart of a report as HTML: an interactive Plotly chart (embedded figure JSON,
+    plotly.js from the CDN), a static PNG image (needs the kaleido package) or nothing.
+    Yearly reports are charted per month.
+    """
+    if chart == "none" or report["weekly"].empty:
+        return ""
+    _, last = period_range(report["period"])
+    fig = plot_weekly_hours(report["weekly"], today=last, monthly=len(report["period"]) == 4)
+    if chart == "png":
+        import base64
+
+        image = base64.b64encode(fig.to_image(format="png", width=900, height=400)).decode("ascii")
+        return f"<img alt='Weekly hours' src='data:image/png;base64,{image}'>"
+    # The figure JSON is embedded directly; fig.to_html would hash plotly.js for every report
+    div_id = f"chart-{report_name('', report)}"
+    return (
+        f"<div id='{div_id}'></div><script>var figure = {fig.to_json()};"
+        f"Plotly.newPlot('{div_id}', figure.data, figure.layout);</script>"
+    )
+
+def plotly_script():
+    """
+    Script tag loading the plotly.js version that matches the installed plotly package from the CDN.
+    """
+    from plotly.offline import get_plotlyjs_version
+
+    return f"<script src='https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js' charset='utf-8'></script>"
+
+def write_report_html(report, stem, user=None, chart="json"):
+    """
+    Write a report as a standalone '<stem>.html' page: totals, chart, monthly and weekly summaries
+    and all entries.
+    """
+    title = " – ".join(str(part) for part in ("Timesheet", user, report["job"], report["period"]) if part)
+    tables = [
+        ("Monthly summary", report["monthly"]),
+        ("Weekly summary", report["weekly"]),
+        ("Entries", report["entries"])
+    ]
+    body = "".join(
+        f"<h2>{heading}</h2>{table.to_html(index=False, float_format='{:.2f}'.format, border=0)}"
+        for heading, table in tables
+    )
+    page = (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+        f"{plotly_script() if chart == 'json' and not report['weekly'].empty else ''}"
+        "<style>body{font-family:sans-serif;margin:2rem} table{border-collapse:collapse}"
+        " td,th{padding:0.2rem 0.6rem;text-align:right;border-bottom:1px solid #ddd}</style></head><body>"
+        f"<h1>{html.escape(title)}</h1>"
+        f"<p><b>Total:</b> {report['hours']:.2f} hours | {report['earnings']:.2f} €</p>"
+        f"{chart_html(report, chart)}{body}</body></html>"
+    )
+    with open(f"{stem}.html", "w", encoding="utf-8") as f:
+        f.write(page)
+    return [f"{stem}.html"]
+
+
+#WORKERS
+
+# Normalized entries, settings and weekly history per user, loaded once per process
+_user_data = {}
+
+def load_user_data(config, user):
+    """
+    Load and normalize a user's entries (plus settings and weekly history) once per process.
+    """
+    if user not in _user_data:
+        storage = open_storage(config, user)
+        _user_data[user] = (
+            normalize_entries(storage.load_entries()),
+            storage.load_settings(),
+            storage.load_weekly_hours_history()
+        )
+    return _user_data[user]
+
+def run_reports(config, user, periods, output, formats=FORMATS, by_job=False, chart="json"):
+    """
+    Write the reports of one user for the given periods (one per job with by_job).
+    Returns the written file paths.
+    """
+    entries, settings, whist = load_user_data(config, user)
+    jobs = sorted(entries["Job Name"].dropna().astype(str).unique()) if by_job else [None]
+    paths = []
+    for period in periods:
+        for job in jobs:
+            report = build_report(entries, settings, whist, period, job)
+            if job is not None and report["entries"].empty:
+                continue
+            stem = os.path.join(output, report_name(user, report))
+            if "csv" in formats:
+                paths += write_report_csv(report, stem)
+            if "html" in formats:
+                paths += write_report_html(report, stem, user, chart)
+    return paths
+
+def _run_task(task):
+    # Tasks of a split user carry the data loaded by the parent process
+    *args, data = task
+    if data is not None:
+        _user_data[args[1]] = data
+    return run_reports(*args)
+
+def plan_tasks(users, periods, workers):
+    """
+    Split the work into (user, periods) tasks: one per user, and for few users the periods are
+    split further so that all workers are busy. generate_reports loads a split user once in the
+    parent process and hands the data to its tasks, so no user is loaded twice.
+    """
+    chunks = max(1, -(-workers // max(len(users), 1)))
+    size = -(-len(periods) // chunks)
+    return [(user, periods[i:i + size]) for user in users for i in range(0, len(periods), size)]
+
+def generate_reports(config, users, periods, output, formats=FORMATS, by_job=False, chart="json",
+                     workers=None, timeout=None):
+    """
+    Write the reports of all users and periods, spread over `workers` processes (default: CPU count).
+    Stops after `timeout` seconds (None: no limit), also with a single worker.
+    Returns (written paths, {user: error message} for failed or unfinished users).
+    """
+    os.makedirs(output, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    deadline = None if timeout is None else time.monotonic() + timeout
+    planned = plan_tasks(users, periods, workers)
+    split = {user for user, _ in planned if sum(other == user for other, _ in planned) > 1}
+    paths, errors, data = [], {}, {}
+    for user in split:
+        try:
+            data[user] = load_user_data(config, user)
+        except Exception as e:
+            errors[user] = str(e)
+    tasks = [
+        (config, user, user_periods, output, formats, by_job, chart, data.get(user))
+        for user, user_periods in planned if user not in errors
+    ]
+    if workers == 1 and timeout is None:
+        for task in tasks:
+            try:
+                paths += _run_task(task)
+            except Exception as e:
+                errors[task[1]] = str(e)
+        return paths, errors
+
+    # With a timeout even a single worker runs in a pool process, so that it can be stopped
+    pool = multiprocessing.Pool(min(workers, len(tasks)) or 1)
+    try:
+        results = [(task[1], pool.apply_async(_run_task, (task,))) for task in tasks]
+        for user, result in results:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                paths += result.get(remaining)
+            except multiprocessing.TimeoutError:
+                errors[user] = "not finished before the timeout"
+            except Exception as e:
+                errors[user] = str(e)
+    finally:
+        # Also stops workers that are still running after a timeout
+        pool.terminate()
+        pool.join()
+    return paths, errors
+
+
+#COMMAND LINE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write timesheet reports for users, jobs and periods.")
+    parser.add_argument("periods", nargs="*", help="YYYY-MM (month) or YYYY (year); default: last month")
+    parser.add_argument("--user", action="append", help="user to report on (repeatable)")
+    parser.add_argument("--all-users", action="store_true", help="all users configured in the secrets")
+    parser.add_argument("--by-job", action="store_true", help="one report per job")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--chart", choices=CHARTS, default="json", help="chart in the HTML reports (png needs kaleido)")
+    parser.add_argument("--output", default="reports", help="output directory")
+    parser.add_argument("--workers", type=int, help="number of processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, help="stop after this many seconds")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="path to the Streamlit secrets file")
+    args = parser.parse_args(argv)
+
+    config = load_secrets(args.secrets)
+    periods = args.periods or [last_month()]
+    for period in periods:
+        try:
+            period_range(period)
+        except ValueError:
+            parser.error(f"invalid period {period!r}, expected YYYY-MM or YYYY")
+    if args.all_users:
+        users = sorted(config.get("users", {}))
+    else:
+        users = args.user or [None]
+
+    start = time.perf_counter()
+    paths, errors = generate_reports(
+        config, users, periods, args.output, args.format, args.by_job, args.chart, args.workers, args.timeout
+    )
+    print(f"Wrote {len(paths)} files to {args.output} in {time.perf_counter() - start:.1f} s.")
+    for user, error in errors.items():
+        print(f"Failed for {user or 'default user'}: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
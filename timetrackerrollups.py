@@ -0,0 +1,283 @@
+"""
+Precomputed weekly and monthly totals ("rollups").
+
+The rollup table holds one row per ISO week and per month with the summed hours,
+earnings and number of entries. RollupStorage keeps it up to date by adding or
+subtracting each saved or deleted entry, so the summaries and the chart read
+O(weeks) stored rows instead of re-aggregating every entry. The read-modify-write of
+the rollups is serialized per RollupStorage (all sessions of a user share one), and
+rollups_match lets the app detect rollups that drifted from the entries and rebuild them.
+
+Check or rebuild the stored rollups from the command line:
+    python -m timetrackerrollups check
+    python -m timetrackerrollups rebuild
+    python -m timetrackerrollups check --user alice
+"""
+import argparse
+import sys
+import threading
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+
+from timetrackerfunctions import ROLLUP_COLUMNS, calculate_overtime, safe_float
+from timetrackeraggregation import normalize_entries
+from timetrackerstorage import Storage, open_storage, load_secrets
+
+
+#ROLLUPS
+
+def build_rollups(entries_df):
+    """
+    Build the rollup table from scratch from all entries.
+    """
+    entries = normalize_entries(entries_df)
+    entries["WeekKey"] = entries["Year"].astype(str) + "-" + entries["Week"].astype(str).str.zfill(2)
+    parts = []
+    for period, key_column in (("week", "WeekKey"), ("month", "Month")):
+        part = entries.groupby(key_column).agg(
+            total_hours=("Hours worked", "sum"),
+            total_earnings=("Earnings", "sum"),
+            count=("Date", "size")
+        ).reset_index()
+        part.columns = ROLLUP_COLUMNS[1:]
+        part.insert(0, "Period", period)
+        parts.append(part)
+    rollups = pd.concat(parts, ignore_index=True)
+    rollups[["Total hours", "Total earnings"]] = rollups[["Total hours", "Total earnings"]].round(2)
+    return rollups[ROLLUP_COLUMNS]
+
+def entry_rollup_keys(entry):
+    """
+    Return the (period, key) pairs an entry contributes to, e.g.
+    [('week', '2026-07'), ('month', '2026-02')]; empty if its date is invalid.
+    """
+    day = pd.to_datetime(entry["Date"], errors="coerce")
+    if pd.isnull(day):
+        return []
+    year, week, _ = day.isocalendar()
+    return [("week", f"{year}-{week:02d}"), ("month", day.strftime("%Y-%m"))]
+
+def apply_entry(rollups, entry, sign=1):
+    """
+    Return a copy of the rollups with one entry added (sign=1) or removed (sign=-1).
+    Weeks or months without entries left are dropped.
+    """
+    hours = safe_float(entry["Hours worked"])
+    earnings = safe_float(entry["Earnings"])
+    hours = 0.0 if pd.isna(hours) else hours
+    earnings = 0.0 if pd.isna(earnings) else earnings
+    rollups = rollups[ROLLUP_COLUMNS].copy()
+    for period, key in entry_rollup_keys(entry):
+        match = (rollups["Period"] == period) & (rollups["Key"] == key)
+        if match.any():
+            rollups.loc[match, "Total hours"] = (rollups.loc[match, "Total hours"] + sign * hours).round(2)
+            rollups.loc[match, "Total earnings"] = (rollups.loc[match, "Total earnings"] + sign * earnings).round(2)
+            rollups.loc[match, "Entries"] = rollups.loc[match, "Entries"] + sign
+        elif sign > 0:
+            row = pd.DataFrame([[period, key, round(hours, 2), round(earnings, 2), 1]], columns=ROLLUP_COLUMNS)
+            rollups = pd.concat([rollups, row], ignore_index=True) if not rollups.empty else row
+    return rollups[rollups["Entries"] > 0].reset_index(drop=True)
+
+def add_rollups(rollups, delta, sign=1):
+    """
+    Return the rollups with another rollup table (e.g. build_rollups of a batch of entries)
+    added (sign=1) or subtracted (sign=-1). Weeks or months without entries left are dropped.
+    """
+    if delta.empty:
+        return rollups[ROLLUP_COLUMNS].copy()
+    delta = delta[ROLLUP_COLUMNS].copy()
+    delta[["Total hours", "Total earnings", "Entries"]] *= sign
+    combined = pd.concat([rollups[ROLLUP_COLUMNS], delta], ignore_index=True) if not rollups.empty else delta
+    combined = combined.groupby(["Period", "Key"], sort=False).sum().reset_index()
+    combined[["Total hours", "Total earnings"]] = combined[["Total hours", "Total earnings"]].round(2)
+    return combined[combined["Entries"] > 0].reset_index(drop=True)[ROLLUP_COLUMNS]
+
+def rollup_summaries(rollups, settings, whist):
+    """
+    Turn the rollup table into the weekly summary (with overtime) and the monthly summary,
+    both ascending and shaped like the output of aggregate_entries.
+    """
+    weeks = rollups[rollups["Period"] == "week"]
+    year_week = weeks["Key"].str.split("-", expand=True)
+    weekly = pd.DataFrame({
+        "Year": year_week[0].astype(int) if not weeks.empty else pd.Series(dtype=int),
+        "Week": year_week[1].astype(int) if not weeks.empty else pd.Series(dtype=int),
+        "total_hours": weeks["Total hours"].astype(float),
+        "total_earnings": weeks["Total earnings"].astype(float)
+    }).sort_values(by=["Year", "Week"]).reset_index(drop=True)
+    weekly = calculate_overtime(weekly, settings, whist)
+
+    months = rollups[rollups["Period"] == "month"]
+    monthly = pd.DataFrame({
+        "Month": months["Key"].astype(str),
+        "total_hours": months["Total hours"].astype(float),
+        "total_earnings": months["Total earnings"].astype(float)
+    }).sort_values(by="Month").reset_index(drop=True)
+    return weekly, monthly
+
+def check_rollups(storage):
+    """
+    Compare the stored rollups with a fresh rebuild from all entries.
+    Returns the rows that differ (empty DataFrame if the store is consistent).
+    """
+    stored = storage.load_rollups()
+    stored["Key"] = stored["Key"].astype(str)
+    rebuilt = build_rollups(storage.load_entries())
+    merged = stored.merge(rebuilt, on=["Period", "Key"], how="outer", suffixes=(" stored", " rebuilt"))
+    merged = merged.fillna(0)
+    differs = (
+        ((merged["Total hours stored"] - merged["Total hours rebuilt"]).abs() > 0.005)
+        | ((merged["Total earnings stored"] - merged["Total earnings rebuilt"]).abs() > 0.005)
+        | (merged["Entries stored"] != merged["Entries rebuilt"])
+    )
+    return merged[differs].reset_index(drop=True)
+
+def rollups_match(rollups, entry_index):
+    """
+    Cheap consistency check: True if the weekly rollups count as many entries as the entry
+    index holds entries with a valid date. Catches lost or doubled rollup updates without
+    rebuilding; use check_rollups for a full comparison.
+    """
+    weeks = rollups[rollups["Period"] == "week"]
+    counted = pd.to_numeric(weeks["Entries"], errors="coerce").fillna(0).sum()
+    dated = np.count_nonzero(entry_index.days != np.iinfo(np.int64).min)   # NaT dates
+    return int(counted) == int(dated)
+
+def rebuild_rollups(storage):
+    """
+    Recompute all rollups from the entries, store them and return them.
+    """
+    # Hold the rollup lock of a RollupStorage, so that no save is counted twice or lost meanwhile
+    with getattr(storage, "rollup_lock", None) or nullcontext():
+        rollups = build_rollups(storage.load_entries())
+        storage.save_rollups(rollups)
+    return rollups
+
+
+#STORAGE WRAPPER
+
+class RollupStorage(Storage):
+    """
+    Wrap another storage and update the stored rollups on every save and delete.
+    Each write and its rollup update run under `rollup_lock`, so concurrent sessions
+    sharing the wrapper don't overwrite each other's rollups. All other calls are passed
+    through unchanged.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.rollup_lock = threading.RLock()
+
+    def __getattr__(self, name):
+        # Pass through extras of the wrapped storage such as CachedStorage.invalidate
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    def load_entries(self):
+        return self.storage.load_entries()
+
+    def sync_entries(self, local_df):
+        return self.storage.sync_entries(local_df)
+
+    def save_entry(self, entry):
+        with self.rollup_lock:
+            entry = self.storage.save_entry(entry)
+            self.storage.save_rollups(apply_entry(self.storage.load_rollups(), entry, 1))
+        return entry
+
+    def save_entries(self, entries):
+        with self.rollup_lock:
+            entries = self.storage.save_entries(entries)
+            if entries:
+                delta = build_rollups(pd.DataFrame(entries))
+                self.storage.save_rollups(add_rollups(self.storage.load_rollups(), delta, 1))
+        return entries
+
+    def delete_entry(self, entry_id):
+        with self.rollup_lock:
+            deleted = self.storage.delete_entry(entry_id)
+            if deleted is not None:
+                self.storage.save_rollups(apply_entry(self.storage.load_rollups(), deleted, -1))
+        return deleted
+
+    def delete_entries(self, entry_ids):
+        with self.rollup_lock:
+            deleted = self.storage.delete_entries(entry_ids)
+            if deleted:
+                delta = build_rollups(pd.DataFrame(deleted))
+                self.storage.save_rollups(add_rollups(self.storage.load_rollups(), delta, -1))
+        return deleted
+
+    def update_entries(self, updates):
+        with self.rollup_lock:
+            before, after = self.storage.update_entries(updates)
+            if after:
+                # Add the new versions first, so that no week or month drops out in between
+                rollups = add_rollups(self.storage.load_rollups(), build_rollups(pd.DataFrame(after)), 1)
+                self.storage.save_rollups(add_rollups(rollups, build_rollups(pd.DataFrame(before)), -1))
+        return before, after
+
+    def count_entries(self, start=None, end=None, job=None):
+        return self.storage.count_entries(start, end, job)
+
+    def load_entries_page(self, start=None, end=None, job=None, offset=0, limit=50):
+        return self.storage.load_entries_page(start, end, job, offset, limit)
+
+    def entry_index(self):
+        return self.storage.entry_index()
+
+    def entries_between(self, start=None, end=None, job=None):
+        return self.storage.entries_between(start, end, job)
+
+    def load_settings(self):
+        return self.storage.load_settings()
+
+    def save_settings(self, settings):
+        self.storage.save_settings(settings)
+
+    def load_weekly_hours_history(self):
+        return self.storage.load_weekly_hours_history()
+
+    def save_weekly_hours_history(self, whist):
+        self.storage.save_weekly_hours_history(whist)
+
+    def load_rollups(self):
+        return self.storage.load_rollups()
+
+    def save_rollups(self, rollups):
+        self.storage.save_rollups(rollups)
+
+    def load_rates(self):
+        return self.storage.load_rates()
+
+    def save_rates(self, rates):
+        self.storage.save_rates(rates)
+
+
+#COMMAND LINE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or rebuild the stored weekly/monthly rollups.")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="path to the Streamlit secrets file")
+    parser.add_argument("--user", help="user whose data to use in multi-user mode")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(load_secrets(args.secrets), args.user)
+    if args.command == "rebuild":
+        rollups = rebuild_rollups(storage)
+        print(f"Rebuilt {len(rollups)} rollup rows.")
+        return 0
+    mismatches = check_rollups(storage)
+    if mismatches.empty:
+        print("Rollups are consistent with the entries.")
+        return 0
+    print(mismatches.to_string(index=False))
+    print(f"{len(mismatches)} rollup rows differ. Run 'python -m timetrackerrollups rebuild' to fix them.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,825 @@
+import os
+import sqlite3
+import threading
+import time
+import tomllib
+import pandas as pd
+
+from timetrackerfunctions import (
+    ENTRY_COLUMNS,
+    ROLLUP_COLUMNS,
+    RATE_COLUMNS,
+    stamp_entry,
+    merge_entry_changes,
+    load_entries_gsheet,
+    sync_entries_gsheet,
+    ensure_entry_ids_gsheet,
+    save_entry_gsheet,
+    save_entries_gsheet,
+    delete_entry_gsheet,
+    delete_entries_gsheet,
+    update_entries_gsheet,
+    filter_entries,
+    load_settings_gsheet,
+    save_settings_gsheet,
+    load_weekly_hours_history_gsheet,
+    save_weekly_hours_history_gsheet,
+    load_rollups_gsheet,
+    save_rollups_gsheet,
+    load_rates_gsheet,
+    save_rates_gsheet
+)
+from timetrackeraggregation import compact_entries
+from timetrackerquery import EntryIndex
+
+SPREADSHEET_NAME = "timetracker-data"
+SETTINGS_HEADER = ["key", "value"]
+WEEKLY_HISTORY_HEADER = ["week_id", "estimated_weekly_hours"]
+GSHEET_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+
+#STORAGE INTERFACE
+
+class Storage:
+    """
+    Common API for all storage backends used by the app.
+    Entries are returned as a DataFrame in storage order, settings as a dict
+    the weekly hours history as {week_id: estimated_weekly_hours} and the wage rates
+    as a DataFrame with RATE_COLUMNS.
+    Every entry carries a stable 'ID' and a 'Modified' timestamp.
+    load_entries returns the entries as stored (CachedStorage: in the compact typed schema of
+    compact_entries); the queries (entries_between, load_entries_page) always return them in
+    the compact schema. Consumers compact the entries themselves, which is cheap either way.
+    """
+
+    def load_entries(self):
+        raise NotImplementedError
+
+    def sync_entries(self, local_df):
+        """
+        Return local_df updated with entries added, changed or deleted since it was loaded.
+        """
+        return self.load_entries()
+
+    def save_entry(self, entry):
+        """
+        Store a new entry and return it including its 'ID' and 'Modified' values.
+        """
+        raise NotImplementedError
+
+    def save_entries(self, entries):
+        """
+        Store several new entries at once and return them like save_entry does.
+        """
+        return [self.save_entry(entry) for entry in entries]
+
+    def delete_entry(self, entry_id):
+        """
+        Delete the entry with the given ID and return it as a dict (None if not found).
+        """
+        raise NotImplementedError
+
+    def delete_entries(self, entry_ids):
+        """
+        Delete several entries by ID and return the deleted entries as dicts.
+        """
+        deleted = [self.delete_entry(entry_id) for entry_id in entry_ids]
+        return [entry for entry in deleted if entry is not None]
+
+    def update_entries(self, updates):
+        """
+        Change stored entries in place. Each update is a dict with the 'ID' and the new values
+        of some columns (e.g. 'Earnings'); entries keep their position and ID and get a fresh
+        'Modified'. Unknown IDs are ignored.
+        Returns (entries before, entries after the update) as lists of dicts.
+        """
+        raise NotImplementedError
+
+    def count_entries(self, start=None, end=None, job=None):
+        """
+        Number of entries matching the filters of load_entries_page.
+        """
+        return len(filter_entries(self.load_entries(), start, end, job))
+
+    def load_entries_page(self, start=None, end=None, job=None, offset=0, limit=50):
+        """
+        Return one page of entries between start and end (inclusive) and of the given job,
+        newest first, in the compact typed schema (see compact_entries).
+        Filters that are None are not applied.
+        """
+        page = filter_entries(self.load_entries(), start, end, job)
+        return compact_entries(page.iloc[offset:offset + limit].reset_index(drop=True))
+
+    def entry_index(self):
+        """
+        Return an EntryIndex (date-sorted, binary-searchable) of all entries.
+        """
+        return EntryIndex(self.load_entries())
+
+    def entries_between(self, start=None, end=None, job=None):
+        """
+        Return the entries between start and end (dates, inclusive) and of the given job, oldest first,
+        in the compact typed schema. Filters that are None are not applied.
+        """
+        return self.entry_index().entries_between(start, end, job)
+
+    def load_settings(self):
+        raise NotImplementedError
+
+    def save_settings(self, settings):
+        raise NotImplementedError
+
+    def load_weekly_hours_history(self):
+        raise NotImplementedError
+
+    def save_weekly_hours_history(self, whist):
+        raise NotImplementedError
+
+    def load_rollups(self):
+        """
+        Return the stored weekly/monthly totals as a DataFrame with ROLLUP_COLUMNS.
+        """
+        raise NotImplementedError
+
+    def save_rollups(self, rollups):
+        raise NotImplementedError
+
+    def load_rates(self):
+        """
+        Return the effective-dated wage rates as a DataFrame with RATE_COLUMNS.
+        """
+        raise NotImplementedError
+
+    def save_rates(self, rates):
+        raise NotImplementedError
+
+
+#GOOGLE SHEETS
+
+class SheetStorage(Storage):
+    """
+    Storage backed by gspread worksheets (entries, settings, weekly history, rollups, rates).
+    Works with real gspread worksheets as well as with MemoryWorksheet fakes.
+    """
+
+    def __init__(self, entries_sheet, settings_sheet, weekly_sheet, rollups_sheet, rates_sheet):
+        self.entries_sheet = entries_sheet
+        self.settings_sheet = settings_sheet
+        self.weekly_sheet = weekly_sheet
+        self.rollups_sheet = rollups_sheet
+        self.rates_sheet = rates_sheet
+
+    def load_entries(self):
+        return load_entries_gsheet(self.entries_sheet)
+
+    def sync_entries(self, local_df):
+        return sync_entries_gsheet(local_df, self.entries_sheet)
+
+    def save_entry(self, entry):
+        return save_entry_gsheet(entry, self.entries_sheet)
+
+    def save_entries(self, entries):
+        return save_entries_gsheet(entries, self.entries_sheet)
+
+    def delete_entry(self, entry_id):
+        return delete_entry_gsheet(entry_id, self.entries_sheet)
+
+    def delete_entries(self, entry_ids):
+        return delete_entries_gsheet(entry_ids, self.entries_sheet)
+
+    def update_entries(self, updates):
+        return update_entries_gsheet(updates, self.entries_sheet)
+
+    def load_settings(self):
+        return load_settings_gsheet(self.settings_sheet)
+
+    def save_settings(self, settings):
+        save_settings_gsheet(settings, self.settings_sheet)
+
+    def load_weekly_hours_history(self):
+        return load_weekly_hours_history_gsheet(self.weekly_sheet)
+
+    def save_weekly_hours_history(self, whist):
+        save_weekly_hours_history_gsheet(whist, self.weekly_sheet)
+
+    def load_rollups(self):
+        return load_rollups_gsheet(self.rollups_sheet)
+
+    def save_rollups(self, rollups):
+        save_rollups_gsheet(rollups, self.rollups_sheet)
+
+    def load_rates(self):
+        return load_rates_gsheet(self.rates_sheet)
+
+    def save_rates(self, rates):
+        save_rates_gsheet(rates, self.rates_sheet)
+
+
+def open_gsheet_storage(client, name=SPREADSHEET_NAME):
+    """
+    Open the spreadsheet once and return a SheetStorage for its worksheets.
+    Entries without an ID (older sheets) get one on the way. A missing spreadsheet
+    (e.g. for a new user) or missing worksheets are created empty.
+    """
+    from gspread.exceptions import SpreadsheetNotFound
+
+    try:
+        spreadsheet = client.open(name)
+    except SpreadsheetNotFound:
+        spreadsheet = client.create(name)
+    ensure_entry_ids_gsheet(spreadsheet.sheet1)
+    return SheetStorage(
+        spreadsheet.sheet1,
+        _worksheet(spreadsheet, "Settings", len(SETTINGS_HEADER)),
+        _worksheet(spreadsheet, "WeeklyHistory", len(WEEKLY_HISTORY_HEADER)),
+        _worksheet(spreadsheet, "Rollups", len(ROLLUP_COLUMNS)),
+        _worksheet(spreadsheet, "Rates", len(RATE_COLUMNS))
+    )
+
+def _worksheet(spreadsheet, title, cols):
+    # Existing worksheet or a new empty one; the header is written with the first save
+    from gspread.exceptions import WorksheetNotFound
+
+    try:
+        return spreadsheet.worksheet(title)
+    except WorksheetNotFound:
+        return spreadsheet.add_worksheet(title, rows=100, cols=cols)
+
+
+#IN-MEMORY FAKE
+
+class MemoryWorksheet:
+    """
+    In-memory stand-in for the subset of the gspread Worksheet API used by the app.
+    Rows are kept as lists; row 1 is the header, like in a real sheet.
+    """
+
+    def __init__(self, title="Sheet1", header=None):
+        self.title = title
+        self.rows = [list(header)] if header else []
+        self.col_count = 26
+
+    def get_all_records(self):
+        if not self.rows:
+            return []
+        header = self.rows[0]
+        records = []
+        for row in self.rows[1:]:
+            padded = list(row) + [""] * (len(header) - len(row))
+            records.append(dict(zip(header, padded)))
+        return records
+
+    def get_all_values(self, value_render_option=None):
+        return [list(row) for row in self.rows]
+
+    def row_values(self, row, value_render_option=None):
+        values = list(self.rows[row - 1]) if row <= len(self.rows) else []
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def col_values(self, col):
+        return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def batch_get(self, ranges, value_render_option=None):
+        result = []
+        for range_name in ranges:
+            start, _, end = range_name.partition(":")
+            first_col, first_row = _parse_a1_cell(start)
+            last_col, last_row = _parse_a1_cell(end or start)
+            if not any(ch.isdigit() for ch in end or start):
+                last_row = len(self.rows)
+            block = []
+            for row in self.rows[first_row - 1:last_row]:
+                cells = list(row[first_col - 1:last_col])
+                # Like the Sheets API, drop trailing empty cells
+                while cells and cells[-1] == "":
+                    cells.pop()
+                block.append(cells)
+            result.append(block)
+        return result
+
+    def add_cols(self, cols):
+        self.col_count += cols
+
+    def append_row(self, values):
+        self.rows.append(list(values))
+
+    def append_rows(self, values):
+        self.rows.extend(list(row) for row in values)
+
+    def batch_update(self, data):
+        for item in data:
+            self.update(item["values"], item["range"])
+
+    def update(self, values, range_name="A1"):
+        first_col, first_row = _parse_a1_cell(range_name.split(":")[0])
+        for r, row in enumerate(values):
+            index = first_row - 1 + r
+            while len(self.rows) <= index:
+                self.rows.append([])
+            target = self.rows[index]
+            while len(target) < first_col - 1 + len(row):
+                target.append("")
+            target[first_col - 1:first_col - 1 + len(row)] = list(row)
+        # Like the Sheets API, never report trailing empty rows
+        while self.rows and all(value == "" for value in self.rows[-1]):
+            self.rows.pop()
+
+    def clear(self):
+        self.rows = []
+
+    def delete_rows(self, start_index, end_index=None):
+        if end_index is None:
+            end_index = start_index
+        del self.rows[start_index - 1:end_index]
+
+
+def _parse_a1_cell(cell):
+    """
+    Convert an A1 cell reference like 'B12' to 1-based (column, row).
+    """
+    letters = cell.rstrip("0123456789")
+    col = 0
+    for ch in letters:
+        col = col * 26 + ord(ch.upper()) - ord("A") + 1
+    return col, int(cell[len(letters):] or 1)
+
+
+def memory_storage():
+    """
+    Return a SheetStorage backed by empty in-memory worksheets.
+    """
+    return SheetStorage(
+        MemoryWorksheet("Sheet1", ENTRY_COLUMNS),
+        MemoryWorksheet("Settings", SETTINGS_HEADER),
+        MemoryWorksheet("WeeklyHistory", WEEKLY_HISTORY_HEADER),
+        MemoryWorksheet("Rollups", ROLLUP_COLUMNS),
+        MemoryWorksheet("Rates", RATE_COLUMNS)
+    )
+
+
+#SQLITE
+
+# Column names in the entries table, in the same order as ENTRY_COLUMNS.
+SQL_ENTRY_COLUMNS = [
+    "job_name", "date", "start_time", "end_time", "break_minutes", "hours_worked", "earnings",
+    "entry_id", "modified"
+]
+# Most IDs bound in one 'IN (...)' query; older SQLite builds allow 999 parameters
+SQL_BATCH_SIZE = 500
+
+
+class SQLiteStorage(Storage):
+    """
+    Local storage in a SQLite database file (or ':memory:').
+    Entries are indexed by date; settings and weekly history are keyed tables.
+    """
+
+    def __init__(self, path="timetracker.db"):
+        # Streamlit runs each session in its own thread, so the connection is shared behind a lock.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_name TEXT,
+                    date TEXT,
+                    start_time TEXT,
+                    end_time TEXT,
+                    break_minutes REAL,
+                    hours_worked REAL,
+                    earnings REAL,
+                    entry_id TEXT,
+                    modified TEXT
+                );
+                CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value);
+                CREATE TABLE IF NOT EXISTS weekly_history (
+                    week_id TEXT PRIMARY KEY,
+                    estimated_weekly_hours REAL
+                );
+                CREATE TABLE IF NOT EXISTS rollups (
+                    period TEXT,
+                    key TEXT,
+                    total_hours REAL,
+                    total_earnings REAL,
+                    entries INTEGER,
+                    PRIMARY KEY (period, key)
+                );
+                CREATE TABLE IF NOT EXISTS rates (
+                    job_name TEXT,
+                    valid_from TEXT,
+                    hourly_wage REAL,
+                    weekend_surcharge REAL,
+                    night_surcharge REAL,
+                    overtime_surcharge REAL,
+                    PRIMARY KEY (job_name, valid_from)
+                );
+            """)
+            # Databases created before entries had IDs: add the columns and fill them in
+            existing = [row[1] for row in self.conn.execute("PRAGMA table_info(entries)")]
+            for column in ("entry_id", "modified"):
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT")
+            for (rowid,) in self.conn.execute("SELECT id FROM entries WHERE entry_id IS NULL").fetchall():
+                stamped = stamp_entry({})
+                self.conn.execute(
+                    "UPDATE entries SET entry_id = ?, modified = ? WHERE id = ?",
+                    (stamped["ID"], stamped["Modified"], rowid)
+                )
+            self.conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (date, start_time);
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_entry_id ON entries (entry_id);
+                CREATE INDEX IF NOT EXISTS idx_entries_modified ON entries (modified);
+                CREATE INDEX IF NOT EXISTS idx_entries_job_date ON entries (job_name, date);
+            """)
+
+    def _select_entries(self, where="", params=(), order="ORDER BY id"):
+        with self.lock:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(SQL_ENTRY_COLUMNS)} FROM entries {where} {order}",
+                self.conn, params=list(params)
+            )
+        df.columns = ENTRY_COLUMNS
+        return df
+
+    @staticmethod
+    def _filter_clause(start=None, end=None, job=None):
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("date >= ?")
+            params.append(str(start))
+        if end is not None:
+            conditions.append("date <= ?")
+            params.append(str(end))
+        if job is not None:
+            conditions.append("job_name = ?")
+            params.append(job)
+        return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def count_entries(self, start=None, end=None, job=None):
+        where, params = self._filter_clause(start, end, job)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM entries {where}", params).fetchone()[0]
+
+    def load_entries_page(self, start=None, end=None, job=None, offset=0, limit=50):
+        # Uses the date / job indexes; only the requested page leaves the database
+        where, params = self._filter_clause(start, end, job)
+        return compact_entries(self._select_entries(
+            where, params + [limit, offset], "ORDER BY date DESC, start_time DESC LIMIT ? OFFSET ?"
+        ))
+
+    def entries_between(self, start=None, end=None, job=None):
+        where, params = self._filter_clause(start, end, job)
+        return compact_entries(self._select_entries(where, params, "ORDER BY date, start_time"))
+
+    def load_entries(self):
+        return self._select_entries()
+
+    def sync_entries(self, local_df):
+        # Only rows modified after the newest local timestamp, and rows not known locally, are fetched in full
+        if local_df.empty or "Modified" not in local_df.columns:
+            return self.load_entries()
+        # Same ISO format as stamp_entry, so that the text comparison in SQL orders correctly
+        newest = pd.to_datetime(local_df["Modified"], errors="coerce", utc=True, format="ISO8601").max()
+        if pd.isna(newest):
+            return self.load_entries()
+        with self.lock:
+            ids = [row[0] for row in self.conn.execute("SELECT entry_id FROM entries ORDER BY id")]
+        changed = [self._select_entries("WHERE modified >= ?", (newest.isoformat(timespec="milliseconds"),))]
+        # Another writer can commit a row stamped before our newest one; it is still new to us
+        known = set(local_df["ID"])
+        missing = [entry_id for entry_id in ids if entry_id not in known]
+        for i in range(0, len(missing), SQL_BATCH_SIZE):
+            chunk = missing[i:i + SQL_BATCH_SIZE]
+            changed.append(self._select_entries(f"WHERE entry_id IN ({', '.join('?' * len(chunk))})", chunk))
+        changed_df = pd.concat(changed, ignore_index=True).drop_duplicates("ID")
+        return merge_entry_changes(local_df, ids, changed_df)
+
+    def save_entry(self, entry):
+        return self.save_entries([entry])[0]
+
+    def save_entries(self, entries):
+        entries = [stamp_entry(entry) for entry in entries]
+        placeholders = ", ".join("?" * len(SQL_ENTRY_COLUMNS))
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO entries ({', '.join(SQL_ENTRY_COLUMNS)}) VALUES ({placeholders})",
+                [[entry[col] for col in ENTRY_COLUMNS] for entry in entries]
+            )
+        return entries
+
+    def delete_entry(self, entry_id):
+        deleted = self.delete_entries([entry_id])
+        return deleted[0] if deleted else None
+
+    def delete_entries(self, entry_ids):
+        entry_ids = list(entry_ids)
+        placeholders = ", ".join("?" * len(entry_ids))
+        deleted = self._select_entries(f"WHERE entry_id IN ({placeholders})", entry_ids)
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM entries WHERE entry_id IN ({placeholders})", entry_ids)
+        return deleted.to_dict("records")
+
+    def update_entries(self, updates):
+        updates = {update["ID"]: update for update in updates}
+        if not updates:
+            return [], []
+        placeholders = ", ".join("?" * len(updates))
+        before = self._select_entries(f"WHERE entry_id IN ({placeholders})", list(updates)).to_dict("records")
+        after = [stamp_entry({**entry, **updates[entry["ID"]]}) for entry in before]
+        columns = [col for col in ENTRY_COLUMNS[:-2] if any(col in update for update in updates.values())] + ["Modified"]
+        assignments = ", ".join(f"{SQL_ENTRY_COLUMNS[ENTRY_COLUMNS.index(col)]} = ?" for col in columns)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"UPDATE entries SET {assignments} WHERE entry_id = ?",
+                [[entry[col] for col in columns] + [entry["ID"]] for entry in after]
+            )
+        return before, after
+
+    def load_settings(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT key, value FROM settings ORDER BY rowid").fetchall()
+        settings = dict(rows)
+        # Convert expected numeric values (same as load_settings_gsheet)
+        for key in ("default_hourly_wage", "estimated_weekly_hours"):
+            if key in settings:
+                settings[key] = float(settings[key])
+        return settings
+
+    def save_settings(self, settings):
+        # One transaction that only touches changed, new or removed keys
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value WHERE value IS NOT excluded.value",
+                list(settings.items())
+            )
+            placeholders = ", ".join("?" * len(settings))
+            self.conn.execute(f"DELETE FROM settings WHERE key NOT IN ({placeholders})", list(settings))
+
+    def load_weekly_hours_history(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT week_id, estimated_weekly_hours FROM weekly_history ORDER BY week_id"
+            ).fetchall()
+        return {str(week_id): float(hours) for week_id, hours in rows}
+
+    def save_weekly_hours_history(self, whist):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO weekly_history (week_id, estimated_weekly_hours) VALUES (?, ?) "
+                "ON CONFLICT (week_id) DO UPDATE SET estimated_weekly_hours = excluded.estimated_weekly_hours "
+                "WHERE estimated_weekly_hours IS NOT excluded.estimated_weekly_hours",
+                list(whist.items())
+            )
+            placeholders = ", ".join("?" * len(whist))
+            self.conn.execute(f"DELETE FROM weekly_history WHERE week_id NOT IN ({placeholders})", list(whist))
+
+    def load_rollups(self):
+        with self.lock:
+            df = pd.read_sql_query(
+                "SELECT period, key, total_hours, total_earnings, entries FROM rollups ORDER BY period, key",
+                self.conn
+            )
+        df.columns = ROLLUP_COLUMNS
+        return df
+
+    def save_rollups(self, rollups):
+        rows = rollups[ROLLUP_COLUMNS].values.tolist()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO rollups (period, key, total_hours, total_earnings, entries) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (period, key) DO UPDATE SET total_hours = excluded.total_hours, "
+                "total_earnings = excluded.total_earnings, entries = excluded.entries",
+                rows
+            )
+            keep = {(row[0], row[1]) for row in rows}
+            stale = [key for key in self.conn.execute("SELECT period, key FROM rollups") if key not in keep]
+            self.conn.executemany("DELETE FROM rollups WHERE period = ? AND key = ?", stale)
+
+    def load_rates(self):
+        with self.lock:
+            df = pd.read_sql_query(
+                "SELECT job_name, valid_from, hourly_wage, weekend_surcharge, night_surcharge, overtime_surcharge "
+                "FROM rates ORDER BY job_name, valid_from",
+                self.conn
+            )
+        df.columns = RATE_COLUMNS
+        return df
+
+    def save_rates(self, rates):
+        # The table is small and edited as a whole, so it is replaced in one transaction
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM rates")
+            self.conn.executemany(
+                "INSERT INTO rates (job_name, valid_from, hourly_wage, weekend_surcharge, night_surcharge, "
+                "overtime_surcharge) VALUES (?, ?, ?, ?, ?, ?)",
+                rates[RATE_COLUMNS].values.tolist()
+            )
+
+
+#CONFIGURATION
+
+def open_storage(config, user=None, client=None):
+    """
+    Open the storage backend described by a config mapping (st.secrets or a loaded secrets.toml):
+    storage_backend = "gsheets" (default, uses gcp_service_account), "sqlite" (sqlite_path) or "memory".
+    With a user (multi-user mode) the user's own partition is opened, see user_partition.
+    Pass a client from open_gsheet_client to share one authorized connection between users.
+    """
+    backend = config.get("storage_backend", "gsheets")
+    partition = user_partition(config, user)
+    if backend == "sqlite":
+        return SQLiteStorage(partition)
+    if backend == "memory":
+        return memory_storage()
+    if client is None:
+        client = open_gsheet_client(config)
+    return open_gsheet_storage(client, partition)
+
+def open_gsheet_client(config):
+    """
+    Authorize a gspread client with the service account in the config (gcp_service_account).
+    The client is thread-safe enough to be shared by all sessions of the app.
+    """
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_info(dict(config["gcp_service_account"]), scopes=GSHEET_SCOPES)
+    return gspread.authorize(creds)
+
+def user_partition(config, user=None):
+    """
+    Return where a user's data lives: the spreadsheet name (gsheets) or database file (sqlite).
+    Without a user this is the single shared spreadsheet / sqlite_path. Users listed under
+    [users.<name>] in the config get 'timetracker-data-<name>' / 'timetracker-<name>.db'
+    unless their table sets 'spreadsheet' or 'sqlite_path'.
+    """
+    backend = config.get("storage_backend", "gsheets")
+    if backend == "sqlite":
+        key, default = "sqlite_path", config.get("sqlite_path", "timetracker.db")
+    else:
+        key, default = "spreadsheet", config.get("spreadsheet", SPREADSHEET_NAME)
+    if user is None:
+        return default
+    user_config = config.get("users", {}).get(user, {})
+    if key in user_config:
+        return user_config[key]
+    if backend == "sqlite":
+        stem, ext = os.path.splitext(default)
+        return f"{stem}-{user}{ext}"
+    return f"{default}-{user}"
+
+
+def load_secrets(path=".streamlit/secrets.toml"):
+    """
+    Read the Streamlit secrets file for scripts that run outside of Streamlit.
+    """
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+#CACHING
+
+class CachedStorage(Storage):
+    """
+    Wrap another storage and keep loaded entries, settings, weekly history, rollups and rates in memory.
+    Cached values expire after `ttl` seconds or on invalidate(); writes go through to the
+    wrapped storage and patch the cache, so the rerun after a save needs no reads.
+    Expired entries are refreshed with an incremental sync_entries() instead of a full load.
+    Entries are kept in the compact typed schema (see compact_entries), which is less than
+    half the size of the stored strings, and the entry index shares that frame.
+    """
+
+    def __init__(self, storage, ttl=60):
+        self.storage = storage
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._cache = {}
+        self._index = None
+
+    def invalidate(self, key=None):
+        """
+        Drop one cached value ('entries', 'settings', 'whist', 'rollups', 'rates') or all of them.
+        """
+        with self.lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def _get(self, key, loader, refresh=None):
+        with self.lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+        if cached is not None and refresh is not None:
+            value = refresh(cached[1])
+        else:
+            value = loader()
+        with self.lock:
+            self._cache[key] = (time.monotonic(), value)
+        return value
+
+    def _patch(self, key, update):
+        # Only patch values that are cached; otherwise the next load fetches fresh data anyway.
+        with self.lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache[key] = (cached[0], update(cached[1]))
+
+    # Callers modify the returned objects (e.g. parse dates in place), so always hand out copies.
+
+    def _entries(self):
+        # Read-only access to the cached frame, for callers that do not modify it
+        return self._get(
+            "entries",
+            lambda: compact_entries(self.storage.load_entries()),
+            lambda df: compact_entries(self.storage.sync_entries(df))
+        )
+
+    def load_entries(self):
+        return self._entries().copy()
+
+    def entry_index(self):
+        # Rebuilt only when the cached frame was replaced (refresh, save or delete)
+        entries = self._entries()
+        with self.lock:
+            index = self._index
+        if index is None or index[0] is not entries:
+            index = (entries, EntryIndex(entries))
+            with self.lock:
+                self._index = index
+        return index[1]
+
+    def entries_between(self, start=None, end=None, job=None):
+        return self.entry_index().entries_between(start, end, job)
+
+    def count_entries(self, start=None, end=None, job=None):
+        return self.entry_index().count(start, end, job)
+
+    def load_entries_page(self, start=None, end=None, job=None, offset=0, limit=50):
+        return self.entry_index().page(start, end, job, offset, limit)
+
+    def sync_entries(self, local_df):
+        return self.load_entries()
+
+    def save_entry(self, entry):
+        return self.save_entries([entry])[0]
+
+    def save_entries(self, entries):
+        entries = self.storage.save_entries(entries)
+        self._patch("entries", lambda df: compact_entries(pd.concat(
+            [df, compact_entries(pd.DataFrame(entries, columns=df.columns))], ignore_index=True
+        )))
+        return entries
+
+    def delete_entry(self, entry_id):
+        deleted = self.storage.delete_entry(entry_id)
+        self._patch("entries", lambda df: df[df["ID"] != entry_id].reset_index(drop=True))
+        return deleted
+
+    def delete_entries(self, entry_ids):
+        deleted = self.storage.delete_entries(entry_ids)
+        self._patch("entries", lambda df: df[~df["ID"].isin(list(entry_ids))].reset_index(drop=True))
+        return deleted
+
+    def update_entries(self, updates):
+        before, after = self.storage.update_entries(updates)
+        if after:
+            changed = pd.DataFrame(after, columns=ENTRY_COLUMNS)
+            self._patch("entries", lambda df: compact_entries(merge_entry_changes(df, list(df["ID"]), changed)))
+        return before, after
+
+    def load_settings(self):
+        return dict(self._get("settings", self.storage.load_settings))
+
+    def save_settings(self, settings):
+        self.storage.save_settings(settings)
+        self._patch("settings", lambda _: dict(settings))
+
+    def load_weekly_hours_history(self):
+        return dict(self._get("whist", self.storage.load_weekly_hours_history))
+
+    def save_weekly_hours_history(self, whist):
+        self.storage.save_weekly_hours_history(whist)
+        self._patch("whist", lambda _: dict(whist))
+
+    def load_rollups(self):
+        return self._get("rollups", self.storage.load_rollups).copy()
+
+    def save_rollups(self, rollups):
+        self.storage.save_rollups(rollups)
+        self._patch("rollups", lambda _: rollups.copy())
+
+    def load_rates(self):
+        return self._get("rates", self.storage.load_rates).copy()
+
+    def save_rates(self, rates):
+        self.storage.save_rates(rates)
+        self._patch("rates", lambda _: rates.copy())
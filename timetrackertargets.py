@@ -0,0 +1,138 @@
+"""
+Weekly target hours as a timeline.
+
+Each value in the weekly hours history (whist) is the target from its ISO week on.
+TargetCalendar carries every value forward until the next change and materializes the
+targets as a dense array indexed by week ordinal (weeks since Monday 1970-01-05), so the
+targets of any range of weeks are one slice and overtime is one vectorized subtraction.
+Holidays (settings 'holidays', comma-separated ISO dates) take one workday's share off the
+target of their week. A part-time week is a history value for that week followed by the
+previous value for the next week (see part_time_week).
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+
+DEFAULT_WEEKLY_HOURS = 40.0
+DEFAULT_WORKDAYS = 5
+EPOCH_MONDAY = 4  # 1970-01-05 in days since 1970-01-01
+MISSING_WEEK = np.iinfo(np.int64).min
+
+
+#WEEK ORDINALS
+
+def week_ordinal_of_dates(dates):
+    """
+    Week ordinal (weeks since Monday 1970-01-05) of each date; MISSING_WEEK for missing dates.
+    """
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+    days = dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+    return np.where(dates.isna().to_numpy(), MISSING_WEEK, (days - EPOCH_MONDAY) // 7)
+
+def week_ordinal(years, weeks):
+    """
+    Week ordinal of ISO years and week numbers (scalars or arrays).
+    """
+    years = np.asarray(years, dtype=np.int64)
+    weeks = np.asarray(weeks, dtype=np.int64)
+    # January 4th is always in ISO week 1
+    jan4 = (years - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64) + 3
+    return (jan4 - EPOCH_MONDAY) // 7 + weeks - 1
+
+def week_id(ordinal):
+    """
+    ISO week ID ('2026-07') of a week ordinal, as used in the weekly hours history.
+    """
+    year, week, _ = date.fromordinal(date(1970, 1, 5).toordinal() + int(ordinal) * 7).isocalendar()
+    return f"{year}-{week:02d}"
+
+def parse_holidays(value):
+    """
+    Parse the 'holidays' setting (comma-separated ISO dates, or a list) into a sorted list of dates.
+    Raises ValueError for an invalid date.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    return sorted({date.fromisoformat(str(item).strip()) for item in value or () if str(item).strip()})
+
+
+#CALENDAR
+
+class TargetCalendar:
+    """
+    Target hours per week: the latest weekly history value at or before the week (the first
+    value for earlier weeks, `default` without any history), less holidays on workdays.
+    """
+
+    def __init__(self, whist, default=DEFAULT_WEEKLY_HOURS, holidays=(), workdays=DEFAULT_WORKDAYS):
+        history = sorted(
+            (int(week_ordinal(*map(int, str(key).split("-")))), float(hours)) for key, hours in whist.items()
+        )
+        self.keys = np.array([key for key, _ in history], dtype=np.int64)
+        self.values = np.array([hours for _, hours in history], dtype=float)
+        self.default = float(default)
+        self.workdays = int(workdays)
+        holidays = parse_holidays(holidays)
+        # Only holidays on workdays (Monday = 0) reduce the target
+        workday_holidays = [day for day in holidays if day.weekday() < self.workdays]
+        self.holiday_weeks = week_ordinal_of_dates(workday_holidays).astype(np.int64)
+
+    @classmethod
+    def from_settings(cls, settings, whist):
+        """
+        Calendar for the app settings ('estimated_weekly_hours', 'holidays', 'workdays_per_week').
+        """
+        return cls(
+            whist,
+            settings.get("estimated_weekly_hours", DEFAULT_WEEKLY_HOURS),
+            settings.get("holidays", ""),
+            int(float(settings.get("workdays_per_week", DEFAULT_WORKDAYS)))
+        )
+
+    def base(self, ordinals):
+        """
+        Carried-forward history values for the given week ordinals, ignoring holidays.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if not len(self.keys):
+            return np.full(ordinals.shape, self.default)
+        pos = np.searchsorted(self.keys, ordinals, side="right") - 1
+        return self.values[np.clip(pos, 0, None)]
+
+    def dense(self, first, last):
+        """
+        Targets of the weeks first..last (ordinals, inclusive) as one array.
+        """
+        targets = self.base(np.arange(first, last + 1))
+        holidays = self.holiday_weeks[(self.holiday_weeks >= first) & (self.holiday_weeks <= last)]
+        if len(holidays):
+            days_off = np.bincount(holidays - first, minlength=len(targets))
+            targets = targets * np.clip(1 - days_off / self.workdays, 0, None)
+        return targets
+
+    def targets(self, ordinals):
+        """
+        Targets for any week ordinals (e.g. one per weekly summary row); NaN for MISSING_WEEK.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        valid = ordinals != MISSING_WEEK
+        if not valid.any():
+            return np.full(ordinals.shape, np.nan)
+        first = ordinals[valid].min()
+        table = self.dense(first, ordinals[valid].max())
+        return np.where(valid, table[np.where(valid, ordinals - first, 0)], np.nan)
+
+
+def part_time_week(whist, week, hours, calendar=None):
+    """
+    Return a copy of whist in which only the given week (ISO week ID) has `hours` as target:
+    the following week gets the previous value back, unless it already has its own value.
+    """
+    calendar = calendar or TargetCalendar(whist)
+    ordinal = int(week_ordinal(*map(int, week.split("-"))))
+    updated = dict(whist)
+    next_week = week_id(ordinal + 1)
+    if next_week not in updated:
+        updated[next_week] = float(calendar.base([ordinal])[0])
+    updated[week] = float(hours)
+    return updated